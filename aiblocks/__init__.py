@@ -0,0 +1 @@
+"""Blockly AI 程序运行时支持库（供执行服务和生成代码共同使用）"""
@@ -0,0 +1,161 @@
+"""语音特征提取与 GMM 批量打分：MFCC（含一、二阶差分）在进程池中并行计算，结果按文件内容哈希缓存到磁盘
+
+重新训练 GMM 时所有特征直接从缓存读取，不再解码音频；
+每个类别的特征矩阵用一次 np.concatenate 拼接，避免循环中 np.append 的反复复制。
+预测时 score_gmms 用矩阵运算一次算出所有测试帧在所有模型下的对数似然。
+"""
+import hashlib
+import os
+import warnings
+from pathlib import Path
+
+from aiblocks.parallel import cpu_count, process_pool
+
+# 特征计算方式变化时递增，使旧缓存失效
+CACHE_VERSION = '1'
+
+
+def cache_root():
+    """缓存目录由执行服务通过 BLOCKLY_FEATURE_CACHE 指定"""
+    return Path(os.environ.get('BLOCKLY_FEATURE_CACHE', '.feature_cache'))
+
+
+def mfcc(wav_path, delta=2, n_mfcc=13):
+    """提取 MFCC 及其差分特征，返回形状为 (帧数, n_mfcc * (delta + 1)) 的矩阵"""
+    import librosa
+    import numpy as np
+    y, sr = librosa.load(wav_path)
+    mfcc_feat = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
+    ans = [mfcc_feat]
+    if delta >= 1:
+        ans.append(librosa.feature.delta(mfcc_feat, order=1, mode='nearest'))
+    if delta >= 2:
+        ans.append(librosa.feature.delta(mfcc_feat, order=2, mode='nearest'))
+    return np.transpose(np.concatenate(ans, axis=0), [1, 0])
+
+
+def _cache_path(wav_path, delta, n_mfcc):
+    h = hashlib.sha256(f'{CACHE_VERSION}:{delta}:{n_mfcc}:'.encode())
+    with open(wav_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    key = h.hexdigest()
+    return cache_root() / key[:2] / f'{key}.npy'
+
+
+def _extract(wav_path, target, delta, n_mfcc):
+    """计算一个文件的特征并写入缓存（在进程池中执行）"""
+    import numpy as np
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        features = mfcc(wav_path, delta, n_mfcc)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f'.{target.stem}.{os.getpid()}.npy')
+    np.save(tmp, features)
+    os.replace(tmp, target)
+
+
+def mfcc_features(paths, delta=2, n_mfcc=13, workers=None):
+    """批量提取特征，返回与 paths 顺序一致的矩阵列表；未缓存的文件在进程池中并行计算"""
+    import numpy as np
+    targets = [_cache_path(p, delta, n_mfcc) for p in paths]
+    missing = [(p, t) for p, t in zip(paths, targets) if not t.is_file()]
+    if missing:
+        workers = workers or min(cpu_count(), len(missing))
+        if workers > 1 and len(missing) > 1:
+            with process_pool(workers) as pool:
+                futures = [pool.submit(_extract, p, t, delta, n_mfcc) for p, t in missing]
+                for future in futures:
+                    future.result()
+        else:
+            for p, t in missing:
+                _extract(p, t, delta, n_mfcc)
+        print(f"已提取并缓存 {len(missing)} 个音频文件的特征，{len(paths) - len(missing)} 个来自缓存")
+    return [np.load(t) for t in targets]
+
+
+def mfcc_by_label(data_dir, delta=2, n_mfcc=13, workers=None):
+    """按子目录（类别）提取特征，返回 [(类别名, 特征矩阵), ...]，顺序与 os.listdir 一致"""
+    import numpy as np
+    groups = []
+    for label in os.listdir(data_dir):
+        label_dir = os.path.join(data_dir, label)
+        if os.path.isdir(label_dir):
+            files = [os.path.join(label_dir, x) for x in os.listdir(label_dir) if x.endswith('.wav')]
+            groups.append((label, files))
+    # 所有类别的文件一起提交，进程池在类别之间也能并行
+    features = mfcc_features([f for _, files in groups for f in files], delta, n_mfcc, workers)
+    result, start = [], 0
+    for label, files in groups:
+        parts = features[start:start + len(files)]
+        start += len(files)
+        if parts:
+            result.append((label, np.concatenate(parts, axis=0)))
+    return result
+
+
+def _stack_gmms(gmm_models):
+    """把各对角协方差 GMM 的参数堆叠成 (模型数 * 分量数, 维数) 的数组，分量数不足的以权重 0 补齐"""
+    import numpy as np
+    k = max(model.n_components for model, _ in gmm_models)
+    d = gmm_models[0][0].means_.shape[1]
+    m = len(gmm_models)
+    means = np.zeros((m, k, d))
+    variances = np.ones((m, k, d))
+    log_weights = np.full((m, k), -np.inf)
+    for i, (model, _) in enumerate(gmm_models):
+        n = model.n_components
+        means[i, :n] = model.means_
+        variances[i, :n] = model.covariances_
+        log_weights[i, :n] = np.log(model.weights_)
+    return means.reshape(m * k, d), variances.reshape(m * k, d), log_weights, (m, k)
+
+
+def score_gmms(gmm_models, features, chunk=65536):
+    """计算每个文件在每个模型下的平均每帧对数似然（与 model.score 相同），返回 (文件数, 模型数) 的数组
+
+    把 log_gaussian_prob 推广到所有模型的所有分量：
+    sum((x - mu)^2 / var) 展开为 x^2 @ (1/var).T - 2 x @ (mu/var).T + sum(mu^2/var)，
+    所有帧对所有分量的结果由两次矩阵乘法一次算出，再按分量做 logsumexp。
+    只支持 covariance_type='diag'，其他类型逐个调用 model.score。
+    """
+    import numpy as np
+    if any(model.covariance_type != 'diag' for model, _ in gmm_models):
+        return np.array([[model.score(x) for model, _ in gmm_models] for x in features])
+
+    means, variances, log_weights, (m, k) = _stack_gmms(gmm_models)
+    precisions = 1.0 / variances
+    const = -0.5 * (np.log(2 * np.pi * variances).sum(axis=1) + (means ** 2 * precisions).sum(axis=1))
+    lengths = np.array([len(x) for x in features])
+    frames = np.concatenate(features, axis=0)
+
+    frame_scores = np.empty((len(frames), m))
+    for start in range(0, len(frames), chunk):
+        x = frames[start:start + chunk]
+        log_prob = const - 0.5 * (x ** 2) @ precisions.T + x @ (means * precisions).T
+        log_prob = log_prob.reshape(len(x), m, k) + log_weights
+        top = log_prob.max(axis=2, keepdims=True)
+        frame_scores[start:start + chunk] = (top + np.log(np.exp(log_prob - top).sum(axis=2, keepdims=True)))[..., 0]
+
+    # 按文件求每帧平均
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return np.add.reduceat(frame_scores, offsets, axis=0) / lengths[:, None]
+
+
+def confusion_matrix(true_labels, pred_labels, labels=None):
+    """返回 (混淆矩阵, 类别列表)，行为真实类别，列为预测类别"""
+    import numpy as np
+    labels = list(labels) if labels is not None else sorted(set(true_labels) | set(pred_labels))
+    index = {label: i for i, label in enumerate(labels)}
+    matrix = np.zeros((len(labels), len(labels)), dtype=int)
+    np.add.at(matrix, ([index[t] for t in true_labels], [index[p] for p in pred_labels]), 1)
+    return matrix, labels
+
+
+def format_confusion_matrix(matrix, labels):
+    """把混淆矩阵格式化为文本表格"""
+    width = max(4, max(len(str(label)) for label in labels) + 1, len(str(matrix.max())) + 1)
+    lines = ['真实\\预测'.ljust(width) + ''.join(str(label).rjust(width) for label in labels)]
+    for label, row in zip(labels, matrix):
+        lines.append(str(label).ljust(width) + ''.join(str(v).rjust(width) for v in row))
+    return '\n'.join(lines)
@@ -0,0 +1,73 @@
+"""可续训的 Keras 训练：每轮结束保存权重和优化器状态，运行超时或被终止后再次提交同一程序时从上次完成的轮次继续
+
+检查点目录由执行服务通过 BLOCKLY_CHECKPOINT_DIR 按程序指定；BLOCKLY_RESUME=0 时丢弃已有检查点重新训练。
+训练正常完成后删除检查点，之后再次提交同一程序会重新训练。
+使用 tf.train.Checkpoint 保存，恢复时不需要重新反序列化模型结构（自定义损失函数等不受影响）。
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+
+def checkpoint_root():
+    return Path(os.environ.get('BLOCKLY_CHECKPOINT_DIR', '.checkpoints'))
+
+
+def resume_enabled():
+    return os.environ.get('BLOCKLY_RESUME', '1') != '0'
+
+
+def _write_json(path, data):
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp.write_text(json.dumps(data), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def fit_resumable(model, *args, epochs=1, name='model', **kwargs):
+    """与 model.fit 用法相同，返回的 History 包含之前运行已完成轮次的记录
+
+    name: 同一程序中训练多个模型时用于区分各自的检查点
+    """
+    import tensorflow as tf
+
+    directory = checkpoint_root() / name
+    if not resume_enabled():
+        shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True, exist_ok=True)
+    history_path = directory / 'history.json'
+
+    epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+    ckpt = tf.train.Checkpoint(model=model, optimizer=model.optimizer, epoch=epoch)
+    manager = tf.train.CheckpointManager(ckpt, str(directory), max_to_keep=2)
+    saved = {}
+    if manager.latest_checkpoint:
+        # 优化器的状态变量在第一次训练步时才创建，恢复会延迟到那时完成
+        ckpt.restore(manager.latest_checkpoint)
+        done = int(epoch.numpy())
+        if history_path.is_file():
+            saved = {k: v[:done] for k, v in json.loads(history_path.read_text(encoding='utf-8')).items()}
+        print(f"从检查点恢复训练：已完成 {done}/{epochs} 轮")
+    initial_epoch = int(epoch.numpy())
+
+    class EpochCheckpoint(tf.keras.callbacks.Callback):
+        def on_epoch_end(self, index, logs=None):
+            for key, value in (logs or {}).items():
+                saved.setdefault(key, []).append(float(value))
+            epoch.assign(index + 1)
+            manager.save(checkpoint_number=index + 1)
+            _write_json(history_path, saved)
+
+    callbacks = list(kwargs.pop('callbacks', None) or []) + [EpochCheckpoint()]
+    if initial_epoch < epochs:
+        history = model.fit(*args, epochs=epochs, initial_epoch=initial_epoch, callbacks=callbacks, **kwargs)
+    else:
+        # 上次运行在训练完成后、删除检查点前被终止
+        print("训练已在之前的运行中完成，直接使用检查点中的模型")
+        history = tf.keras.callbacks.History()
+        history.set_model(model)
+    # 检查点只用于续训超时或被取消的运行，训练完成后即删除
+    shutil.rmtree(directory, ignore_errors=True)
+    history.history = saved
+    history.epoch = list(range(len(next(iter(saved.values()), []))))
+    return history
@@ -0,0 +1,101 @@
+"""KMeans 聚类数扫描：并行拟合一组 k，输出肘部法（inertia）和轮廓系数两条曲线
+
+标准化后的数据只复制一次到共享内存，各工作进程直接在共享内存上拟合，不再为每个任务序列化一份数据。
+每个工作进程的 BLAS/OpenMP 线程数限制为可用核数 / 进程数，避免多进程叠加多线程造成的过度订阅。
+"""
+import sys
+import time
+from itertools import repeat
+from multiprocessing import shared_memory
+
+from aiblocks.parallel import cpu_count, limit_threads, process_pool, thread_budget
+
+_shared = None
+
+
+def _attach(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(name, shape, dtype, threads):
+    """在工作进程中挂载共享内存中的数据，并限制线程数"""
+    global _shared
+    import numpy as np
+    limit_threads(threads)
+    shm = _attach(name)
+    _shared = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+
+
+def _fit(X, k, random_state, sample_size):
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score
+    start = time.perf_counter()
+    model = KMeans(n_clusters=k, random_state=random_state, n_init=10).fit(X)
+    silhouette = float('nan')
+    if 1 < k < len(X):
+        # 轮廓系数的计算量与样本数平方成正比，大数据集只在抽样上计算
+        silhouette = float(silhouette_score(X, model.labels_, sample_size=min(sample_size, len(X)),
+                                            random_state=random_state))
+    return {'k': k, 'inertia': float(model.inertia_), 'silhouette': silhouette,
+            'seconds': time.perf_counter() - start}
+
+
+def _fit_shared(k, random_state, sample_size):
+    return _fit(_shared[1], k, random_state, sample_size)
+
+
+def kmeans_sweep(X, k_values=range(2, 11), workers=None, random_state=42, sample_size=10000):
+    """对每个 k 拟合 KMeans，返回 (轮廓系数最高的 k, 各 k 的结果列表)
+
+    结果为 {'k', 'inertia', 'silhouette', 'seconds'}，按 k 排序。
+    """
+    import numpy as np
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    k_values = sorted(set(int(k) for k in k_values))
+    workers = workers or min(cpu_count(), len(k_values))
+
+    if workers <= 1 or len(k_values) <= 1:
+        results = [_fit(X, k, random_state, sample_size) for k in k_values]
+    else:
+        threads = thread_budget(workers)
+        shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+        try:
+            np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)[...] = X
+            with process_pool(workers, initializer=_init_worker,
+                              initargs=(shm.name, X.shape, X.dtype.str, threads)) as pool:
+                results = list(pool.map(_fit_shared, k_values, repeat(random_state), repeat(sample_size)))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    print(f"{'k':>4}{'inertia':>16}{'轮廓系数':>12}{'耗时(秒)':>10}")
+    for r in results:
+        print(f"{r['k']:>4}{r['inertia']:>16.2f}{r['silhouette']:>12.4f}{r['seconds']:>10.2f}")
+    scored = [r for r in results if r['silhouette'] == r['silhouette']]
+    best = max(scored, key=lambda r: r['silhouette']) if scored else results[0]
+    print(f"轮廓系数最高的聚类数: k = {best['k']}")
+    return best['k'], results
+
+
+def plot_sweep(results, path='output_sweep.png', best_k=None):
+    """在同一张图中绘制 inertia（肘部法）和轮廓系数随 k 的变化"""
+    import matplotlib.pyplot as plt
+    ks = [r['k'] for r in results]
+    fig, ax1 = plt.subplots(figsize=(8, 5))
+    ax1.plot(ks, [r['inertia'] for r in results], 'o-', color='tab:blue', label='Inertia')
+    ax1.set_xlabel('Number of clusters k')
+    ax1.set_ylabel('Inertia (elbow)', color='tab:blue')
+    ax2 = ax1.twinx()
+    ax2.plot(ks, [r['silhouette'] for r in results], 's--', color='tab:red', label='Silhouette')
+    ax2.set_ylabel('Silhouette score', color='tab:red')
+    if best_k is not None:
+        ax1.axvline(best_k, color='gray', linestyle=':', label=f'best k = {best_k}')
+    handles = ax1.get_legend_handles_labels()[0] + ax2.get_legend_handles_labels()[0]
+    ax1.legend(handles, [h.get_label() for h in handles], loc='upper center')
+    ax1.set_title('KMeans: Elbow and Silhouette')
+    ax1.grid(True)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
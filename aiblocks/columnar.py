@@ -0,0 +1,110 @@
+"""表格数据集的列式缓存：CSV/XLSX 首次读取后转换为 Feather 文件，之后直接读取列式缓存
+
+缓存以源文件的真实路径、大小和修改时间为键，源文件变化后自动重新转换，旧的缓存随之删除。
+Feather 需要 pyarrow（已列入 requirements.txt）；没有安装或数据无法转换时退回 pickle 格式，提示只打印一次。
+"""
+import hashlib
+import os
+from pathlib import Path
+
+# 转换方式或缓存格式变化时递增，使旧缓存失效
+CACHE_VERSION = '1'
+
+EXCEL_SUFFIXES = ('.xlsx', '.xls')
+TABLE_SUFFIXES = ('.csv',) + EXCEL_SUFFIXES
+
+_feather_warned = False
+
+
+def cache_root():
+    """缓存目录由执行服务通过 BLOCKLY_TABLE_CACHE 指定"""
+    return Path(os.environ.get('BLOCKLY_TABLE_CACHE', '.table_cache'))
+
+
+def _keys(path, options):
+    """返回 (源文件键, 源文件当前状态键)；前者用于清理同一源文件的旧缓存"""
+    import pandas as pd
+    real = os.path.realpath(path)
+    st = os.stat(real)
+    source = hashlib.sha256(f'{real}:{options}'.encode('utf-8')).hexdigest()[:16]
+    state = hashlib.sha256(
+        f'{CACHE_VERSION}:{pd.__version__}:{st.st_size}:{st.st_mtime_ns}'.encode()
+    ).hexdigest()[:16]
+    return source, state
+
+
+def _read_source(path, sheet_name, kwargs):
+    import pandas as pd
+    if str(path).lower().endswith(EXCEL_SUFFIXES):
+        return pd.read_excel(path, sheet_name=sheet_name, **kwargs)
+    return pd.read_csv(path, **kwargs)
+
+
+def _write(df, base):
+    """优先写 Feather，失败时写 pickle，返回缓存文件路径"""
+    global _feather_warned
+    tmp = base.with_name(f'.{base.name}.{os.getpid()}.tmp')
+    try:
+        df.reset_index(drop=True).to_feather(tmp)
+        target = base.with_suffix('.feather')
+    except (ImportError, ValueError, TypeError) as e:
+        if not _feather_warned:
+            _feather_warned = True
+            print(f"无法写入 Feather 缓存（{e}），改用 pickle")
+        df.to_pickle(tmp)
+        target = base.with_suffix('.pkl')
+    os.replace(tmp, target)
+    return target
+
+
+def _cached(base):
+    for suffix in ('.feather', '.pkl'):
+        if base.with_suffix(suffix).is_file():
+            return base.with_suffix(suffix)
+    return None
+
+
+def _load(target):
+    import pandas as pd
+    if target.suffix == '.feather':
+        return pd.read_feather(target)
+    return pd.read_pickle(target)
+
+
+def read_table(path, sheet_name=0, cache_dir=None, **kwargs):
+    """读取 CSV 或 Excel 文件，返回 DataFrame；其余参数传给 pd.read_csv / pd.read_excel
+
+    首次读取时转换为列式缓存，源文件和参数都未变化时直接读取缓存。
+    """
+    options = repr((sheet_name, sorted(kwargs.items())))
+    source, state = _keys(path, options)
+    root = Path(cache_dir) if cache_dir else cache_root()
+    base = root / f'{source}-{state}'
+    target = _cached(base)
+    if target is not None:
+        try:
+            return _load(target)
+        except Exception as e:
+            print(f"读取列式缓存失败（{e}），重新转换: {os.path.basename(path)}")
+    df = _read_source(path, sheet_name, kwargs)
+    root.mkdir(parents=True, exist_ok=True)
+    _write(df, base)
+    # 删除同一源文件的旧缓存
+    for old in root.glob(f'{source}-*'):
+        if not old.name.startswith(f'{source}-{state}'):
+            old.unlink(missing_ok=True)
+    return df
+
+
+def dataset_info(path, sheet_name=0, cache_dir=None):
+    """数据集的行列数和各列数据类型（读取时同样使用并生成列式缓存）"""
+    source, state = _keys(path, repr((sheet_name, [])))
+    root = Path(cache_dir) if cache_dir else cache_root()
+    cached = _cached(root / f'{source}-{state}') is not None
+    df = read_table(path, sheet_name=sheet_name, cache_dir=cache_dir)
+    return {
+        'rows': int(df.shape[0]),
+        'columns': int(df.shape[1]),
+        'dtypes': {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        'cached': cached,
+    }
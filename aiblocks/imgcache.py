@@ -0,0 +1,149 @@
+"""图片数据集预处理缓存：图片只在第一次运行时解码和缩放，保存为 uint8 的 .npy 文件
+
+之后的运行以内存映射方式打开缓存，几乎不需要加载时间；训练时再按批次归一化为 float32，
+常驻内存只有 uint8 数据（float32 整体数组的 1/4），且映射页可由多个运行进程共享。
+缓存键包含图片路径、大小、修改时间、目标尺寸和缩放方式，任一变化都会重新生成。
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+# 缓存格式变化时递增，使旧条目失效
+CACHE_VERSION = '1'
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+
+
+def cache_root():
+    """缓存目录由执行服务通过 BLOCKLY_IMAGE_CACHE 指定"""
+    return Path(os.environ.get('BLOCKLY_IMAGE_CACHE', '.image_cache'))
+
+
+def _decode(path, target_size, interpolation):
+    """解码为 RGB 并缩放到 target_size=(高, 宽)，与 keras load_img 的处理方式一致"""
+    import numpy as np
+    from PIL import Image
+    resample = {'nearest': Image.NEAREST, 'bilinear': Image.BILINEAR,
+                'bicubic': Image.BICUBIC}[interpolation]
+    with Image.open(path) as img:
+        img = img.convert('RGB')
+        if img.size != (target_size[1], target_size[0]):
+            img = img.resize((target_size[1], target_size[0]), resample)
+        return np.asarray(img, dtype=np.uint8)
+
+
+def _key(paths, target_size, interpolation):
+    h = hashlib.sha256()
+    h.update(json.dumps([CACHE_VERSION, list(target_size), interpolation]).encode())
+    for path in paths:
+        st = os.stat(path)
+        h.update(f'{path}\0{st.st_size}\0{st.st_mtime_ns}\n'.encode('utf-8'))
+    return h.hexdigest()
+
+
+def load_images(paths, target_size=(224, 224), interpolation='nearest'):
+    """返回形状为 (N, 高, 宽, 3) 的只读 uint8 内存映射数组，顺序与 paths 一致"""
+    import numpy as np
+    paths = [os.path.abspath(p) for p in paths]
+    key = _key(paths, target_size, interpolation)
+    root = cache_root()
+    entry = root / key
+    if (entry / 'images.npy').is_file():
+        return np.load(entry / 'images.npy', mmap_mode='r')
+
+    start = time.time()
+    tmp = root / f'.{key}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    # 直接写入磁盘上的数组，不在内存中先构造图片列表
+    out = np.lib.format.open_memmap(tmp / 'images.npy', mode='w+', dtype=np.uint8,
+                                    shape=(len(paths), target_size[0], target_size[1], 3))
+    for i, path in enumerate(paths):
+        out[i] = _decode(path, target_size, interpolation)
+    out.flush()
+    del out
+    with open(tmp / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump({'count': len(paths), 'target_size': list(target_size),
+                   'interpolation': interpolation, 'created': time.time()}, f)
+    try:
+        os.replace(tmp, entry)
+    except OSError:
+        # 其他运行已经生成了同一份缓存
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"已缓存 {len(paths)} 张图片（{time.time() - start:.1f} 秒），之后的运行将直接读取缓存")
+    return np.load(entry / 'images.npy', mmap_mode='r')
+
+
+def read_label_file(data_dir, label_file):
+    """读取每行为 "相对路径,标签" 的标签文件，返回 (图片路径列表, 标签列表)"""
+    paths, labels = [], []
+    with open(os.path.join(data_dir, label_file), 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            path, label = line.split(',')
+            paths.append(os.path.join(data_dir, path))
+            labels.append(int(label))
+    return paths, labels
+
+
+def scan_class_dirs(data_dir):
+    """按子目录划分类别（子目录名排序后的序号即标签），返回 (图片路径列表, 标签列表, 类别名列表)"""
+    class_names = sorted(d.name for d in Path(data_dir).iterdir() if d.is_dir())
+    paths, labels = [], []
+    for label, name in enumerate(class_names):
+        for file in sorted((Path(data_dir) / name).iterdir()):
+            if file.suffix.lower() in IMAGE_EXTENSIONS:
+                paths.append(str(file))
+                labels.append(label)
+    return paths, labels, class_names
+
+
+def load_image_dataset(data_dir, label_file=None, target_size=(224, 224), interpolation='nearest'):
+    """加载带标签的图片数据集，返回 (images, labels, class_names)
+
+    指定 label_file 时按标签文件读取，否则按子目录划分类别（此时 class_names 为子目录名）。
+    images 为 uint8 内存映射数组，用 image_batches 按批次归一化后送入模型。
+    """
+    import numpy as np
+    if label_file:
+        paths, labels = read_label_file(data_dir, label_file)
+        class_names = None
+    else:
+        paths, labels, class_names = scan_class_dirs(data_dir)
+    images = load_images(paths, target_size, interpolation)
+    return images, np.array(labels, dtype='int32'), class_names
+
+
+def image_batches(images, labels, batch_size=32, shuffle=True, scale=1 / 255.0, seed=None):
+    """把 uint8 图片数组包装为 Keras Sequence，每个批次读取时才转换为 float32 并乘以 scale"""
+    import numpy as np
+    import tensorflow as tf
+
+    class ImageBatches(tf.keras.utils.Sequence):
+        def __init__(self):
+            super().__init__()
+            self.rng = np.random.default_rng(seed)
+            self.order = np.arange(len(images))
+            if shuffle:
+                self.rng.shuffle(self.order)
+
+        def __len__(self):
+            return (len(images) + batch_size - 1) // batch_size
+
+        def __getitem__(self, i):
+            # 批内按顺序读取，减少内存映射文件的随机访问
+            idx = np.sort(self.order[i * batch_size:(i + 1) * batch_size])
+            x = images[idx].astype(np.float32)
+            x *= np.float32(scale)
+            return x, labels[idx]
+
+        def on_epoch_end(self):
+            if shuffle:
+                self.rng.shuffle(self.order)
+
+    return ImageBatches()
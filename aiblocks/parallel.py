@@ -0,0 +1,89 @@
+"""生成程序中使用的多进程辅助：进程池与每个工作进程的线程预算"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+# 各数值库读取的线程数环境变量，需在库初始化之前设置
+THREAD_ENV = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS')
+# 执行服务分配给本次运行的 CPU 核（逗号分隔），运行中启动的子进程继承
+CPU_BUDGET_ENV = 'BLOCKLY_CPUS'
+
+
+def cpu_count():
+    """当前进程可用的 CPU 核数：执行服务分配的预算，其次为进程的 CPU 亲和性"""
+    budget = os.environ.get(CPU_BUDGET_ENV)
+    if budget:
+        return len(budget.split(','))
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def thread_budget(workers):
+    """每个工作进程可用的线程数：CPU 核数平均分给各进程，避免多进程叠加多线程造成过度订阅"""
+    return max(1, cpu_count() // max(1, workers))
+
+
+def limit_threads(threads, tensorflow=False):
+    """限制当前进程中数值库的线程数，在工作进程初始化时调用；tensorflow 为 True 时同时设置 TF 的线程池"""
+    for name in THREAD_ENV:
+        os.environ[name] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(min(2, threads))
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+    if tensorflow:
+        try:
+            import tensorflow as tf
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+            tf.config.threading.set_inter_op_parallelism_threads(min(2, threads))
+        except (ImportError, RuntimeError):
+            # 未安装或 TF 运行时已初始化
+            pass
+
+
+def set_affinity(cpus):
+    """把当前进程绑定到指定的 CPU 核，之后启动的子进程继承；平台不支持时返回 False"""
+    try:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, cpus)
+        else:
+            import psutil
+            psutil.Process().cpu_affinity(list(cpus))
+        return True
+    except (ImportError, OSError, ValueError, AttributeError):
+        return False
+
+
+def apply_cpu_budget(cpus):
+    """应用执行服务分配的 CPU 预算：绑定到这些核，并把各数值库的线程数限制为核数"""
+    os.environ[CPU_BUDGET_ENV] = ','.join(str(c) for c in cpus)
+    set_affinity(cpus)
+    # TensorFlow 已预加载时直接设置其线程池，否则由环境变量在首次导入时生效
+    limit_threads(len(cpus), tensorflow='tensorflow' in sys.modules)
+
+
+@contextmanager
+def process_pool(max_workers, initializer=None, initargs=(), context=None):
+    """创建进程池；context 为 'spawn' 等启动方式，None 使用平台默认方式
+
+    生成的程序由 runpy 以 __main__ 身份执行，且没有 if __name__ == '__main__' 保护，
+    spawn 方式启动的子进程会按 __main__.__file__ 重新执行整个程序。
+    进程池存在期间暂时隐藏 __file__，子进程只导入任务函数所在的模块。
+    """
+    import multiprocessing
+    main = sys.modules.get('__main__')
+    saved = None
+    if main is not None and getattr(main, '__spec__', None) is None:
+        saved = main.__dict__.pop('__file__', None)
+    try:
+        mp_context = multiprocessing.get_context(context) if context else None
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                                 initializer=initializer, initargs=initargs) as pool:
+            yield pool
+    finally:
+        if saved is not None:
+            main.__file__ = saved
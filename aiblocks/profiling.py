@@ -0,0 +1,140 @@
+"""运行性能剖析：在运行进程中统计导入耗时、用户代码耗时、CPU 时间和峰值内存
+
+导入耗时通过包装 builtins.__import__ 统计最外层 import 语句的累计时间（嵌套导入计入最外层），
+其余时间计为用户代码。可选用 cProfile 输出累计耗时最多的函数。
+"""
+import builtins
+import os
+import sys
+import threading
+import time
+
+# 请求开启 cProfile 时由执行服务设置
+PROFILE_ENV = 'BLOCKLY_PROFILE'
+
+
+class ImportTimer:
+    """统计最外层 import 语句的累计耗时"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._local = threading.local()
+        self._original = None
+
+    def install(self):
+        original = self._original = builtins.__import__
+        local = self._local
+
+        def timed_import(*args, **kwargs):
+            if getattr(local, 'active', False):
+                return original(*args, **kwargs)
+            local.active = True
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+                local.active = False
+
+        builtins.__import__ = timed_import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+
+def resource_usage():
+    """本进程及已结束的子进程的 CPU 时间（秒）和峰值常驻内存（MB）"""
+    usage = {}
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        # Linux 上 ru_maxrss 单位为 KB，macOS 上为字节
+        scale = 1 / 2 ** 20 if sys.platform == 'darwin' else 1 / 1024
+        for who, key in ((resource.RUSAGE_SELF, 'self'), (resource.RUSAGE_CHILDREN, 'children')):
+            r = resource.getrusage(who)
+            usage[key] = {'user_cpu': r.ru_utime, 'system_cpu': r.ru_stime,
+                          'peak_rss_mb': round(r.ru_maxrss * scale, 1)}
+        peak = _proc_peak_rss_mb()
+        if peak is not None:
+            usage['self']['peak_rss_mb'] = peak
+        return usage
+    try:
+        import psutil
+    except ImportError:
+        return usage
+    proc = psutil.Process()
+    times = proc.cpu_times()
+    mem = proc.memory_info()
+    usage['self'] = {'user_cpu': times.user, 'system_cpu': times.system,
+                     'peak_rss_mb': round(getattr(mem, 'peak_wset', mem.rss) / 2 ** 20, 1)}
+    usage['children'] = {'user_cpu': getattr(times, 'children_user', 0.0),
+                         'system_cpu': getattr(times, 'children_system', 0.0)}
+    return usage
+
+
+def _proc_peak_rss_mb():
+    """/proc/self/status 中的 VmHWM（本进程的峰值常驻内存）"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def top_functions(profile, limit=25):
+    """cProfile 结果中累计耗时最多的函数"""
+    import pstats
+    stats = pstats.Stats(profile).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{'function': f'{name} ({os.path.basename(filename)}:{line})' if line else name,
+             'calls': calls, 'tottime': round(tottime, 4), 'cumtime': round(cumtime, 4)}
+            for (filename, line, name), (_, calls, tottime, cumtime, _) in rows]
+
+
+class RunProfiler:
+    """剖析一次运行：with 块内为用户程序的执行，结束后由 report() 返回统计结果"""
+
+    def __init__(self, cprofile=False, limit=25):
+        self.cprofile = cprofile
+        self.limit = limit
+        self.imports = ImportTimer()
+        self._profile = None
+        self.wall = self.cpu = 0.0
+
+    def __enter__(self):
+        if self.cprofile:
+            import cProfile
+            self._profile = cProfile.Profile()
+        self.imports.install()
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self._profile is not None:
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profile is not None:
+            self._profile.disable()
+        self.wall = time.perf_counter() - self._start
+        self.cpu = time.process_time() - self._cpu_start
+        self.imports.uninstall()
+        return False
+
+    def report(self):
+        result = {
+            'phases': {'imports': round(self.imports.seconds, 4),
+                       'user_code': round(max(0.0, self.wall - self.imports.seconds), 4)},
+            'wall': round(self.wall, 4),
+            'cpu': round(self.cpu, 4),
+            'rusage': resource_usage(),
+        }
+        if self._profile is not None:
+            result['top_functions'] = top_functions(self._profile, self.limit)
+        return result
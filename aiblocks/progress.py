@@ -0,0 +1,91 @@
+"""运行进度事件：子进程通过 stdout 中的标记行向执行服务上报结构化事件
+
+目前上报 Keras 每轮训练结束时的指标，服务端解析后以 epoch 事件推送给前端。
+"""
+import functools
+import importlib.abc
+import importlib.util
+import json
+import os
+import sys
+
+# 与 executor.py 中的协议常量保持一致
+EVENT_MARKER = b'\x00\x00BP-EVENT:'
+
+
+def emit_event(event_type, **data):
+    """向执行服务上报一个事件"""
+    data['type'] = event_type
+    try:
+        sys.stdout.flush()
+    except Exception:
+        pass
+    line = EVENT_MARKER + json.dumps(data, ensure_ascii=False, default=float).encode('utf-8') + b'\n'
+    os.write(1, line)
+
+
+class _PostImportFinder(importlib.abc.MetaPathFinder):
+    """在指定模块导入完成后执行回调"""
+
+    def __init__(self, name, callback):
+        self.name = name
+        self.callback = callback
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname != self.name:
+            return None
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(fullname)
+        if spec is None or spec.loader is None:
+            return spec
+        exec_module = spec.loader.exec_module
+        callback = self.callback
+
+        def exec_and_patch(module):
+            exec_module(module)
+            callback(module)
+
+        spec.loader.exec_module = exec_and_patch
+        return spec
+
+
+def when_imported(name, callback):
+    """模块已导入则立即回调，否则在导入完成后回调"""
+    if name in sys.modules:
+        callback(sys.modules[name])
+    else:
+        sys.meta_path.insert(0, _PostImportFinder(name, callback))
+
+
+def _patch_keras(tf):
+    """给 Model.fit 自动附加上报每轮指标的回调"""
+    try:
+        model_cls = tf.keras.Model
+        callback_cls = tf.keras.callbacks.Callback
+    except Exception:
+        return
+    original_fit = model_cls.fit
+    if getattr(original_fit, '_reports_progress', False):
+        return
+
+    class EpochReporter(callback_cls):
+        def on_epoch_end(self, epoch, logs=None):
+            metrics = {k: float(v) for k, v in (logs or {}).items()
+                       if isinstance(v, (int, float)) or hasattr(v, '__float__')}
+            emit_event('epoch', epoch=epoch + 1, epochs=self.params.get('epochs'), metrics=metrics)
+
+    @functools.wraps(original_fit)
+    def fit(self, *args, **kwargs):
+        # callbacks 以位置参数传入时（第 6 个参数）不做处理
+        if len(args) < 6:
+            callbacks = list(kwargs.get('callbacks') or [])
+            callbacks.append(EpochReporter())
+            kwargs['callbacks'] = callbacks
+        return original_fit(self, *args, **kwargs)
+
+    fit._reports_progress = True
+    model_cls.fit = fit
+
+
+def install_progress_hooks():
+    when_imported('tensorflow', _patch_keras)
@@ -0,0 +1,199 @@
+"""模型库：按名称和版本保存训练好的模型，预测程序直接加载而不必重新训练
+
+目录结构为 <root>/<name>/<version>/，其中包含模型文件和 meta.json。
+Keras 模型保存为 model.h5，其余（scikit-learn 等）用 joblib 保存为 model.joblib。
+已加载的模型保存在进程内的 LRU 缓存中；执行服务的预热进程会提前加载
+程序中引用的非 Keras 模型，fork 出的运行进程直接继承这些已加载的模型。
+Keras 模型不预加载（TensorFlow 在 fork 出的子进程中不可用），运行程序中的 load_model 每次都从磁盘加载，
+缓存只在该次运行内有效；需要常驻内存的 Keras 推理请使用执行服务的 /predict 接口。
+"""
+import json
+import os
+import pickle
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+KERAS = 'keras'
+SKLEARN = 'sklearn'
+
+_NAME_RE = re.compile(r'^[\w\-.]+$')
+
+
+def valid_name(name):
+    """模型名称只能包含字母、数字、下划线、连字符和点，且不能只由点组成（如 ..）"""
+    return isinstance(name, str) and bool(_NAME_RE.match(name)) and bool(name.strip('.'))
+
+
+def _framework_of(model):
+    module = type(model).__module__
+    if module.startswith(('keras', 'tensorflow')):
+        return KERAS
+    return SKLEARN
+
+
+def _save_file(model, framework, target):
+    if framework == KERAS:
+        path = target / 'model.h5'
+        model.save(str(path))
+        return path.name
+    try:
+        import joblib
+        path = target / 'model.joblib'
+        joblib.dump(model, path)
+    except ImportError:
+        path = target / 'model.pkl'
+        with open(path, 'wb') as f:
+            pickle.dump(model, f)
+    return path.name
+
+
+def _load_file(path):
+    path = Path(path)
+    if path.suffix in ('.h5', '.keras') or path.is_dir():
+        import tensorflow as tf
+        try:
+            return tf.keras.models.load_model(str(path))
+        except (ValueError, TypeError):
+            # 含自定义损失函数等对象时只加载结构和权重，用于预测
+            return tf.keras.models.load_model(str(path), compile=False)
+    if path.suffix == '.joblib':
+        import joblib
+        return joblib.load(path)
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class ModelRegistry:
+    """带版本的模型库
+
+    root: 模型库目录
+    cache_size: 进程内最多保留多少个已加载模型
+    """
+
+    def __init__(self, root, cache_size=8):
+        self.root = Path(root)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, model, name, metrics=None, labels=None):
+        """保存模型为 name 的新版本，返回版本号；labels 为按类别序号排列的类别名称"""
+        if not valid_name(name):
+            raise ValueError(f"模型名称只能包含字母、数字、下划线、连字符和点，且不能只由点组成: {name}")
+        framework = _framework_of(model)
+        model_dir = self.root / name
+        model_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            version = max(self._versions(name), default=0) + 1
+            target = model_dir / str(version)
+            tmp = model_dir / f'.{version}.tmp'
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir()
+            filename = _save_file(model, framework, tmp)
+            meta = {
+                'name': name,
+                'version': version,
+                'framework': framework,
+                'file': filename,
+                'created': time.time(),
+                'metrics': metrics or {},
+                'labels': list(labels) if labels is not None else None,
+            }
+            with open(tmp / 'meta.json', 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp, target)
+        return version
+
+    def load(self, name, version=None, path=None):
+        """加载模型，优先返回进程内缓存中的模型
+
+        先在模型库中按名称查找；模型库中没有时按文件路径 path（默认为 name 本身）加载。
+        """
+        meta = self.meta(name, version)
+        if meta is not None:
+            model_path = self.root / name / str(meta['version']) / meta['file']
+            return self._cached((name, meta['version']), lambda: _load_file(model_path))
+        file_path = Path(path if path is not None else name)
+        if file_path.exists():
+            file_path = file_path.resolve()
+            key = (str(file_path), file_path.stat().st_mtime_ns)
+            return self._cached(key, lambda: _load_file(file_path))
+        raise FileNotFoundError(f"模型库中不存在模型 {name}" + (f" 版本 {version}" if version else ''))
+
+    def meta(self, name, version=None):
+        """返回模型某个版本（默认最新版本）的元数据，不存在时返回 None"""
+        if not valid_name(name):
+            return None
+        if version is None:
+            version = max(self._versions(name), default=None)
+            if version is None:
+                return None
+        meta_path = self.root / name / str(version) / 'meta.json'
+        if not meta_path.is_file():
+            return None
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def list(self):
+        """列出所有模型及其版本"""
+        if not self.root.is_dir():
+            return []
+        models = []
+        for model_dir in sorted(self.root.iterdir()):
+            versions = sorted(self._versions(model_dir.name))
+            if versions:
+                latest = self.meta(model_dir.name, versions[-1])
+                models.append({'name': model_dir.name, 'versions': versions,
+                               'framework': latest['framework'], 'latest': latest})
+        return models
+
+    def warm(self, names, frameworks=(SKLEARN,)):
+        """提前把指定模型的最新版本加载进缓存
+
+        默认只加载 fork 安全的非 Keras 模型；Keras 模型在 fork 前加载会使运行进程中的 TensorFlow 不可用。
+        """
+        for name in names:
+            meta = self.meta(name)
+            if meta is None or meta['framework'] not in frameworks:
+                continue
+            try:
+                self.load(name)
+            except Exception as e:
+                print(f"预加载模型 {name} 失败: {e}")
+
+    def _versions(self, name):
+        model_dir = self.root / name
+        if not model_dir.is_dir():
+            return []
+        return [int(p.name) for p in model_dir.iterdir() if p.is_dir() and p.name.isdigit()]
+
+    def _cached(self, key, loader):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        model = loader()
+        with self._lock:
+            self._cache[key] = model
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return model
+
+
+# 生成代码使用的默认模型库，目录由执行服务通过 BLOCKLY_MODEL_DIR 指定
+default_registry = ModelRegistry(os.environ.get('BLOCKLY_MODEL_DIR', 'models'))
+
+
+def save_model(model, name, metrics=None, labels=None):
+    """保存模型到模型库，返回版本号"""
+    return default_registry.save(model, name, metrics=metrics, labels=labels)
+
+
+def load_model(name, version=None, path=None):
+    """从模型库加载模型，模型库中没有时按模型文件路径加载，同一进程内重复加载直接返回缓存"""
+    return default_registry.load(name, version, path=path)
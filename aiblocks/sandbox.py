@@ -0,0 +1,55 @@
+"""运行沙箱：在子进程内把共享数据集设为只读"""
+import os
+import sys
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND
+
+# 会修改文件系统的审计事件及其路径参数位置
+_MUTATING_EVENTS = {
+    'os.remove': (0,),
+    'os.rmdir': (0,),
+    'os.mkdir': (0,),
+    'os.rename': (0, 1),
+    'os.truncate': (0,),
+    'os.chmod': (0,),
+    'os.link': (1,),
+    'os.symlink': (1,),
+    'os.utime': (0,),
+    'shutil.rmtree': (0,),
+    'shutil.move': (0, 1),
+}
+
+
+def _is_write_open(mode, flags):
+    if isinstance(mode, str) and any(c in mode for c in 'wax+'):
+        return True
+    return isinstance(flags, int) and bool(flags & _WRITE_FLAGS)
+
+
+def install_readonly_guard(roots):
+    """安装审计钩子，禁止修改 roots 下的任何文件"""
+    roots = [os.path.normcase(os.path.realpath(r)) for r in roots]
+    if not roots:
+        return
+
+    def is_protected(path):
+        if isinstance(path, int) or path is None:
+            return False
+        try:
+            path = os.fsdecode(path)
+        except TypeError:
+            return False
+        real = os.path.normcase(os.path.realpath(path))
+        return any(real == r or real.startswith(r + os.sep) for r in roots)
+
+    def hook(event, args):
+        if event == 'open':
+            path, mode, flags = args
+            if _is_write_open(mode, flags) and is_protected(path):
+                raise PermissionError(f"共享数据集为只读，禁止写入: {path}")
+        elif event in _MUTATING_EVENTS:
+            for i in _MUTATING_EVENTS[event]:
+                if i < len(args) and is_protected(args[i]):
+                    raise PermissionError(f"共享数据集为只读，禁止修改: {args[i]}")
+
+    sys.addaudithook(hook)
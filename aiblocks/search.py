@@ -0,0 +1,206 @@
+"""并行超参数搜索：采样若干组超参数，用逐轮减半（successive halving）在多个进程中训练
+
+第一轮所有试验只训练少量轮次，按验证指标保留前 1/eta，存活的试验在上一轮模型的基础上继续训练更多轮，
+直到剩下的试验训练满 max_epochs 轮。训练数据以 .npy 文件共享给各工作进程（内存映射读取），
+每个进程的 TensorFlow/BLAS 线程数限制为可用核数 / 进程数。
+试验函数（如 train_fcnn）必须定义在可导入的模块中，以便在工作进程中调用。
+"""
+import itertools
+import math
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+
+from aiblocks.parallel import cpu_count, limit_threads, process_pool, thread_budget
+
+_data = None
+
+
+def _parse_value(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_space(spec):
+    """解析搜索范围，多个参数以分号分隔
+
+    name=a,b,c 为候选值；name=low~high 为区间，整数区间均匀采样，正数区间按对数均匀采样。
+    """
+    space = {}
+    for part in re.split(r'[;；\n]', spec):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, values = part.partition('=')
+        if not sep or not name.strip():
+            raise ValueError(f"搜索范围格式错误: {part}")
+        if '~' in values:
+            low, high = (_parse_value(v.strip()) for v in values.split('~', 1))
+            space[name.strip()] = (low, high)
+        else:
+            space[name.strip()] = [_parse_value(v.strip()) for v in re.split(r'[,，]', values) if v.strip()]
+    return space
+
+
+def _sample(dist, rng):
+    if isinstance(dist, list):
+        return rng.choice(dist)
+    low, high = dist
+    if isinstance(low, int) and isinstance(high, int):
+        return rng.randint(low, high)
+    if low > 0 and high > 0:
+        return math.exp(rng.uniform(math.log(low), math.log(high)))
+    return rng.uniform(low, high)
+
+
+def sample_configs(space, n_trials, seed=0):
+    """全部为候选值且组合数不超过 n_trials 时返回全部组合，否则随机采样 n_trials 组不重复的组合"""
+    if all(isinstance(v, list) for v in space.values()):
+        grid = [dict(zip(space, combo)) for combo in itertools.product(*space.values())]
+        if len(grid) <= n_trials:
+            return grid
+    rng = random.Random(seed)
+    configs, seen = [], set()
+    for _ in range(n_trials * 20):
+        if len(configs) >= n_trials:
+            break
+        config = {name: _sample(dist, rng) for name, dist in space.items()}
+        key = repr(sorted(config.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def _budgets(n, eta, min_epochs, max_epochs):
+    """每轮训练到的轮次：最后一轮为 max_epochs，之前每轮除以 eta"""
+    rounds, m = 1, n
+    while m >= eta:
+        m //= eta
+        rounds += 1
+    budgets = [max(min_epochs, round(max_epochs / eta ** (rounds - 1 - i))) for i in range(rounds)]
+    budgets[-1] = max_epochs
+    return [min(b, max_epochs) for b in budgets]
+
+
+def _init_worker(data_dir, n_arrays, threads):
+    global _data
+    import numpy as np
+    limit_threads(threads, tensorflow=True)
+    _data = tuple(np.load(os.path.join(data_dir, f'data{i}.npy'), mmap_mode='r') for i in range(n_arrays))
+
+
+def _run_trial(trainer, params, initial_epoch, epochs, model_path):
+    """在工作进程中把一个试验从 initial_epoch 继续训练到 epochs 轮，返回 (本次训练历史, 耗时)"""
+    start = time.perf_counter()
+    history = trainer(params, _data, initial_epoch, epochs, model_path)
+    return history, time.perf_counter() - start
+
+
+def train_fcnn(params, data, initial_epoch, epochs, model_path):
+    """FCNN（单隐藏层全连接网络）的试验函数；model_path 已存在时加载后继续训练，返回本次的训练历史"""
+    from tensorflow import keras
+    from tensorflow.keras import layers, models
+    x_train, y_train, x_val, y_val = data
+    if initial_epoch and os.path.exists(model_path):
+        model = keras.models.load_model(model_path)
+    else:
+        model = models.Sequential([
+            layers.Dense(int(params['hidden_nodes']), activation='relu', input_shape=(x_train.shape[1],)),
+            layers.Dense(int(y_train.max()) + 1, activation='softmax')
+        ])
+        model.compile(optimizer=keras.optimizers.SGD(learning_rate=float(params['learning_rate'])),
+                      loss='sparse_categorical_crossentropy',
+                      metrics=['accuracy'])
+    history = model.fit(x_train, y_train,
+                        validation_data=(x_val, y_val),
+                        initial_epoch=initial_epoch,
+                        epochs=epochs,
+                        batch_size=int(params['batch_size']),
+                        verbose=0)
+    model.save(model_path)
+    return history.history
+
+
+def _format_value(value):
+    return f'{value:.4g}' if isinstance(value, float) else str(value)
+
+
+def print_leaderboard(leaderboard, metric='val_accuracy'):
+    """打印排行榜：训练轮次多的在前，同轮次按指标排序"""
+    print(f"{'排名':<6}{'轮次':>6}{metric:>16}{'耗时(秒)':>10}  超参数")
+    for rank, trial in enumerate(leaderboard, 1):
+        params = ', '.join(f'{k}={_format_value(v)}' for k, v in trial['config'].items())
+        print(f"{rank:<6}{trial['epochs']:>6}{trial['score']:>16.4f}{trial['seconds']:>10.1f}  {params}")
+
+
+def successive_halving(trainer, space, data, base_params=None, n_trials=9, min_epochs=1, max_epochs=10,
+                       eta=3, workers=0, metric='val_accuracy', seed=0):
+    """并行搜索超参数，返回 (最佳模型, 最佳超参数, 排行榜)
+
+    trainer: 试验函数 trainer(params, data, initial_epoch, epochs, model_path) -> 训练历史字典
+    space: parse_space 的结果
+    data: 传给试验函数的数组元组，如 (x_train, y_train, x_val, y_val)
+    base_params: 不参与搜索的固定参数，与每组采样的超参数合并后传给试验函数
+    metric: 用于排序的验证指标，名称含 loss 时越小越好
+    排行榜每项含 config、epochs、score、seconds 和 history（各轮训练历史）。
+    """
+    import numpy as np
+    from tensorflow import keras
+
+    configs = sample_configs(space, n_trials, seed)
+    if not configs:
+        raise ValueError('搜索范围为空')
+    sign = -1 if 'loss' in metric else 1
+    eta = max(2, int(eta))
+    budgets = _budgets(len(configs), eta, max(1, int(min_epochs)), int(max_epochs))
+    workers = workers or min(cpu_count(), len(configs))
+    threads = thread_budget(workers)
+    print(f"超参数搜索: {len(configs)} 组，{len(budgets)} 轮（训练到 {budgets} 轮），"
+          f"{workers} 个进程，每个进程 {threads} 个线程")
+
+    state = tempfile.mkdtemp(prefix='.search-', dir=os.getcwd())
+    try:
+        for i, array in enumerate(data):
+            np.save(os.path.join(state, f'data{i}.npy'), np.ascontiguousarray(array))
+        trials = [{'config': config, 'params': {**(base_params or {}), **config}, 'epochs': 0,
+                   'score': float('nan'), 'seconds': 0.0, 'history': {},
+                   'path': os.path.join(state, f'trial{i}.h5')}
+                  for i, config in enumerate(configs)]
+        alive = trials
+        # TensorFlow 在 fork 出的子进程中不可用，工作进程统一用 spawn 方式启动
+        with process_pool(workers, initializer=_init_worker, initargs=(state, len(data), threads),
+                          context='spawn') as pool:
+            for rung, budget in enumerate(budgets):
+                futures = [(t, pool.submit(_run_trial, trainer, t['params'], t['epochs'], budget, t['path']))
+                           for t in alive if budget > t['epochs']]
+                for trial, future in futures:
+                    history, seconds = future.result()
+                    for key, values in history.items():
+                        trial['history'].setdefault(key, []).extend(values)
+                    trial['epochs'] = budget
+                    trial['seconds'] += seconds
+                    trial['score'] = trial['history'][metric][-1]
+                alive = sorted(alive, key=lambda t: sign * t['score'], reverse=True)
+                print(f"第 {rung + 1}/{len(budgets)} 轮: {len(alive)} 组训练到 {budget} 轮，"
+                      f"最佳 {metric} = {alive[0]['score']:.4f}")
+                if rung < len(budgets) - 1:
+                    alive = alive[:max(1, len(alive) // eta)]
+
+        leaderboard = sorted(trials, key=lambda t: (t['epochs'], sign * t['score']), reverse=True)
+        print_leaderboard(leaderboard, metric)
+        best = leaderboard[0]
+        model = keras.models.load_model(best['path'])
+    finally:
+        shutil.rmtree(state, ignore_errors=True)
+    for trial in leaderboard:
+        del trial['path'], trial['params']
+    print(f"最佳超参数: {best['config']}")
+    return model, best['config'], leaderboard
@@ -0,0 +1,151 @@
+"""大 CSV 文件的分块流式读取与增量训练
+
+ChunkedCSV 按块读取 CSV，只读取选中的列并使用显式数据类型（浮点统一为 float32），
+内存中同一时间只保留一个数据块。配合支持 partial_fit 的估计器
+（MiniBatchKMeans、IncrementalPCA、SGDRegressor、StandardScaler 等）按块训练，
+同一个 Blockly 程序可以处理远大于内存的数据文件。
+"""
+
+
+def infer_dtypes(path, columns=None, sample_rows=10000):
+    """根据文件开头的若干行推断各列的数据类型；数值列统一为 float32（整数列可能在后面出现缺失值）"""
+    import pandas as pd
+    from pandas.api import types
+    sample = pd.read_csv(path, usecols=columns, nrows=sample_rows)
+    dtypes = {}
+    for col, dtype in sample.dtypes.items():
+        if types.is_bool_dtype(dtype):
+            dtypes[col] = 'bool'
+        elif types.is_numeric_dtype(dtype):
+            dtypes[col] = 'float32'
+        else:
+            dtypes[col] = 'object'
+    return dtypes
+
+
+class ChunkedCSV:
+    """按块读取的 CSV 数据集，可多次迭代，每次产出一个 DataFrame 数据块
+
+    path: CSV 文件路径
+    columns: 要读取的列，None 表示全部列
+    chunksize: 每块的行数
+    dtype: 各列的数据类型，None 时自动推断
+    """
+
+    def __init__(self, path, columns=None, chunksize=100000, dtype=None):
+        import pandas as pd
+        self.path = path
+        self.columns = list(columns) if columns else list(pd.read_csv(path, nrows=0).columns)
+        self.chunksize = chunksize
+        self.dtype = dtype or infer_dtypes(path, self.columns)
+        self._split = None
+
+    def _view(self, columns=None, split=None):
+        view = object.__new__(ChunkedCSV)
+        view.path = self.path
+        view.columns = list(columns) if columns is not None else self.columns
+        view.chunksize = self.chunksize
+        view.dtype = {c: self.dtype[c] for c in view.columns if c in self.dtype}
+        view._split = split if split is not None else self._split
+        return view
+
+    def __iter__(self):
+        import numpy as np
+        import pandas as pd
+        reader = pd.read_csv(self.path, usecols=self.columns, dtype=self.dtype, chunksize=self.chunksize)
+        for i, chunk in enumerate(reader):
+            chunk = chunk[self.columns]
+            if self._split is not None:
+                # 每块用固定种子划分，多次迭代（多轮训练）时同一行总在同一侧
+                test_size, seed, is_test = self._split
+                mask = np.random.default_rng([seed, i]).random(len(chunk)) < test_size
+                chunk = chunk[mask if is_test else ~mask]
+            yield chunk
+
+    def __getitem__(self, columns):
+        """选择列，返回仍按块读取的数据集（用法与 DataFrame 相同：dataset[['a', 'b']]）"""
+        if isinstance(columns, str):
+            columns = [columns]
+        missing = [c for c in columns if c not in self.columns]
+        if missing:
+            raise KeyError(f"CSV 中没有列: {missing}")
+        return self._view(columns)
+
+    def split(self, test_size=0.2, random_state=42):
+        """按行随机划分为 (训练集, 测试集)，两者都仍按块读取"""
+        return (self._view(split=(test_size, random_state, False)),
+                self._view(split=(test_size, random_state, True)))
+
+    def head(self, n=5):
+        """文件开头的 n 行（不考虑划分）"""
+        import pandas as pd
+        return pd.read_csv(self.path, usecols=self.columns, dtype=self.dtype, nrows=n)[self.columns]
+
+    def sample(self, n=10000, random_state=42):
+        """均匀随机抽取最多 n 行（蓄水池抽样，内存中最多保留 n 行加一个数据块），用于可视化等"""
+        import numpy as np
+        import pandas as pd
+        rng = np.random.default_rng(random_state)
+        kept = None
+        for chunk in self:
+            chunk = chunk.assign(_key=rng.random(len(chunk)))
+            kept = chunk if kept is None else pd.concat([kept, chunk])
+            kept = kept.nsmallest(n, '_key')
+        if kept is None:
+            return pd.DataFrame(columns=self.columns)
+        return kept.sort_index().drop(columns='_key').reset_index(drop=True)
+
+    def count(self):
+        """数据行数（需要完整读取一遍文件）"""
+        return sum(len(chunk) for chunk in self)
+
+
+def _xy(chunk, features, target):
+    X = chunk[features].to_numpy() if features else chunk.drop(columns=[target] if target else []).to_numpy()
+    y = chunk[target].to_numpy() if target else None
+    return X, y
+
+
+def fit_incremental(estimator, data, features=None, target=None, epochs=1, scaler=None):
+    """按块调用 estimator.partial_fit 增量训练，返回 estimator
+
+    features: 特征列，None 表示除 target 外的全部列
+    target: 目标列，无监督模型（如 MiniBatchKMeans、IncrementalPCA）为 None
+    scaler: 标准化器（如 StandardScaler），先用一遍数据增量拟合，训练时对每块做变换
+    """
+    if scaler is not None:
+        for chunk in data:
+            scaler.partial_fit(_xy(chunk, features, target)[0])
+    for _ in range(epochs):
+        for chunk in data:
+            X, y = _xy(chunk, features, target)
+            if len(X) == 0:
+                continue
+            if scaler is not None:
+                X = scaler.transform(X)
+            if y is None:
+                estimator.partial_fit(X)
+            else:
+                estimator.partial_fit(X, y.ravel())
+    return estimator
+
+
+def evaluate_regression(model, data, features, target, scaler=None):
+    """按块预测并累计误差，返回 (均方误差, R^2)"""
+    n, sse, total, total_sq = 0, 0.0, 0.0, 0.0
+    for chunk in data:
+        X, y = _xy(chunk, features, target)
+        if len(X) == 0:
+            continue
+        if scaler is not None:
+            X = scaler.transform(X)
+        y = y.ravel().astype('float64')
+        pred = model.predict(X).ravel()
+        n += len(y)
+        sse += float(((y - pred) ** 2).sum())
+        total += float(y.sum())
+        total_sq += float((y ** 2).sum())
+    if n == 0:
+        raise ValueError('测试集为空')
+    ss_tot = total_sq - total ** 2 / n
+    return sse / n, 1 - sse / ss_tot if ss_tot > 0 else 0.0
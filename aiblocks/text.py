@@ -0,0 +1,284 @@
+"""中文文本预处理缓存：分词结果和训练好的 Word2Vec 模型保存到磁盘，重复运行时直接读取
+
+分词在进程池中按块并行执行，结果按原顺序逐块写入缓存文件（每行一条、词以空格分隔），
+之后以可重复迭代的流式语料交给 Word2Vec，内存占用不随语料大小增长。
+分词缓存以语料文件哈希、停用词表哈希和 jieba 版本为键；Word2Vec 模型以分词结果和训练参数为键。
+只修改 PCA、SVM 等后续步骤时，分词和词向量训练都不会重新执行。
+句子向量用补齐后的词序号矩阵一次取词向量再求平均。
+"""
+import csv
+import hashlib
+import itertools
+import json
+import os
+import pickle
+import re
+import shutil
+from collections import deque
+from pathlib import Path
+
+from aiblocks.parallel import cpu_count, process_pool
+
+# 分词方式或缓存格式变化时递增，使旧缓存失效
+CACHE_VERSION = '2'
+
+
+def cache_root():
+    """缓存目录由执行服务通过 BLOCKLY_TEXT_CACHE 指定"""
+    return Path(os.environ.get('BLOCKLY_TEXT_CACHE', '.text_cache'))
+
+
+def clean_text(text):
+    """清理文本，只保留中文"""
+    text = re.sub(r'[^\u4e00-\u9fa5]', '', text)
+    return text.strip()
+
+
+def load_stopwords(path):
+    """加载停用词表"""
+    with open(path, 'r', encoding='utf8') as f:
+        return set(f.read().strip().split('\n'))
+
+
+def tokenize(text, stopwords):
+    """分词并去除停用词"""
+    import jieba
+    return [word for word in jieba.cut(text) if word not in stopwords]
+
+
+def _hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _hash_words(words):
+    return hashlib.sha256('\n'.join(sorted(words)).encode('utf-8')).hexdigest()
+
+
+def corpus_hash(corpus):
+    """分词后语料的哈希；流式语料直接使用其缓存键"""
+    if getattr(corpus, 'key', None):
+        return corpus.key
+    h = hashlib.sha256()
+    for words in corpus:
+        h.update('\x1f'.join(words).encode('utf-8'))
+        h.update(b'\x1e')
+    return h.hexdigest()
+
+
+def _detect_encoding(path):
+    with open(path, 'rb') as f:
+        head = f.read(1 << 16)
+    for encoding in ('utf-8-sig', 'gb18030'):
+        try:
+            head.decode(encoding)
+            return encoding
+        except UnicodeDecodeError as e:
+            # 读取边界处被截断的多字节字符不算解码失败
+            if e.start >= len(head) - 4:
+                return encoding
+    return 'latin1'
+
+
+def _parse_label(row, column, dtype=int):
+    """解析标签列，空值或格式错误（原始 csv 中有少量错行）返回 None"""
+    try:
+        return dtype(row.get(column).strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+def _read_excel(file_path, column, label_column):
+    """通过列式缓存读取 Excel 语料，返回 (文本列表, 标签列表)，跳过标签无效的行"""
+    import pandas as pd
+    from aiblocks.columnar import read_table
+    df = read_table(file_path)
+    if label_column not in df.columns:
+        return df[column].fillna('').astype(str).tolist(), None
+    labels = pd.to_numeric(df[label_column], errors='coerce')
+    valid = labels.notna()
+    return df.loc[valid, column].fillna('').astype(str).tolist(), labels[valid].astype(int).tolist()
+
+
+def read_texts(file_path, column='review', label_column='label'):
+    """逐条读取语料：pickle 为文本列表，csv/xlsx 取 column 列（跳过标签为空的行），其他文件每行一条"""
+    file_path = str(file_path)
+    if file_path.endswith(('.pickle', '.pkl')):
+        with open(file_path, 'rb') as f:
+            yield from pickle.load(f)
+        return
+    if file_path.endswith(('.xlsx', '.xls')):
+        yield from _read_excel(file_path, column, label_column)[0]
+        return
+    with open(file_path, 'r', encoding=_detect_encoding(file_path), newline='') as f:
+        if file_path.endswith('.csv'):
+            reader = csv.DictReader(f)
+            labeled = label_column in (reader.fieldnames or ())
+            for row in reader:
+                if labeled and _parse_label(row, label_column) is None:
+                    continue
+                yield row.get(column) or ''
+        else:
+            for line in f:
+                yield line.rstrip('\r\n')
+
+
+def read_column(file_path, column='label', dtype=int):
+    """读取 csv/xlsx 的标签列，跳过无效值，与 read_texts 读出的文本一一对应"""
+    if str(file_path).endswith(('.xlsx', '.xls')):
+        return [dtype(label) for label in _read_excel(file_path, column, column)[1] or []]
+    with open(file_path, 'r', encoding=_detect_encoding(file_path), newline='') as f:
+        labels = (_parse_label(row, column, dtype) for row in csv.DictReader(f))
+        return [label for label in labels if label is not None]
+
+
+_stopwords = None
+
+
+def _init_worker(stopwords):
+    global _stopwords
+    _stopwords = stopwords
+
+
+def _tokenize_chunk(texts):
+    return [' '.join(tokenize(clean_text(text), _stopwords)) for text in texts]
+
+
+def _tokenized_lines(texts, stopwords, workers, chunk_size):
+    """按块并行分词，按原顺序逐块产出；在途的块数有上限，内存占用固定"""
+    texts = iter(texts)
+    chunks = iter(lambda: list(itertools.islice(texts, chunk_size)), [])
+    if workers <= 1:
+        _init_worker(stopwords)
+        for chunk in chunks:
+            yield from _tokenize_chunk(chunk)
+        return
+    with process_pool(workers, initializer=_init_worker, initargs=(stopwords,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_tokenize_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class TokenizedCorpus:
+    """分词缓存文件上的流式语料，可多次迭代（Word2Vec 建词表和每轮训练各迭代一次）"""
+
+    def __init__(self, path, key):
+        self.path = Path(path)
+        self.key = key
+        self._len = None
+
+    def __iter__(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield line.split()
+
+    def __len__(self):
+        if self._len is None:
+            with open(self.path, 'rb') as f:
+                self._len = sum(1 for _ in f)
+        return self._len
+
+    def __add__(self, other):
+        return ChainedCorpus(self, other)
+
+
+class ChainedCorpus:
+    """多个流式语料依次拼接（如负面语料 + 正面语料）"""
+
+    def __init__(self, *parts):
+        self.parts = parts
+        self.key = hashlib.sha256(':'.join(corpus_hash(p) for p in parts).encode()).hexdigest()
+
+    def __iter__(self):
+        for part in self.parts:
+            yield from part
+
+    def __len__(self):
+        return sum(len(p) for p in self.parts)
+
+    def __add__(self, other):
+        return ChainedCorpus(*self.parts, other)
+
+
+def tokenize_file(file_path, stopwords, column='review', workers=None, chunk_size=500):
+    """对语料文件分词（进程池按块并行），返回流式语料；同一语料和停用词表只分词一次"""
+    import jieba
+    key = hashlib.sha256(
+        f'{CACHE_VERSION}:{jieba.__version__}:{column}:{_hash_file(file_path)}:{_hash_words(stopwords)}'.encode()
+    ).hexdigest()
+    path = cache_root() / 'tokens' / f'{key}.txt'
+    if path.is_file():
+        print(f"从缓存读取分词结果: {os.path.basename(file_path)}")
+        return TokenizedCorpus(path, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{key}.{os.getpid()}.txt')
+    workers = workers or cpu_count()
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for line in _tokenized_lines(read_texts(file_path, column), stopwords, workers, chunk_size):
+            f.write(line + '\n')
+    os.replace(tmp, path)
+    return TokenizedCorpus(path, key)
+
+
+def load_tokenized(file_path, stopwords, column='review', workers=None):
+    """分词并以列表形式返回全部结果（语料较大时直接使用 tokenize_file 返回的流式语料）"""
+    return list(tokenize_file(file_path, stopwords, column, workers))
+
+
+def load_word2vec(corpus, **params):
+    """训练 Word2Vec 模型；同一语料和参数已训练过时直接加载缓存的模型。corpus 可以是流式语料"""
+    from gensim.models import Word2Vec
+    key = hashlib.sha256(
+        f'{CACHE_VERSION}:{corpus_hash(corpus)}:{json.dumps(params, sort_keys=True)}'.encode()
+    ).hexdigest()
+    model_dir = cache_root() / 'word2vec' / key
+    if (model_dir / 'model').is_file():
+        print("从缓存加载 Word2Vec 模型")
+        return Word2Vec.load(str(model_dir / 'model'))
+    model = Word2Vec(sentences=corpus, **params)
+    tmp = model_dir.with_name(f'.{key}.{os.getpid()}.tmp')
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    model.save(str(tmp / 'model'))
+    try:
+        os.replace(tmp, model_dir)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return model
+
+
+def sentence_vectors(wv, sentences, chunk=256):
+    """句子向量：句中在词表内的词向量的平均值，不含任何已知词的句子为零向量；sentences 可以是流式语料
+
+    每 chunk 个句子把词序号补齐成矩阵（补齐位置指向追加的零向量），一次取出词向量求和再除以词数。
+    """
+    import numpy as np
+    key_to_index = wv.key_to_index
+    pad = len(key_to_index)
+    table = np.vstack([wv.vectors, np.zeros((1, wv.vector_size), dtype=wv.vectors.dtype)])
+    sentences = iter(sentences)
+    blocks = []
+    while True:
+        rows = [[key_to_index[w] for w in words if w in key_to_index]
+                for words in itertools.islice(sentences, chunk)]
+        if not rows:
+            break
+        block = np.zeros((len(rows), wv.vector_size), dtype=np.float32)
+        width = max(len(r) for r in rows)
+        if width:
+            idx = np.full((len(rows), width), pad, dtype=np.int64)
+            for i, r in enumerate(rows):
+                idx[i, :len(r)] = r
+            counts = np.array([max(len(r), 1) for r in rows], dtype=np.float32)
+            block[:] = table[idx].sum(axis=1) / counts[:, None]
+        blocks.append(block)
+    if not blocks:
+        return np.zeros((0, wv.vector_size), dtype=np.float32)
+    return np.concatenate(blocks)
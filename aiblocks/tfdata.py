@@ -0,0 +1,57 @@
+"""基于 tf.data 的图片输入管道，替代 ImageDataGenerator.flow_from_directory
+
+图片解码和缩放由 tf.data 的线程池并行执行，解码结果以 uint8 缓存（首轮之后不再解码），
+按批次转换为 float32 并归一化，prefetch 使数据准备与训练重叠。
+类别划分和序号与 flow_from_directory 相同（子目录名排序）。
+"""
+from aiblocks.imgcache import scan_class_dirs
+
+
+def image_dataset_from_directory(directory, img_size, batch_size=32, shuffle=True, workers=0,
+                                 cache=True, class_mode='binary', seed=None):
+    """返回可直接传给 model.fit 的 tf.data.Dataset，附带 class_names 和 samples 属性
+
+    img_size: 边长或 (高, 宽)
+    workers: 并行解码的线程数，0 表示由 tf.data 自动调节
+    cache: True 缓存在内存中，字符串表示缓存文件路径，False 不缓存
+    class_mode: 'binary' 标签为 float32 的 0/1，'sparse' 为整数类别序号，'categorical' 为 one-hot
+    """
+    import tensorflow as tf
+
+    if isinstance(img_size, int):
+        img_size = (img_size, img_size)
+    paths, labels, class_names = scan_class_dirs(directory)
+    if not paths:
+        raise ValueError(f"目录中没有找到图片: {directory}")
+    parallel = workers if workers > 0 else tf.data.AUTOTUNE
+
+    def load(path, label):
+        image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        # 与 flow_from_directory 默认的最近邻缩放一致；uint8 缓存只占 float32 的 1/4
+        image = tf.image.resize(image, img_size, method='nearest')
+        return tf.cast(image, tf.uint8), label
+
+    def normalize(images, labels):
+        images = tf.cast(images, tf.float32) * (1.0 / 255)
+        if class_mode == 'binary':
+            labels = tf.cast(labels, tf.float32)
+        elif class_mode == 'categorical':
+            labels = tf.one_hot(labels, len(class_names))
+        return images, labels
+
+    ds = tf.data.Dataset.from_tensor_slices((paths, tf.constant(labels, dtype=tf.int32)))
+    ds = ds.map(load, num_parallel_calls=parallel, deterministic=True)
+    if cache:
+        ds = ds.cache(cache if isinstance(cache, str) else '')
+    if shuffle:
+        ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size).map(normalize, num_parallel_calls=parallel)
+    ds = ds.prefetch(tf.data.AUTOTUNE)
+
+    options = tf.data.Options()
+    if workers > 0:
+        options.threading.private_threadpool_size = workers
+    ds = ds.with_options(options)
+    ds.class_names = class_names
+    ds.samples = len(paths)
+    return ds
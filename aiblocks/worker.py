@@ -0,0 +1,153 @@
+"""预热解释器进程
+
+由 executor.WorkerPool 启动：先导入重量级依赖（matplotlib、TensorFlow 等），
+然后从 stdin 逐行读取任务 JSON。支持 fork 的平台上，每个任务在 fork 出的
+子进程中执行，子进程继承已导入的模块但互不影响；不支持 fork 时（Windows），
+进程执行完一个任务后即退出，由进程池补充新的预热进程。
+"""
+import argparse
+import importlib
+import json
+import os
+import runpy
+import sys
+import traceback
+
+from aiblocks.parallel import apply_cpu_budget
+from aiblocks.profiling import PROFILE_ENV, RunProfiler
+from aiblocks.progress import emit_event, install_progress_hooks
+from aiblocks.registry import default_registry
+from aiblocks.sandbox import install_readonly_guard
+
+# 与 executor.py 中的协议常量保持一致
+READY_MARKER = b'\x00\x00BP-READY'
+DONE_MARKER = b'\x00\x00BP-DONE:'
+
+
+def preload(modules):
+    """导入预加载模块，缺失的模块直接跳过"""
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    for name in modules:
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"预加载模块 {name} 失败: {e}", file=sys.stderr)
+
+
+def _flush_std():
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            pass
+
+
+def execute(job):
+    """在当前进程中执行用户脚本，返回退出码"""
+    script = job['script']
+    try:
+        # 准备阶段的异常（目录不存在、CPU 亲和性设置失败等）与脚本异常一样打印到 stderr
+        os.chdir(job['cwd'])
+        sys.argv = [script]
+        sys.path[0] = os.path.dirname(script)
+        os.environ.update(job.get('env') or {})
+        if job.get('cpus'):
+            apply_cpu_budget(job['cpus'])
+        if job.get('readonly'):
+            install_readonly_guard(job['readonly'])
+        install_progress_hooks()
+        profiler = RunProfiler(cprofile=os.environ.get(PROFILE_ENV) == '1')
+    except BaseException:
+        traceback.print_exc()
+        _flush_std()
+        return 1
+    with profiler:
+        try:
+            runpy.run_path(script, run_name='__main__')
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+    # 导入/用户代码耗时、CPU 时间和峰值内存，由执行服务汇总到运行结果中
+    try:
+        emit_event('profile', **profiler.report())
+    except Exception:
+        pass
+    _flush_std()
+    return code
+
+
+def _child(job):
+    """fork 出的子进程：重定向 stdin 后执行任务，绝不返回"""
+    code = 1
+    try:
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        code = execute(job)
+    finally:
+        _flush_std()
+        os._exit(code & 0xFF if code >= 0 else 1)
+
+
+def _report_done(token, code):
+    line = DONE_MARKER + f'{token}:{code}\n'.encode()
+    os.write(1, line)
+    os.write(2, line)
+
+
+def serve(max_requests):
+    use_fork = hasattr(os, 'fork')
+    if not use_fork:
+        max_requests = 1
+
+    _flush_std()
+    os.write(1, READY_MARKER + b'\n')
+    os.write(2, READY_MARKER + b'\n')
+
+    stdin = sys.stdin.buffer
+    for _ in range(max_requests):
+        line = stdin.readline()
+        if not line:
+            break
+        job = json.loads(line)
+        if job.get('models'):
+            # 在 fork 之前加载程序引用的模型，运行进程直接继承
+            default_registry.warm(job['models'])
+        if use_fork:
+            pid = os.fork()
+            if pid == 0:
+                _child(job)
+            _, status = os.waitpid(pid, 0)
+            if os.WIFSIGNALED(status):
+                code = -os.WTERMSIG(status)
+            else:
+                code = os.WEXITSTATUS(status)
+        else:
+            code = execute(job)
+        _report_done(job['token'], code)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--preload', default='')
+    parser.add_argument('--max-requests', type=int, default=1)
+    args = parser.parse_args()
+
+    preload(args.preload.split(','))
+    serve(args.max_requests)
+
+
+if __name__ == '__main__':
+    main()
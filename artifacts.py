@@ -0,0 +1,77 @@
+"""运行产物存储：把每次运行生成的图片保存到 <root>/<run_id>/，以文件形式对外提供
+
+响应 JSON 中只返回产物 URL，浏览器直接请求图片文件（支持 ETag / Range 与缓存），
+不再把图片以 Base64 形式塞进响应体。
+"""
+import os
+import shutil
+import threading
+from pathlib import Path
+
+
+class ArtifactStore:
+    """按运行 ID 组织的产物目录
+
+    root: 存储根目录
+    max_runs: 最多保留多少次运行的产物，超出时删除最早的
+    """
+
+    def __init__(self, root, max_runs=200):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+
+    def collect(self, run_id, files, copy=False):
+        """把运行生成的文件移动（copy=True 时复制）到产物目录，返回产物文件名列表（保持原顺序）"""
+        run_dir = self.root / run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        names = []
+        for i, src in enumerate(files):
+            # 文件名加序号前缀，保证列表顺序与生成顺序一致
+            name = f'{i:04d}_{Path(src).name}'
+            try:
+                if copy:
+                    os.link(src, run_dir / name)
+                else:
+                    os.replace(src, run_dir / name)
+            except OSError:
+                shutil.copyfile(src, run_dir / name)
+            names.append(name)
+        self._purge()
+        return names
+
+    def list(self, run_id):
+        run_dir = self._run_dir(run_id)
+        if run_dir is None or not run_dir.is_dir():
+            return None
+        return sorted(p.name for p in run_dir.iterdir() if p.is_file())
+
+    def path(self, run_id, name):
+        """返回产物文件路径；名称非法或文件不存在时返回 None"""
+        run_dir = self._run_dir(run_id)
+        if run_dir is None or not name or name != Path(name).name or name.startswith('.'):
+            return None
+        path = run_dir / name
+        return path if path.is_file() else None
+
+    def page(self, run_id, page=1, per_page=10):
+        """分页列出产物，返回 (names, total)；运行不存在时返回 (None, 0)"""
+        names = self.list(run_id)
+        if names is None:
+            return None, 0
+        page = max(1, page)
+        start = (page - 1) * per_page
+        return names[start:start + per_page], len(names)
+
+    def _run_dir(self, run_id):
+        if not run_id or run_id != Path(run_id).name or run_id.startswith('.'):
+            return None
+        return self.root / run_id
+
+    def _purge(self):
+        with self._lock:
+            runs = sorted((p for p in self.root.iterdir() if p.is_dir()),
+                          key=lambda p: p.stat().st_mtime)
+            for old in runs[:max(0, len(runs) - self.max_runs)]:
+                shutil.rmtree(old, ignore_errors=True)
@@ -0,0 +1,3 @@
+"""性能基准：replay 回放实验程序测量执行服务的端到端性能，bench_*.py 为数据热点函数的微基准（pytest-benchmark），
+fixtures 生成两者使用的合成数据集
+"""
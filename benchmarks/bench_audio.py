@@ -0,0 +1,33 @@
+"""gmm_from_sklearn.py 的 MFCC 特征提取：单个文件的 mfcc，以及 get_mfcc_data 所调用的 mfcc_by_label"""
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip('librosa')
+
+from aiblocks.audio import mfcc, mfcc_by_label  # noqa: E402
+
+
+def _first_wav(directory):
+    for root, _, files in sorted(os.walk(directory)):
+        for name in sorted(files):
+            if name.endswith('.wav'):
+                return os.path.join(root, name)
+    raise FileNotFoundError(directory)
+
+
+def bench_mfcc(measure, data):
+    measure(mfcc, _first_wav(data['digits']))
+
+
+def bench_get_mfcc_data_cold(measure, data, caches):
+    # 单进程，测量特征计算本身而不是进程池的启动
+    measure(mfcc_by_label, os.path.join(data['digits'], 'train'), workers=1,
+            setup=lambda: shutil.rmtree(caches['feature'], ignore_errors=True))
+
+
+def bench_get_mfcc_data_warm(measure, data, caches):
+    train_dir = os.path.join(data['digits'], 'train')
+    mfcc_by_label(train_dir, workers=1)
+    measure(mfcc_by_label, train_dir)
@@ -0,0 +1,20 @@
+"""4.4.3 的图片加载：load_data 直接调用 aiblocks.imgcache.load_image_dataset，
+首次运行解码缩放并写入 uint8 缓存，之后直接内存映射
+"""
+import shutil
+
+from aiblocks.imgcache import load_image_dataset, read_label_file
+
+
+def bench_read_label_file(measure, data):
+    measure(read_label_file, data['catdog'], 'train.txt')
+
+
+def bench_load_data_cold(measure, data, caches):
+    measure(load_image_dataset, data['catdog'], 'train.txt', target_size=(224, 224),
+            setup=lambda: shutil.rmtree(caches['image'], ignore_errors=True))
+
+
+def bench_load_data_warm(measure, data, caches):
+    load_image_dataset(data['catdog'], 'train.txt', target_size=(224, 224))
+    measure(load_image_dataset, data['catdog'], 'train.txt', target_size=(224, 224))
@@ -0,0 +1,89 @@
+"""go.py 的输出解码（safe_decode、decode_line）和运行产物的发送
+
+产物原先以 Base64 塞进响应 JSON，现在以文件形式由 /runs/<run_id>/artifacts/<name> 发送；
+两种方式都保留基准，便于对比。
+"""
+import base64
+import io
+import sys
+
+import pytest
+
+from artifacts import ArtifactStore
+
+# 典型的程序输出：Keras 进度条（含 ANSI 控制符）和中文结果
+OUTPUT_LINES = [
+    '\x1b[1m32/32\x1b[0m [==============================] - 1s 18ms/step - loss: 0.6931 - accuracy: 0.5000',
+    '测试集准确率: 0.8750',
+    'Epoch 2/10',
+] * 200
+
+
+@pytest.fixture(scope='module')
+def go(tmp_path_factory):
+    """以临时目录作为 TEMP_DIR 导入 go.py，不在仓库的 temp_files 下创建沙箱和缓存目录"""
+    patch = pytest.MonkeyPatch()
+    patch.setenv('BLOCKLY_TEMP_DIR', str(tmp_path_factory.mktemp('temp_files')))
+    sys.modules.pop('go', None)
+    try:
+        yield pytest.importorskip('go')
+    finally:
+        sys.modules.pop('go', None)
+        patch.undo()
+
+
+@pytest.fixture(scope='module')
+def output_bytes():
+    text = '\n'.join(OUTPUT_LINES)
+    return {'utf8': text.encode('utf-8'), 'gbk': text.encode('gbk')}
+
+
+@pytest.fixture(scope='module')
+def png_bytes():
+    """一张与 plt.savefig 默认尺寸相当的 PNG"""
+    import numpy as np
+    from PIL import Image
+    pixels = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype='uint8')
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def served_artifact(go, tmp_path, monkeypatch, png_bytes):
+    """(Flask 测试客户端, 产物 URL)"""
+    store = ArtifactStore(tmp_path / 'artifacts')
+    src = tmp_path / 'output.png'
+    src.write_bytes(png_bytes)
+    name = store.collect('bench', [src])[0]
+    monkeypatch.setattr(go, 'artifact_store', store)
+    return go.app.test_client(), f'/runs/bench/artifacts/{name}'
+
+
+def bench_safe_decode_utf8(measure, go, output_bytes):
+    measure(go.safe_decode, output_bytes['utf8'])
+
+
+def bench_safe_decode_gbk(measure, go, output_bytes):
+    # UTF-8 解码失败后回退到 GBK
+    measure(go.safe_decode, output_bytes['gbk'])
+
+
+def bench_decode_line(measure, go):
+    lines = [line.encode('utf-8') + b'\r\n' for line in OUTPUT_LINES]
+    measure(lambda: [go.decode_line(line) for line in lines])
+
+
+def bench_artifact_base64(measure, png_bytes):
+    measure(lambda: base64.b64encode(png_bytes).decode())
+
+
+def bench_artifact_serve(measure, served_artifact):
+    client, url = served_artifact
+
+    def fetch():
+        response = client.get(url)
+        assert response.status_code == 200
+        return response.data
+
+    measure(fetch)
@@ -0,0 +1,46 @@
+"""6.2.5 的文本处理：jieba 分词去停用词（tokenize）和句子向量（build_sentence_vec，现为 sentence_vectors）"""
+import os
+import pickle
+
+import pytest
+
+pytest.importorskip('jieba')
+
+from aiblocks.text import clean_text, load_stopwords, sentence_vectors, tokenize  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def corpus(data):
+    """(清理后的文本列表, 停用词表)"""
+    with open(os.path.join(data['sentiment'], 'ChnSentiCorp', 'neg.pickle'), 'rb') as f:
+        texts = [clean_text(t) for t in pickle.load(f)]
+    return texts, load_stopwords(os.path.join(data['sentiment'], 'scu_stopwords.txt'))
+
+
+@pytest.fixture(scope='module')
+def word_vectors(corpus):
+    """由语料词表构造的随机词向量（与 Word2Vec 的 KeyedVectors 接口一致），以及分好词的句子"""
+    gensim = pytest.importorskip('gensim')
+    import numpy as np
+    texts, stopwords = corpus
+    sentences = [tokenize(t, stopwords) for t in texts]
+    vocab = sorted({w for words in sentences for w in words})
+    wv = gensim.models.KeyedVectors(vector_size=100)
+    wv.add_vectors(vocab, np.random.default_rng(0).standard_normal((len(vocab), 100)).astype('float32'))
+    return wv, sentences
+
+
+def _tokenize_all(texts, stopwords):
+    return [tokenize(t, stopwords) for t in texts]
+
+
+def bench_tokenize(measure, corpus):
+    texts, stopwords = corpus
+    # jieba 首次分词时加载词典，不计入计时
+    tokenize(texts[0], stopwords)
+    measure(_tokenize_all, texts, stopwords)
+
+
+def bench_build_sentence_vec(measure, word_vectors):
+    wv, sentences = word_vectors
+    measure(sentence_vectors, wv, sentences)
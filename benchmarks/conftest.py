@@ -0,0 +1,77 @@
+"""微基准的公共夹具：合成数据集、隔离的缓存目录，以及同时记录耗时和内存分配的 measure"""
+import tracemalloc
+
+import pytest
+
+from benchmarks import fixtures
+
+# 微基准使用的数据规模（相对于 fixtures 的默认规模）
+SCALE = 1.0
+
+# 各模块读取的缓存目录环境变量
+CACHE_ENVS = {
+    'image': 'BLOCKLY_IMAGE_CACHE',
+    'feature': 'BLOCKLY_FEATURE_CACHE',
+    'text': 'BLOCKLY_TEXT_CACHE',
+}
+
+
+@pytest.fixture(scope='session')
+def data(tmp_path_factory):
+    """合成数据集 {名称: 路径}，整个会话只生成一次"""
+    return fixtures.build(tmp_path_factory.mktemp('fixtures'), ['catdog', 'digits', 'sentiment'], scale=SCALE)
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    """把各模块的磁盘缓存指向本次基准独有的空目录，返回 {名称: 目录}
+
+    测量未命中缓存（首次运行）的耗时时，在 setup 中删除对应目录。
+    """
+    dirs = {}
+    for name, env in CACHE_ENVS.items():
+        dirs[name] = tmp_path / f'{name}_cache'
+        monkeypatch.setenv(env, str(dirs[name]))
+    return dirs
+
+
+def allocations(func, args=(), kwargs=None, setup=None):
+    """用 tracemalloc 测量单次调用的内存分配，返回 (峰值字节数, 调用结束后仍保留的字节数)
+
+    只统计经过 Python 分配器和 NumPy 的内存，进程池中子进程的分配不计入。
+    """
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func(*args, **(kwargs or {}))
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak - before, current - before
+
+
+@pytest.fixture
+def measure(benchmark):
+    """measure(func, *args, setup=None, rounds=None, **kwargs)
+
+    先单独调用一次记录内存分配（写入 extra_info，随 --benchmark-json/--benchmark-autosave 保存），
+    再由 pytest-benchmark 计时。指定 setup 时每轮计时前都调用它（如清空缓存），此时默认计时 5 轮。
+    """
+    def run(func, *args, setup=None, rounds=None, **kwargs):
+        peak, retained = allocations(func, args, kwargs, setup)
+        benchmark.extra_info['alloc_peak_bytes'] = peak
+        benchmark.extra_info['alloc_retained_bytes'] = retained
+        if setup is None and rounds is None:
+            return benchmark(func, *args, **kwargs)
+
+        def prepare():
+            if setup is not None:
+                setup()
+            return args, kwargs
+
+        return benchmark.pedantic(func, setup=prepare, rounds=rounds or 5, iterations=1)
+
+    return run
@@ -0,0 +1,200 @@
+"""基准测试用的合成数据集：列名、目录结构和文件格式与实验程序使用的真实数据集一致，规模可按 scale 放大
+
+生成结果按 (名称, scale, seed) 缓存在目标目录中，重复运行基准时不再重新生成。
+"""
+import json
+import os
+import pickle
+import shutil
+import wave
+from pathlib import Path
+
+# 数据格式变化时递增，使旧的合成数据失效
+FIXTURE_VERSION = '1'
+
+WHOLESALE_COLUMNS = ['Channel', 'Region', 'Fresh', 'Milk', 'Grocery', 'Frozen', 'Detergents_Paper', 'Delicassen']
+HOUSING_COLUMNS = ['longitude', 'latitude', 'housing_median_age', 'total_rooms', 'total_bedrooms',
+                   'population', 'households', 'median_income', 'median_house_value']
+
+_NEG_WORDS = ['失望', '糟糕', '差劲', '难吃', '脏乱', '吵闹', '退款', '后悔', '敷衍', '破旧']
+_POS_WORDS = ['满意', '干净', '舒适', '热情', '方便', '推荐', '实惠', '安静', '美味', '周到']
+_COMMON_WORDS = ['酒店', '房间', '服务', '前台', '早餐', '位置', '价格', '环境', '这次', '入住',
+                 '我们', '感觉', '非常', '比较', '还是', '的', '了', '很', '也', '都']
+STOPWORDS = ['的', '了', '很', '也', '都', '我们', '还是']
+
+
+def wholesale_csv(path, rows=440, seed=0):
+    """批发客户数据集（3.3.1 K均值聚类）：6 个消费金额列服从对数正态分布"""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    data = {'Channel': rng.integers(1, 3, rows), 'Region': rng.integers(1, 4, rows)}
+    for i, name in enumerate(WHOLESALE_COLUMNS[2:]):
+        data[name] = rng.lognormal(8 + i % 3, 1.0, rows).astype('int64')
+    pd.DataFrame(data, columns=WHOLESALE_COLUMNS).to_csv(path, index=False)
+
+
+def housing_csv(path, rows=20640, seed=0):
+    """加州房价数据集（3.3.3 线性回归）：房价与纬度线性相关并带噪声"""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    latitude = rng.uniform(32.5, 42.0, rows)
+    data = {
+        'longitude': rng.uniform(-124.3, -114.3, rows),
+        'latitude': latitude,
+        'housing_median_age': rng.integers(1, 53, rows),
+        'total_rooms': rng.integers(2, 40000, rows),
+        'total_bedrooms': rng.integers(1, 6500, rows),
+        'population': rng.integers(3, 36000, rows),
+        'households': rng.integers(1, 6000, rows),
+        'median_income': rng.uniform(0.5, 15.0, rows),
+        'median_house_value': np.clip(600000 - 10000 * latitude + rng.normal(0, 80000, rows), 15000, 500001),
+    }
+    pd.DataFrame(data, columns=HOUSING_COLUMNS).to_csv(path, index=False)
+
+
+def mnist_npz(path, n_train=2000, n_test=500, seed=0):
+    """MNIST 格式的手写数字（4.2.3 FCNN）：每个类别为固定模板加噪声的 28x28 uint8 图片"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    templates = rng.integers(0, 256, (10, 28, 28))
+
+    def make(n):
+        y = rng.integers(0, 10, n).astype('uint8')
+        x = np.clip(templates[y] + rng.normal(0, 60, (n, 28, 28)), 0, 255).astype('uint8')
+        return x, y
+
+    x_train, y_train = make(n_train)
+    x_test, y_test = make(n_test)
+    np.savez(path, x_train=x_train, y_train=y_train, x_test=x_test, y_test=y_test)
+
+
+def _write_image(path, array):
+    from PIL import Image
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(array).save(path, quality=90)
+
+
+def _class_image(rng, label, size):
+    """类别 0 为随机色块，类别 1 为黑白条纹，保证两类可分"""
+    import numpy as np
+    if label == 0:
+        image = rng.integers(0, 256, (8, 8, 3), dtype='uint8').repeat(size // 8 + 1, 0).repeat(size // 8 + 1, 1)
+        return np.ascontiguousarray(image[:size, :size])
+    stripes = ((np.arange(size) // max(1, size // 10)) % 2 * 255).astype('uint8')
+    image = np.broadcast_to(stripes[None, :, None], (size, size, 3)).copy()
+    noise = rng.integers(0, 40, image.shape, dtype='uint8')
+    return np.where(image > 0, image - noise, image + noise).astype('uint8')
+
+
+def catdog_dir(root, n_train=32, n_test=16, size=64, seed=0):
+    """猫狗分类数据集（4.4.3 AlexNet）：train/、test/ 下的图片和每行为 "相对路径,标签" 的 train.txt、test.txt"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    root = Path(root)
+    for split, n in (('train', n_train), ('test', n_test)):
+        lines = []
+        for i in range(n):
+            label = i % 2
+            name = f"{split}/{('cat', 'dog')[label]}/{i}.jpg"
+            _write_image(root / name, _class_image(rng, label, size))
+            lines.append(f'{name},{label}')
+        (root / f'{split}.txt').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def zebra_dir(root, n_train=40, n_val=16, size=64, seed=0):
+    """斑马线数据集（5.6.1 CNN）：train/、val/ 下按类别子目录（others、zebra_crossing）存放图片"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    root = Path(root)
+    for split, n in (('train', n_train), ('val', n_val)):
+        for i in range(n):
+            label = i % 2
+            _write_image(root / split / ('others', 'zebra_crossing')[label] / f'{i}.jpg',
+                         _class_image(rng, label, size))
+
+
+def sentiment_corpus(root, n_per_class=300, seed=0):
+    """情感分析语料（6.2.5 Word2Vec + SVM）：ChnSentiCorp/neg.pickle、pos.pickle 为文本列表，以及停用词表"""
+    import random
+    rng = random.Random(seed)
+    root = Path(root)
+    (root / 'ChnSentiCorp').mkdir(parents=True, exist_ok=True)
+    for name, words in (('neg', _NEG_WORDS), ('pos', _POS_WORDS)):
+        texts = [''.join(rng.choice(words if rng.random() < 0.4 else _COMMON_WORDS)
+                         for _ in range(rng.randint(8, 40)))
+                 for _ in range(n_per_class)]
+        with open(root / 'ChnSentiCorp' / f'{name}.pickle', 'wb') as f:
+            pickle.dump(texts, f)
+    (root / 'scu_stopwords.txt').write_text('\n'.join(STOPWORDS), encoding='utf-8')
+
+
+def _write_wav(path, samples, rate):
+    import numpy as np
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes())
+
+
+def digit_wav(rng, digit, rate=8000, seconds=0.6):
+    """一个"数字"的合成语音：两个与数字相关的频率叠加噪声"""
+    import numpy as np
+    t = np.arange(int(rate * seconds)) / rate
+    f1, f2 = 300 + 90 * digit, 1200 + 150 * digit
+    signal = 0.5 * np.sin(2 * np.pi * f1 * t) + 0.3 * np.sin(2 * np.pi * f2 * t)
+    return signal * np.hanning(len(t)) + rng.normal(0, 0.05, len(t))
+
+
+def digit_records(train_dir, test_dir, n_train=4, n_test=2, rate=8000, seed=0):
+    """语音数字识别数据（GMM）：训练集按 digit_0…digit_9 子目录存放，测试文件名以真实数字结尾（如 3_7.wav）"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    for digit in range(10):
+        for i in range(n_train):
+            _write_wav(Path(train_dir) / f'digit_{digit}' / f'{i}_{digit}.wav', digit_wav(rng, digit, rate), rate)
+        for i in range(n_test):
+            _write_wav(Path(test_dir) / f'digit_{digit}' / f'{i}_{digit}.wav', digit_wav(rng, digit, rate), rate)
+
+
+def _scaled(n, scale):
+    return max(1, int(round(n * scale)))
+
+
+# 名称 -> (生成函数, 返回的路径)；路径相对于该数据集的目录
+BUILDERS = {
+    'wholesale': (lambda d, s, seed: wholesale_csv(d / 'Wholesale_customers.csv', _scaled(440, s), seed),
+                  'Wholesale_customers.csv'),
+    'housing': (lambda d, s, seed: housing_csv(d / 'house.csv', _scaled(20640, s), seed), 'house.csv'),
+    'mnist': (lambda d, s, seed: mnist_npz(d / 'mnist.npz', _scaled(2000, s), _scaled(500, s), seed), 'mnist.npz'),
+    'catdog': (lambda d, s, seed: catdog_dir(d, _scaled(32, s), _scaled(16, s), seed=seed), ''),
+    'zebra': (lambda d, s, seed: zebra_dir(d, _scaled(40, s), _scaled(16, s), seed=seed), ''),
+    'sentiment': (lambda d, s, seed: sentiment_corpus(d, _scaled(300, s), seed), ''),
+    'digits': (lambda d, s, seed: digit_records(d / 'train', d / 'test', _scaled(4, s), _scaled(2, s), seed=seed),
+               ''),
+}
+
+
+def build(root, names=None, scale=1.0, seed=0):
+    """生成（或复用已生成的）合成数据集，返回 {名称: 绝对路径}"""
+    root = Path(root).resolve()
+    paths = {}
+    for name in names or BUILDERS:
+        builder, relative = BUILDERS[name]
+        directory = root / name
+        marker = directory / '.fixture.json'
+        spec = {'version': FIXTURE_VERSION, 'scale': scale, 'seed': seed}
+        if not (marker.is_file() and json.loads(marker.read_text(encoding='utf-8')) == spec):
+            shutil.rmtree(directory, ignore_errors=True)
+            directory.mkdir(parents=True)
+            builder(directory, scale, seed)
+            marker.write_text(json.dumps(spec), encoding='utf-8')
+        paths[name] = str(directory / relative) if relative else str(directory)
+    return paths
+
+
+def default_root():
+    return Path(os.environ.get('BLOCKLY_BENCH_FIXTURES', Path(__file__).resolve().parent / '.fixtures'))
@@ -0,0 +1,283 @@
+"""回放基准：把仓库自带的实验程序（blockly实验源码/*.py、temp_files/gmm_from_sklearn.py）提交到运行中的服务的 /run_code
+
+程序中的数据集路径替换为合成数据集（benchmarks/fixtures.py），训练轮次缩短，
+按指定并发数重复提交，统计各程序和整体的延迟分位数（p50/p95/p99）、吞吐量、
+启动开销（排队、沙箱准备、解释器启动、导入）和运行进程的峰值内存，结果保存为 JSON。
+指定 --baseline 时与之前保存的结果逐项对比，用于评估执行器的改动。
+
+    python go.py                                  # 先启动服务
+    python -m benchmarks.replay -c 4 -n 3         # 4 个并发，每个程序提交 3 次
+    python -m benchmarks.replay -p 3.3.1,noop --baseline benchmarks/results/before.json
+"""
+import argparse
+import json
+import os
+import platform
+import queue
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks import fixtures
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SOURCE_DIR = BASE_DIR / 'blockly实验源码'
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+# 启动开销包含的阶段（来自响应中的 profile.phases）
+STARTUP_PHASES = ('queue_wait', 'sandbox_setup', 'interpreter_start', 'imports')
+
+
+def _replace(source, old, new, count=-1):
+    if old not in source:
+        raise ValueError(f"实验程序中找不到要替换的内容: {old}")
+    return source.replace(old, new, count)
+
+
+def _mnist(source, data, epochs):
+    source = _replace(source, 'keras.datasets.mnist.load_data()',
+                      "(lambda d: ((d['x_train'], d['y_train']), (d['x_test'], d['y_test'])))"
+                      f"(np.load({data['mnist']!r}))")
+    source = _replace(source, '"num_epochs": 10', f'"num_epochs": {epochs}')
+    # 训练集的最后 1/5 划为验证集，与原程序 50000/10000 的比例一致
+    import numpy as np
+    with np.load(data['mnist']) as d:
+        n_train = len(d['y_train'])
+    return _replace(source, '"train_size": 50000', f'"train_size": {n_train * 4 // 5}')
+
+
+def _gmm(source, data, epochs):
+    # utils 是原实验环境中的辅助模块，程序实际没有用到
+    source = _replace(source, 'from utils import *\n', '')
+    source = _replace(source, '"./processed_train_records"', repr(os.path.join(data['digits'], 'train')))
+    return _replace(source, '"./processed_test_records"', repr(os.path.join(data['digits'], 'test')))
+
+
+# 名称 -> (源文件, 需要的数据集, 改写函数(源码, 数据集路径, 训练轮次))
+PROGRAMS = {
+    # 空程序：响应时间即服务本身的开销
+    'noop': (None, (), lambda source, data, epochs: "print('ok')\n"),
+    '3.3.1': (SOURCE_DIR / '3.3.1.py', ('wholesale',), lambda source, data, epochs: _replace(
+        source, r'r"C:\sourcecode\datasets\wholesale_customers\Wholesale_customers.csv"', repr(data['wholesale']))),
+    '3.3.2': (SOURCE_DIR / '3.3.2.py', (), lambda source, data, epochs: source),
+    '3.3.3': (SOURCE_DIR / '3.3.3.py', ('housing',), lambda source, data, epochs: _replace(
+        source, r"'C:\sourcecode\datasets\california_housing\house.csv'", repr(data['housing']))),
+    '4.2.3': (SOURCE_DIR / '4.2.3.py', ('mnist',), _mnist),
+    '4.4.3': (SOURCE_DIR / '4.4.3.py', ('catdog',), lambda source, data, epochs: _replace(_replace(
+        source, r"'C:\sourcecode\datasets\catdog'", repr(data['catdog'])),
+        'epochs=2  #', f'epochs={epochs}  #')),
+    '5.6.1': (SOURCE_DIR / '5.6.1.py', ('zebra',), lambda source, data, epochs: _replace(_replace(_replace(
+        source, r'"C:\sourcecode\datasets\zebra\\train"', repr(os.path.join(data['zebra'], 'train'))),
+        r'"C:\sourcecode\datasets\zebra\\val"', repr(os.path.join(data['zebra'], 'val'))),
+        'EPOCHS = 15', f'EPOCHS = {epochs}')),
+    '6.2.5': (SOURCE_DIR / '6.2.5.py', ('sentiment',), lambda source, data, epochs: _replace(
+        source, r'"C:\sourcecode\datasets\ChnSentiCorp"', repr(data['sentiment']))),
+    'gmm': (BASE_DIR / 'temp_files' / 'gmm_from_sklearn.py', ('digits',), _gmm),
+}
+
+
+def prepare(names, fixture_root, scale, epochs):
+    """生成所需的合成数据集并改写程序，返回 {名称: 代码}"""
+    needed = sorted({d for name in names for d in PROGRAMS[name][1]})
+    start = time.perf_counter()
+    data = fixtures.build(fixture_root, needed, scale=scale) if needed else {}
+    if needed:
+        print(f"合成数据集已就绪（{time.perf_counter() - start:.1f} 秒）: {fixture_root}")
+    programs = {}
+    for name in names:
+        path, _, rewrite = PROGRAMS[name]
+        source = path.read_text(encoding='utf-8') if path else ''
+        programs[name] = rewrite(source, data, epochs)
+    return programs
+
+
+def percentile(values, q):
+    """线性插值的分位数，values 为空时返回 None"""
+    values = sorted(values)
+    if not values:
+        return None
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def _distribution(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {'mean': round(sum(values) / len(values), 4), 'p50': round(percentile(values, 50), 4),
+            'p95': round(percentile(values, 95), 4), 'p99': round(percentile(values, 99), 4),
+            'max': round(max(values), 4)}
+
+
+def _peak_rss(record):
+    rusage = (record.get('profile') or {}).get('rusage') or {}
+    peaks = [u.get('peak_rss_mb') for u in rusage.values() if u.get('peak_rss_mb') is not None]
+    return max(peaks) if peaks else None
+
+
+def summarize(records, wall):
+    """汇总一组请求：延迟分位数、吞吐量、启动开销和峰值内存"""
+    ok = [r for r in records if r['ok']]
+    phases = [(r.get('profile') or {}).get('phases', {}) for r in ok]
+    summary = {
+        'requests': len(records),
+        'failures': len(records) - len(ok),
+        'throughput_rps': round(len(ok) / wall, 4) if wall > 0 else None,
+        'latency': _distribution([r['latency'] for r in ok]),
+        'startup': _distribution([sum(p.get(k, 0.0) for k in STARTUP_PHASES) for p in phases]),
+        'phases': {k: _distribution([p.get(k) for p in phases]) for k in sorted({k for p in phases for k in p})},
+        'cpu': _distribution([(r.get('profile') or {}).get('cpu') for r in ok]),
+        'peak_rss_mb': _distribution([_peak_rss(r) for r in ok]),
+    }
+    return summary
+
+
+def _post(url, payload, timeout):
+    import requests
+    start = time.perf_counter()
+    try:
+        response = requests.post(url, json=payload, timeout=timeout)
+        latency = time.perf_counter() - start
+        body = response.json()
+    except (requests.RequestException, ValueError) as e:
+        return {'ok': False, 'latency': time.perf_counter() - start, 'status': None, 'error': str(e)}
+    output = body.get('output') or ''
+    # 模板捕获的异常和程序自己打印的错误都算失败
+    ok = response.status_code == 200 and body.get('success') and '执行错误:' not in output
+    record = {'ok': bool(ok), 'latency': latency, 'status': response.status_code,
+              'profile': body.get('profile'), 'run_id': body.get('run_id')}
+    if not ok:
+        record['error'] = (body.get('error') or output or body.get('message') or '')[-2000:]
+    return record
+
+
+def run(url, programs, concurrency, repeat, warmup, timeout):
+    """先逐个预热（结果不计入统计），再按并发数提交 repeat 轮，返回 (请求记录列表, 总耗时)"""
+    endpoint = url.rstrip('/') + '/run_code'
+    # 并发提交同一程序时各自使用独立的检查点目录，互不清除对方的检查点
+    slots = queue.Queue()
+    for i in range(concurrency):
+        slots.put(i)
+
+    def submit(name, index):
+        slot = slots.get()
+        try:
+            payload = {'code': programs[name], 'cache': False, 'resume': False,
+                       'checkpoint': f'bench-{name}-{slot}'}
+            record = _post(endpoint, payload, timeout)
+        finally:
+            slots.put(slot)
+        record.update(program=name, index=index)
+        status = '成功' if record['ok'] else f"失败: {record.get('error', '')[-200:]}"
+        print(f"  {name} #{index}: {record['latency']:.2f} 秒，{status}")
+        return record
+
+    for _ in range(warmup):
+        print("预热...")
+        for name in programs:
+            submit(name, -1)
+
+    print(f"开始回放: {len(programs)} 个程序 x {repeat} 次，并发 {concurrency}")
+    order = [(name, i) for i in range(repeat) for name in programs]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        records = list(pool.map(lambda item: submit(*item), order))
+    return records, time.perf_counter() - start
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _metric(summary, path):
+    for key in path:
+        summary = (summary or {}).get(key)
+    return summary
+
+
+# 对比表中的指标：(名称, 路径, 越小越好)
+COMPARED = (
+    ('p50(秒)', ('latency', 'p50'), True),
+    ('p95(秒)', ('latency', 'p95'), True),
+    ('p99(秒)', ('latency', 'p99'), True),
+    ('吞吐量(次/秒)', ('throughput_rps',), False),
+    ('启动p50(秒)', ('startup', 'p50'), True),
+    ('内存p50(MB)', ('peak_rss_mb', 'p50'), True),
+)
+
+
+def print_report(result, baseline=None):
+    rows = [('整体', result['overall'], (baseline or {}).get('overall'))]
+    rows += [(name, s, ((baseline or {}).get('programs') or {}).get(name)) for name, s in result['programs'].items()]
+    for name, summary, base in rows:
+        print(f"\n[{name}] {summary['requests']} 次请求，{summary['failures']} 次失败")
+        for label, path, lower_is_better in COMPARED:
+            value = _metric(summary, path)
+            if value is None:
+                continue
+            line = f"  {label:<14}{value:>12.4f}"
+            old = _metric(base, path)
+            if old:
+                change = (value - old) / old * 100
+                better = (change < 0) == lower_is_better
+                line += f"   基线 {old:>10.4f}  {change:+7.1f}% {'更好' if better else '更差'}"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='回放实验程序，测量 /run_code 的延迟、吞吐量、启动开销和内存')
+    parser.add_argument('--url', default=os.environ.get('BLOCKLY_BENCH_URL', 'http://127.0.0.1:5001'))
+    parser.add_argument('-p', '--programs', default=','.join(PROGRAMS),
+                        help=f"逗号分隔的程序名，可选: {', '.join(PROGRAMS)}")
+    parser.add_argument('-c', '--concurrency', type=int, default=1)
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='每个程序提交的次数')
+    parser.add_argument('--warmup', type=int, default=1, help='预热轮数，预热时生成各级缓存，不计入统计')
+    parser.add_argument('--scale', type=float, default=1.0, help='合成数据集的规模倍数')
+    parser.add_argument('--epochs', type=int, default=2, help='训练程序的轮次')
+    parser.add_argument('--timeout', type=float, default=1200, help='单次请求的超时（秒）')
+    parser.add_argument('--fixtures', default=str(fixtures.default_root()), help='合成数据集目录')
+    parser.add_argument('-o', '--output', help='结果 JSON 路径，默认 benchmarks/results/replay-<时间>.json')
+    parser.add_argument('--baseline', help='用于对比的之前的结果 JSON')
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.programs.split(',') if n.strip()]
+    unknown = [n for n in names if n not in PROGRAMS]
+    if unknown:
+        parser.error(f"未知的程序: {', '.join(unknown)}")
+    programs = prepare(names, args.fixtures, args.scale, args.epochs)
+    records, wall = run(args.url, programs, max(1, args.concurrency), args.repeat, args.warmup, args.timeout)
+
+    result = {
+        'meta': {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': _git_commit(), 'url': args.url,
+                 'concurrency': args.concurrency, 'repeat': args.repeat, 'warmup': args.warmup,
+                 'scale': args.scale, 'epochs': args.epochs, 'wall': round(wall, 4),
+                 'python': platform.python_version(), 'platform': platform.platform(),
+                 'client_cpus': os.cpu_count()},
+        'overall': summarize(records, wall),
+        # 各程序的吞吐量按整体耗时计算，只用于同一配置下的对比
+        'programs': {name: summarize([r for r in records if r['program'] == name], wall) for name in names},
+        'requests': records,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"replay-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n结果已保存: {output}")
+    return 0 if result['overall']['failures'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,11 @@
 import pandas as pd
+from aiblocks.columnar import read_table
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 import matplotlib.pyplot as plt
 
 # 1. 读取 CSV 文件
-dataset = pd.read_csv(r"C:\sourcecode\datasets\wholesale_customers\Wholesale_customers.csv")
+dataset = read_table(r"C:\sourcecode\datasets\wholesale_customers\Wholesale_customers.csv")
 # 选择用于聚类的特征列（排除CHANNEL和REGION）
 X = dataset[['Fresh', 'Milk', 'Grocery', 'Frozen', 'Detergents_Paper', 'Delicassen']]
 
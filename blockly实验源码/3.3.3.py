@@ -1,12 +1,13 @@
 import numpy as np
 import pandas as pd
+from aiblocks.columnar import read_table
 import matplotlib.pyplot as plt
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
 
 # 1. 读取加州房价离线数据集（CSV 文件）
-dataset = pd.read_csv('C:\sourcecode\datasets\california_housing\house.csv')
+dataset = read_table('C:\sourcecode\datasets\california_housing\house.csv')
 
 # 2. 准备特征和目标数据
 target_column = 'median_house_value'  # 替换为实际的目标列名'median_house_value'
@@ -58,8 +58,9 @@ try:
                  metrics=['accuracy'])
 
 
-    # 训练模型
-    history = model.fit(x_train, y_train,
+    # 训练模型（每轮保存检查点，超时后再次提交从上次完成的轮次继续）
+    from aiblocks.checkpoint import fit_resumable
+    history = fit_resumable(model, x_train, y_train,
                         validation_data=(x_val, y_val),
                         epochs=params['num_epochs'],
                         batch_size=params['batch_size'])
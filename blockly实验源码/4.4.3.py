@@ -18,21 +18,11 @@ try:
     from tensorflow.keras.preprocessing.image import ImageDataGenerator
     from tensorflow.keras.optimizers import Adam
 
-    # 从标签文件中加载图片和对应标签
+    from aiblocks.imgcache import load_image_dataset, image_batches
+    # 从标签文件中加载图片和对应标签：首次运行时解码缩放并缓存为 uint8 数组，之后直接内存映射
     def load_data(data_dir, label_file, target_size=(224, 224)):
-        images = []
-        labels = []
-        with open(os.path.join(data_dir, label_file), 'r') as f:
-            for line in f:
-                path, label = line.strip().split(',')
-                image_path = os.path.join(data_dir, path)
-                image = tf.keras.preprocessing.image.load_img(image_path, target_size=target_size)
-                image = tf.keras.preprocessing.image.img_to_array(image)
-                images.append(image)
-                labels.append(int(label))
-        # 将图片数组归一化到 [0, 1]，同时将数据从列表转换为 NumPy 数组
-        images = np.array(images, dtype='float32') / 255.0  # 归一化图像
-        labels = np.array(labels, dtype='int32')  # 标签转为整数数组
+        images, labels, _ = load_image_dataset(data_dir, label_file, target_size=target_size)
+        # 图片保持 uint8，训练时由 image_batches 按批次归一化到 [0, 1]
         return images, labels
     # 数据集所在的路径和标签文件
     train_dir = 'C:\sourcecode\datasets\catdog'
@@ -79,12 +69,12 @@ try:
 
     # 创建模型
     model = create_alexnet_model()
-    # 训练模型
-    history = model.fit(
-        train_images, train_labels,  # 输入训练集的图片和标签
-        validation_data=(test_images, test_labels),  # 输入验证集的图片和标签
-        epochs=2,  # 训练轮次设置为2轮
-        batch_size=32  # 每次训练的小批量大小设置为32
+    # 训练模型（每轮保存检查点，超时后再次提交从上次完成的轮次继续）
+    from aiblocks.checkpoint import fit_resumable
+    history = fit_resumable(model,
+        image_batches(train_images, train_labels, batch_size=32),  # 训练集，每批32张，读取时归一化
+        validation_data=image_batches(test_images, test_labels, batch_size=32, shuffle=False),  # 验证集
+        epochs=2  # 训练轮次设置为2轮
     )
     # 可视化训练过程中的准确率变化 验证与测试
     import matplotlib.pyplot as plt
@@ -14,7 +14,6 @@ try:
     import numpy as np
     import tensorflow as tf
     from tensorflow.keras import layers, models
-    from tensorflow.keras.preprocessing.image import ImageDataGenerator
     # 数据集路径
     TRAIN_DIR = "C:\sourcecode\datasets\zebra\\train"
     VAL_DIR = "C:\sourcecode\datasets\zebra\\val"
@@ -23,22 +22,11 @@ try:
     IMG_SIZE = 50# 图片尺寸
     BATCH_SIZE = 32# 批次大小
     EPOCHS = 15# 迭代次数
-    # 数据预处理
-    train_datagen = ImageDataGenerator(rescale=1. / 255)
-    val_datagen = ImageDataGenerator(rescale=1. / 255)
-    train_generator = train_datagen.flow_from_directory(
-       TRAIN_DIR,
-        target_size=(IMG_SIZE, IMG_SIZE),
-        batch_size=BATCH_SIZE,
-        class_mode='binary'
-    )
-    val_generator = val_datagen.flow_from_directory(
-        VAL_DIR,
-        target_size=(IMG_SIZE, IMG_SIZE),
-        batch_size=BATCH_SIZE,
-        class_mode='binary',
-        shuffle=False
-    )
+    WORKERS = 0# 并行解码线程数，0 为自动
+    # 数据预处理：tf.data 并行解码、缓存并预取
+    from aiblocks.tfdata import image_dataset_from_directory
+    train_generator = image_dataset_from_directory(TRAIN_DIR, IMG_SIZE, batch_size=BATCH_SIZE, workers=WORKERS)
+    val_generator = image_dataset_from_directory(VAL_DIR, IMG_SIZE, batch_size=BATCH_SIZE, workers=WORKERS, shuffle=False)
           # 构建简单CNN模型
     model = models.Sequential([
         layers.Conv2D(32, (3, 3), activation='relu', input_shape=(IMG_SIZE, IMG_SIZE, 3)),
@@ -52,7 +40,8 @@ try:
 
 
         # 训练模型
-    history = model.fit(train_generator,epochs=EPOCHS,validation_data=val_generator)
+    from aiblocks.checkpoint import fit_resumable
+    history = fit_resumable(model,train_generator,epochs=EPOCHS,validation_data=val_generator)
         # 预测函数
     def predict_image(img_path):
         img = cv2.imread(img_path)
@@ -1,13 +1,10 @@
 import os
-import re
 import pickle
-import jieba
 import numpy as np
-import pandas as pd
-from tqdm import tqdm
-from gensim.models import Word2Vec
+from aiblocks.text import tokenize_file, load_word2vec, sentence_vectors
+from aiblocks.linear import LINEAR_SVC, fit_classifier
 from sklearn.decomposition import PCA
-from sklearn import svm, metrics
+from sklearn import metrics
 from sklearn.model_selection import train_test_split
 
 # ====================== 全局路径配置 ======================
@@ -20,29 +17,15 @@ os.makedirs(DATA_DIR, exist_ok=True)
 
 
 # ====================== 数据预处理函数 ======================
-def clean_text(text):
-    """清理文本，只保留中文"""
-    text = re.sub(r'[^\u4e00-\u9fa5]', '', text)
-    return text.strip()
-
-
 def get_stopwords():
     """加载停用词表"""
     with open(STOPWORDS_PATH, 'r', encoding='utf8') as f:
         return set(f.read().strip().split('\n'))
 
 
-def tokenize(text, stopwords):
-    """分词并去除停用词"""
-    words = [word for word in jieba.cut(text) if word not in stopwords]
-    return words
-
-
 def load_and_process(file_path, stopwords):
-    """加载并处理数据"""
-    with open(file_path, 'rb') as f:
-        contents = pickle.load(f)
-    return [tokenize(clean_text(text), stopwords) for text in tqdm(contents)]
+    """加载并处理数据：多进程分块分词，返回流式语料（结果按语料和停用词表缓存）"""
+    return tokenize_file(file_path, stopwords)
 
 
 # ====================== 主程序 ======================
@@ -69,8 +52,9 @@ if __name__ == "__main__":
     print("\n[步骤2] 训练Word2Vec模型...")
     try:
         corpus = neg_data + pos_data
-        w2v_model = Word2Vec(
-            sentences=corpus,
+        # 同一语料和参数训练过的模型直接从缓存加载
+        w2v_model = load_word2vec(
+            corpus,
             vector_size=100,  # 减小向量维度以加速处理
             window=5,
             min_count=1,
@@ -86,17 +70,12 @@ if __name__ == "__main__":
     # 步骤3: 构建句子向量
     print("\n[步骤3] 构建句子向量...")
     try:
-        # 构建句子向量（词向量的平均值）
-        def build_sentence_vec(words):
-            vecs = [w2v_model.wv[word] for word in words if word in w2v_model.wv]
-            return np.mean(vecs, axis=0) if vecs else np.zeros(w2v_model.vector_size)
-
-
-        neg_vecs = [build_sentence_vec(words) for words in tqdm(neg_data)]
-        pos_vecs = [build_sentence_vec(words) for words in tqdm(pos_data)]
+        # 构建句子向量（词向量的平均值），按批次一次取词向量求平均
+        neg_vecs = sentence_vectors(w2v_model.wv, neg_data)
+        pos_vecs = sentence_vectors(w2v_model.wv, pos_data)
 
         # 创建数据集
-        X = np.array(neg_vecs + pos_vecs)
+        X = np.concatenate([neg_vecs, pos_vecs])
         y = np.array([0] * len(neg_vecs) + [1] * len(pos_vecs))
 
         print(f"向量化数据完成: 总样本数 {len(X)}")
@@ -118,10 +97,10 @@ if __name__ == "__main__":
             X_pca, y, test_size=0.2, random_state=42
         )
 
-        # 使用线性SVM（更快且效果通常不错）
-        print("\n训练SVM分类器...")
-        svc = svm.SVC(kernel='linear', C=1.0)
-        svc.fit(X_train, y_train)
+        # LinearSVC（liblinear）训练时间随样本数近似线性增长；需要对比各引擎时使用 SVM_compare 积木
+        print("\n训练SVM分类器（引擎: linearsvc）...")
+        svc, train_seconds = fit_classifier(LINEAR_SVC, X_train, y_train, C=1.0)
+        print(f"训练耗时: {train_seconds:.2f} 秒")
 
         # 评估模型
         y_pred = svc.predict(X_test)
@@ -0,0 +1,397 @@
+"""代码执行器：预热解释器进程池与运行沙箱
+
+每个 Worker 是一个已导入重量级依赖的常驻 Python 进程（见 aiblocks/worker.py），
+提交的代码在 Worker fork 出的子进程中运行，因此启动只需毫秒级，
+同时保持与“每次运行一个新进程”相同的隔离性。
+每次运行使用独立的 Sandbox 目录，共享数据集以只读链接的方式挂入，
+多个请求可以并行执行而互不覆盖代码和图片。
+"""
+import json
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from aiblocks.progress import EVENT_MARKER
+from aiblocks.worker import DONE_MARKER, READY_MARKER
+
+BASE_DIR = Path(__file__).parent.resolve()
+
+
+class WorkerDied(RuntimeError):
+    """Worker 进程在任务完成前意外退出"""
+
+
+class RunCancelled(Exception):
+    """运行被取消"""
+
+
+def _read_until(stream, marker, sink):
+    """逐行读取 stream，直到出现 marker；marker 之前的内容写入 sink，返回 marker 所在行剩余部分"""
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        idx = line.find(marker)
+        if idx < 0:
+            sink(line)
+            continue
+        if idx > 0:
+            sink(line[:idx])
+        return line[idx + len(marker):]
+
+
+def _link(src, dst):
+    """把共享条目链接进沙箱：优先符号链接，Windows 下目录退回到 junction、文件退回到硬链接"""
+    try:
+        os.symlink(src, dst, target_is_directory=src.is_dir())
+        return True
+    except (OSError, NotImplementedError):
+        pass
+    try:
+        if src.is_dir():
+            if os.name != 'nt':
+                return False
+            import _winapi
+            _winapi.CreateJunction(str(src), str(dst))
+        else:
+            os.link(src, dst)
+        return True
+    except (OSError, ImportError):
+        return False
+
+
+class Sandbox:
+    """单次运行的隔离工作目录
+
+    root: 所有沙箱的父目录
+    shared_dir: 共享数据集所在目录，其中的条目以链接形式出现在沙箱中且只读
+    exclude: 不共享的条目名（支持通配符）
+    """
+
+    def __init__(self, root, shared_dir, exclude=(), run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.path = Path(root) / self.run_id
+        self.path.mkdir(parents=True)
+        self.readonly = []
+
+        shared_dir = Path(shared_dir)
+        root = Path(root).resolve()
+        for entry in shared_dir.iterdir():
+            if entry.name.startswith('.') or entry.resolve() == root:
+                continue
+            if any(entry.match(pattern) for pattern in exclude):
+                continue
+            dst = self.path / entry.name
+            if _link(entry.resolve(), dst):
+                self.readonly.extend([str(entry.resolve()), str(dst)])
+            else:
+                print(f"无法将 {entry} 链接到沙箱")
+
+    def images(self):
+        """按序号返回沙箱中生成的 output*.png"""
+        return sorted(
+            self.path.glob("output*.png"),
+            key=lambda x: int(x.stem[6:]) if x.stem[6:].isdigit() else 0
+        )
+
+    def cleanup(self):
+        """删除沙箱目录（链接本身被删除，不影响共享数据集）"""
+        for _ in range(3):
+            try:
+                shutil.rmtree(self.path)
+                return
+            except FileNotFoundError:
+                return
+            except OSError as e:
+                error = e
+                time.sleep(0.5)
+        print(f"无法删除沙箱 {self.path}: {error}")
+
+
+def available_cpus():
+    """服务进程可用的 CPU 核编号"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class CpuGovernor:
+    """把可用 CPU 核划分为 slots 组互不重叠的核，每次运行独占一组，避免多个运行的线程池叠加造成过度订阅
+
+    slots 应为最大并发运行数（解释器池大小与任务并发数中的较小值），每组 可用核数 / slots 个核，
+    余下的核分给前几组；所有运行的线程数之和不超过可用核数。
+    slots 多于核数时每组 1 个核，并发运行数超过组数时新运行与最空闲的组共用核。
+    """
+
+    def __init__(self, slots, cpus=None):
+        self.cpus = list(cpus) if cpus else available_cpus()
+        n = max(1, min(int(slots), len(self.cpus)))
+        self.groups = [self.cpus[i * len(self.cpus) // n:(i + 1) * len(self.cpus) // n] for i in range(n)]
+        self._users = [0] * n
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """为一次新运行分配一组 CPU 核，返回核编号列表"""
+        with self._lock:
+            self._active += 1
+            index = min(range(len(self.groups)), key=lambda i: (self._users[i], i))
+            self._users[index] += 1
+            return list(self.groups[index])
+
+    def release(self, cpus):
+        with self._lock:
+            self._active -= 1
+            for i, group in enumerate(self.groups):
+                if group == list(cpus) and self._users[i]:
+                    self._users[i] -= 1
+                    break
+
+    def stats(self):
+        with self._lock:
+            return {'cpus': len(self.cpus), 'active_runs': self._active,
+                    'groups': [{'cpus': group, 'runs': n} for group, n in zip(self.groups, self._users)]}
+
+
+class Worker:
+    """单个预热解释器进程"""
+
+    def __init__(self, preload, max_requests, env=None):
+        self.max_requests = max_requests
+        self.served = 0
+        popen_kwargs = {}
+        if os.name == 'posix':
+            popen_kwargs['start_new_session'] = True
+        self.proc = subprocess.Popen(
+            [sys.executable, '-m', 'aiblocks.worker',
+             '--preload', ','.join(preload),
+             '--max-requests', str(max_requests)],
+            cwd=str(BASE_DIR),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            **popen_kwargs
+        )
+
+    def wait_ready(self):
+        """等待预加载完成，丢弃预加载阶段的输出"""
+        discard = lambda _: None
+        forward = lambda line: sys.stderr.write(line.decode('utf-8', errors='replace'))
+        t = threading.Thread(target=_read_until, args=(self.proc.stderr, READY_MARKER, forward), daemon=True)
+        t.start()
+        ok = _read_until(self.proc.stdout, READY_MARKER, discard) is not None
+        t.join()
+        return ok
+
+    @property
+    def alive(self):
+        return self.proc.poll() is None
+
+    @property
+    def exhausted(self):
+        return self.served >= self.max_requests or not self.alive
+
+    def kill(self):
+        if not self.alive:
+            return
+        try:
+            if os.name == 'posix':
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            else:
+                self.proc.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.proc.wait()
+
+    def run(self, script, cwd, timeout=None, readonly=(), cancel=None, on_output=None, on_event=None,
+            models=(), cpus=None, env=None):
+        """执行脚本，返回 subprocess.CompletedProcess
+
+        readonly 中的路径在运行期间只读；models 为程序引用的模型库名称，由 Worker 预先加载；
+        cpus 为本次运行绑定的 CPU 核，数值库的线程数随之限制；env 为只对本次运行生效的环境变量；
+        超时抛出 subprocess.TimeoutExpired；
+        cancel（threading.Event）被设置时终止运行并抛出 RunCancelled。
+        on_output(stream, line) 在读到每一行 stdout/stderr 时调用，
+        on_event(event) 在子进程上报结构化事件（如 Keras 每轮指标）时调用。
+        """
+        token = uuid.uuid4().hex
+        marker = DONE_MARKER + token.encode() + b':'
+        out_chunks, err_chunks = [], []
+        result = {}
+
+        def stdout_sink(line):
+            idx = line.find(EVENT_MARKER)
+            if idx >= 0:
+                if idx > 0:
+                    stdout_sink(line[:idx])
+                try:
+                    event = json.loads(line[idx + len(EVENT_MARKER):])
+                except ValueError:
+                    return
+                if on_event is not None:
+                    on_event(event)
+                return
+            out_chunks.append(line)
+            if on_output is not None:
+                on_output('stdout', line)
+
+        def stderr_sink(line):
+            err_chunks.append(line)
+            if on_output is not None:
+                on_output('stderr', line)
+
+        def read_stdout():
+            rest = _read_until(self.proc.stdout, marker, stdout_sink)
+            if rest is not None:
+                result['code'] = int(rest.strip())
+
+        def read_stderr():
+            _read_until(self.proc.stderr, marker, stderr_sink)
+
+        readers = [threading.Thread(target=read_stdout, daemon=True),
+                   threading.Thread(target=read_stderr, daemon=True)]
+        for t in readers:
+            t.start()
+
+        self.served += 1
+        job = {'token': token, 'script': str(script), 'cwd': str(cwd),
+               'readonly': list(readonly), 'models': list(models)}
+        if cpus:
+            job['cpus'] = list(cpus)
+        if env:
+            job['env'] = dict(env)
+        try:
+            self.proc.stdin.write(json.dumps(job).encode() + b'\n')
+            self.proc.stdin.flush()
+        except OSError:
+            self.kill()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(t.is_alive() for t in readers):
+            if cancel is not None and cancel.is_set():
+                self.kill()
+                raise RunCancelled()
+            if deadline is not None and time.monotonic() >= deadline:
+                self.kill()
+                for r in readers:
+                    r.join()
+                raise subprocess.TimeoutExpired(
+                    [str(script)], timeout, b''.join(out_chunks), b''.join(err_chunks))
+            readers[0].join(0.2)
+            readers[1].join(0.01)
+
+        if 'code' not in result:
+            self.kill()
+            raise WorkerDied(b''.join(err_chunks).decode('utf-8', errors='replace'))
+        return subprocess.CompletedProcess(
+            [str(script)], result['code'], b''.join(out_chunks), b''.join(err_chunks))
+
+
+class WorkerPool:
+    """预热解释器进程池
+
+    size: 常驻 Worker 数量
+    max_requests: 每个 Worker 处理多少个任务后回收重建（不支持 fork 的平台固定为 1）
+    preload: 预加载模块列表
+    env: 额外传给 Worker 的环境变量
+    governor: CpuGovernor，为每次运行分配 CPU 预算；None 时不限制
+    """
+
+    def __init__(self, size=2, max_requests=20, preload=(), env=None, governor=None):
+        self.size = size
+        self.governor = governor
+        self.extra_env = dict(env or {})
+        self.max_requests = max_requests if hasattr(os, 'fork') else 1
+        self.preload = [m for m in preload if m]
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+
+    def _env(self):
+        env = os.environ.copy()
+        env['MPLBACKEND'] = 'Agg'
+        env['PYTHONIOENCODING'] = 'utf-8'
+        # 关闭输出缓冲，使运行输出可以逐行转发
+        env['PYTHONUNBUFFERED'] = '1'
+        paths = [str(BASE_DIR)]
+        if env.get('PYTHONPATH'):
+            paths.append(env['PYTHONPATH'])
+        env['PYTHONPATH'] = os.pathsep.join(paths)
+        env.update(self.extra_env)
+        return env
+
+    def _spawn(self):
+        """后台启动一个新 Worker，预加载完成后放入空闲队列"""
+        def target():
+            if self._closed:
+                return
+            worker = Worker(self.preload, self.max_requests, env=self._env())
+            if worker.wait_ready():
+                self._idle.put(worker)
+            else:
+                worker.kill()
+                self._idle.put(None)
+        threading.Thread(target=target, daemon=True).start()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._spawn()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.kill()
+
+    def _acquire(self):
+        self.start()
+        while True:
+            worker = self._idle.get()
+            if worker is None:
+                self._spawn()
+                raise WorkerDied('Worker 启动失败')
+            if worker.alive:
+                return worker
+            self._spawn()
+
+    def _release(self, worker):
+        if worker.exhausted:
+            worker.kill()
+            self._spawn()
+        else:
+            self._idle.put(worker)
+
+    def run(self, script, cwd, timeout=None, **kwargs):
+        """取出一个空闲 Worker 执行脚本，用法同 subprocess.run，其余参数见 Worker.run
+
+        返回值附带 timings：等待空闲 Worker 的时间和运行本身的时间（秒）。
+        """
+        start = time.perf_counter()
+        worker = self._acquire()
+        acquired = time.perf_counter()
+        cpus = self.governor.acquire() if self.governor is not None else None
+        try:
+            result = worker.run(script, cwd, timeout=timeout, cpus=cpus, **kwargs)
+            result.timings = {'worker_wait': acquired - start, 'run': time.perf_counter() - acquired}
+            return result
+        finally:
+            if cpus is not None:
+                self.governor.release(cpus)
+            self._release(worker)
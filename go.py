@@ -1,17 +1,116 @@
-import subprocess
 import base64
+import binascii
+import hashlib
+import subprocess
+import json
+import os
 import sys
 import time
 from pathlib import Path
-from flask import Flask, request, jsonify, render_template
+from urllib.parse import quote
+from flask import Flask, Response, g, request, jsonify, render_template, send_file, stream_with_context
 from flask_cors import CORS
 import webbrowser
+import threading
 from threading import Timer
 import re
+import shutil
+from artifacts import ArtifactStore
+from aiblocks.columnar import TABLE_SUFFIXES, dataset_info
+from aiblocks.profiling import PROFILE_ENV
+from aiblocks.registry import ModelRegistry
+from executor import CpuGovernor, RunCancelled, Sandbox, WorkerPool
+from jobs import JobManager, QueueFull
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
+from predict_service import PredictService, PredictTimeout
+from result_cache import ResultCache, cache_key, dataset_fingerprints, normalize_code
 # 初始化路径
 BASE_DIR = Path(__file__).parent.resolve()
-TEMP_DIR = BASE_DIR / "temp_files"
-TEMP_DIR.mkdir(exist_ok=True)
+# 共享数据集、运行沙箱和各类缓存所在目录，BLOCKLY_TEMP_DIR 可指定其他位置（如基准测试使用临时目录）
+TEMP_DIR = Path(os.environ.get('BLOCKLY_TEMP_DIR', BASE_DIR / "temp_files"))
+TEMP_DIR.mkdir(parents=True, exist_ok=True)
+# 每次运行的独立沙箱目录；TEMP_DIR 下的其余内容作为只读共享数据集
+RUNS_DIR = TEMP_DIR / "runs"
+RUNS_DIR.mkdir(exist_ok=True)
+SANDBOX_EXCLUDE = ('temp_code.py', 'output*.png', 'artifacts')
+# 计算结果缓存键时不作为数据集统计的首级目录/文件（以 . 开头的缓存目录也不统计）
+DATASET_EXCLUDE = SANDBOX_EXCLUDE + (RUNS_DIR.name,)
+
+# 运行产物（图片）按运行 ID 保存，以 URL 形式返回并分页列出
+artifact_store = ArtifactStore(TEMP_DIR / "artifacts",
+                               max_runs=int(os.environ.get('BLOCKLY_ARTIFACT_RUNS', 200)))
+ARTIFACT_PAGE_SIZE = 10
+
+# 运行结果缓存：代码和引用的数据集都未变化时直接返回上次结果，请求中 "cache": false 可跳过
+result_cache = ResultCache(TEMP_DIR / ".cache" / "results",
+                           max_bytes=int(os.environ.get('BLOCKLY_RESULT_CACHE_MB', 512)) * 1024 * 1024)
+
+# 预热解释器池配置（可通过环境变量覆盖）
+WORKER_POOL_SIZE = int(os.environ.get('BLOCKLY_POOL_SIZE', 2))
+WORKER_MAX_REQUESTS = int(os.environ.get('BLOCKLY_MAX_REQUESTS', 20))
+WORKER_PRELOAD = os.environ.get(
+    'BLOCKLY_PRELOAD',
+    'numpy,pandas,matplotlib,matplotlib.pyplot,sklearn,tensorflow'
+).split(',')
+
+# 模型库：ai_savemodel/ai_loadmodel 积木生成的代码按名称保存和加载模型
+MODEL_DIR = BASE_DIR / "models"
+model_registry = ModelRegistry(MODEL_DIR)
+# 匹配生成代码中的 load_model('名称')，供 Worker 预先加载
+LOAD_MODEL_RE = re.compile(r'load_model\(\s*[rR]?[\'"]([\w\-.]+)[\'"]')
+
+# 批量推理服务：/predict 的并发请求在 PREDICT_MAX_WAIT_MS 毫秒内合并为一批，每批最多 PREDICT_MAX_BATCH 张
+PREDICT_MAX_BATCH = int(os.environ.get('BLOCKLY_PREDICT_BATCH', 64))
+PREDICT_MAX_WAIT_MS = float(os.environ.get('BLOCKLY_PREDICT_WAIT_MS', 5))
+predict_service = PredictService(model_registry, max_batch=PREDICT_MAX_BATCH,
+                                 max_wait=PREDICT_MAX_WAIT_MS / 1000)
+
+# 训练检查点：每个使用 fit_resumable 的程序（默认按代码和所引用数据集的指纹，请求中 "checkpoint" 可指定名称）
+# 一个目录，超时或取消后再次提交同一程序时从上次完成的轮次继续训练，请求中 "resume": false 重新开始；
+# 同一检查点同时只允许一个运行。训练正常完成后检查点即删除，超时留下的检查点超过保留期限或
+# 总大小超过上限时从最旧的开始删除（每 CHECKPOINT_PRUNE_INTERVAL 秒最多在后台清理一次）
+CHECKPOINT_DIR = TEMP_DIR / ".cache" / "checkpoints"
+CHECKPOINT_NAME_RE = re.compile(r'^[\w\-.]{1,64}$')
+CHECKPOINT_MAX_AGE = float(os.environ.get('BLOCKLY_CHECKPOINT_MAX_AGE_DAYS', 7)) * 86400
+CHECKPOINT_MAX_BYTES = int(os.environ.get('BLOCKLY_CHECKPOINT_MAX_MB', 4096)) * 1024 * 1024
+CHECKPOINT_PRUNE_INTERVAL = 600
+_checkpoint_lock = threading.Lock()
+_active_checkpoints = set()
+_checkpoint_pruned = 0.0
+
+# 每次运行的分阶段耗时、CPU 时间和峰值内存追加写入该日志（每行一个 JSON）
+METRICS_LOG = Path(os.environ.get('BLOCKLY_METRICS_LOG', TEMP_DIR / ".cache" / "run_metrics.jsonl"))
+_metrics_lock = threading.Lock()
+
+# CSV/XLSX 数据集的列式缓存，生成代码通过 aiblocks.columnar.read_table 读取
+TABLE_CACHE_DIR = TEMP_DIR / ".cache" / "tables"
+
+# 任务调度配置：并发数默认与解释器池大小一致，排队超过上限时拒绝新任务
+JOB_CONCURRENCY = int(os.environ.get('BLOCKLY_JOB_CONCURRENCY', WORKER_POOL_SIZE))
+JOB_QUEUE_SIZE = int(os.environ.get('BLOCKLY_JOB_QUEUE_SIZE', 64))
+
+# CPU 预算：按最大并发运行数把 CPU 核分成互不重叠的组，每次运行独占一组并据此限制 TensorFlow/BLAS 线程数，
+# BLOCKLY_CPU_GOVERNOR=0 关闭
+cpu_governor = (CpuGovernor(min(WORKER_POOL_SIZE, JOB_CONCURRENCY))
+                if os.environ.get('BLOCKLY_CPU_GOVERNOR', '1') != '0' else None)
+
+worker_pool = WorkerPool(
+    size=WORKER_POOL_SIZE,
+    max_requests=WORKER_MAX_REQUESTS,
+    preload=WORKER_PRELOAD,
+    governor=cpu_governor,
+    env={
+        'BLOCKLY_MODEL_DIR': str(MODEL_DIR),
+        # 图片解码、语音特征和分词结果的缓存，位于沙箱之外，可被所有运行读写
+        'BLOCKLY_IMAGE_CACHE': str(TEMP_DIR / ".cache" / "images"),
+        'BLOCKLY_FEATURE_CACHE': str(TEMP_DIR / ".cache" / "features"),
+        'BLOCKLY_TEXT_CACHE': str(TEMP_DIR / ".cache" / "text"),
+        'BLOCKLY_TABLE_CACHE': str(TABLE_CACHE_DIR),
+    }
+)
+
+# 单次运行的超时（秒）
+RUN_TIMEOUT = int(os.environ.get('BLOCKLY_RUN_TIMEOUT', 1000))
 
 app = Flask(__name__,
             static_folder='static',
@@ -21,48 +120,211 @@ CORS(app)
 app.config['JSON_AS_ASCII'] = False
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 
-def cleanup_files(*filenames):
-    """安全删除临时文件（解决 Windows 文件占用问题）"""
-    for filename in filenames:
-        if filename.exists():
-            max_retries = 3
-            for _ in range(max_retries):
-                try:
-                    filename.unlink()
-                    break
-                except Exception as e:
-                    time.sleep(0.5)
-                    if _ == max_retries - 1:
-                        print(f"无法删除文件 {filename}: {str(e)}")
+# Prometheus 指标，由 /metrics 输出
+metrics_registry = Registry()
+HTTP_REQUESTS = metrics_registry.counter(
+    'blockly_http_requests_total', 'HTTP 请求数', ('method', 'endpoint', 'status'))
+HTTP_LATENCY = metrics_registry.histogram(
+    'blockly_http_request_duration_seconds', 'HTTP 请求处理耗时（/run_code 包含排队和执行）', ('endpoint',))
+RUNS = metrics_registry.counter(
+    'blockly_runs_total', '运行结果：success、error、timeout、cancelled、conflict、internal_error、cached', ('outcome',))
+RUN_DURATION = metrics_registry.histogram(
+    'blockly_run_duration_seconds', '运行耗时（从开始执行到结果返回，不含排队）', ('outcome',))
+RUN_EXIT_CODES = metrics_registry.counter(
+    'blockly_run_exit_codes_total', '运行进程的退出码', ('code',))
+ARTIFACT_BYTES = metrics_registry.counter(
+    'blockly_artifact_bytes_served_total', '发送的产物文件字节数')
+
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    endpoint = request.endpoint or 'unmatched'
+    HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+    if 'request_start' in g:
+        HTTP_LATENCY.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    if endpoint == 'get_artifact' and response.status_code in (200, 206):
+        ARTIFACT_BYTES.inc(response.content_length or 0)
+    return response
 
 @app.route('/')
 def index():
     return render_template('vueindex.html')
 
 
-@app.route('/run_code', methods=['POST'])
-def run_code():
-    temp_code_path = TEMP_DIR / "temp_code.py"
-    cleanup_files(temp_code_path)  # 清理旧代码文件
+def _parse_code_request():
+    """校验请求体，返回 (data, error_response)"""
+    if not request.is_json:
+        return None, (jsonify({'success': False, 'message': '请求必须为 JSON 格式'}), 400)
+    data = request.get_json()
+    if not isinstance(data, dict) or 'code' not in data:
+        return None, (jsonify({'success': False, 'message': '未提供代码'}), 400)
+    if not isinstance(data['code'], str):
+        return None, (jsonify({'success': False, 'message': '代码必须为字符串'}), 400)
+    return data, None
+
+
+def _checkpoint_name(data):
+    """本次运行使用的检查点名称；程序不使用 fit_resumable 时返回 None
+
+    默认取代码和所引用数据集指纹的哈希，数据集变化后不会沿用旧的检查点；
+    数据集目录过大、无法统计指纹时只按代码区分。
+    """
+    if 'fit_resumable' not in data['code']:
+        return None
+    name = data.get('checkpoint')
+    if isinstance(name, str) and CHECKPOINT_NAME_RE.match(name) and name.strip('.'):
+        return name
+    h = hashlib.sha256(normalize_code(data['code']).encode('utf-8'))
+    h.update(json.dumps(dataset_fingerprints(data['code'], TEMP_DIR, DATASET_EXCLUDE) or []).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def _dir_usage(path):
+    """目录的总大小和最后修改时间"""
+    total, latest = 0, path.stat().st_mtime
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            total += st.st_size
+            latest = max(latest, st.st_mtime)
+    return total, latest
+
+
+def _claim_checkpoint(name):
+    """登记运行中使用的检查点目录；同名检查点已有运行在使用时返回 False"""
+    global _checkpoint_pruned
+    with _checkpoint_lock:
+        if name in _active_checkpoints:
+            return False
+        _active_checkpoints.add(name)
+        prune = time.time() - _checkpoint_pruned >= CHECKPOINT_PRUNE_INTERVAL
+        if prune:
+            _checkpoint_pruned = time.time()
+    if prune:
+        threading.Thread(target=_prune_checkpoints, name='checkpoint-prune', daemon=True).start()
+    return True
+
 
-    # 清理所有历史图片文件
-    for old_img in TEMP_DIR.glob("output*.png"):
-        cleanup_files(old_img)
+def _release_checkpoint(name):
+    with _checkpoint_lock:
+        _active_checkpoints.discard(name)
 
+
+def _prune_checkpoints():
+    """清理过期或超出总大小上限的检查点（跳过运行中的）
+
+    目录统计在锁外进行；删除前在锁内确认未被使用并改名，之后新的运行不会再用到该目录。
+    """
+    if not CHECKPOINT_DIR.is_dir():
+        return
+    try:
+        entries, total = [], 0
+        for path in CHECKPOINT_DIR.iterdir():
+            if not path.is_dir():
+                continue
+            if path.name.startswith('.'):
+                # 上次清理中断留下的目录
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            size, latest = _dir_usage(path)
+            total += size
+            entries.append((latest, size, path))
+        now = time.time()
+        for latest, size, path in sorted(entries):
+            if now - latest <= CHECKPOINT_MAX_AGE and total <= CHECKPOINT_MAX_BYTES:
+                break
+            with _checkpoint_lock:
+                if path.name in _active_checkpoints:
+                    continue
+                trash = path.with_name(f'.{path.name}.deleting')
+                os.replace(path, trash)
+            shutil.rmtree(trash, ignore_errors=True)
+            total -= size
+    except OSError as e:
+        print(f"清理训练检查点失败: {e}")
+
+
+def _checkpoint_saved(name):
+    """检查点目录中是否已有完成的训练轮次（tf.train.CheckpointManager 每次保存后更新 checkpoint 文件）"""
+    return name is not None and (CHECKPOINT_DIR / name / 'checkpoint').is_file()
+
+
+def _run_env(data, checkpoint):
+    """只对本次运行生效的环境变量：检查点目录、续训开关和 cProfile 开关"""
+    env = {'BLOCKLY_RESUME': '1' if data.get('resume', True) else '0'}
+    if checkpoint is not None:
+        env['BLOCKLY_CHECKPOINT_DIR'] = str(CHECKPOINT_DIR / checkpoint)
+    if data.get('profile'):
+        env[PROFILE_ENV] = '1'
+    return env
+
+
+def _log_metrics(record):
+    """追加一条运行指标到 METRICS_LOG"""
+    line = json.dumps(record, ensure_ascii=False) + '\n'
     try:
-        if not request.is_json:
-            return jsonify({'success': False, 'message': '请求必须为 JSON 格式'}), 400
+        with _metrics_lock:
+            METRICS_LOG.parent.mkdir(parents=True, exist_ok=True)
+            with open(METRICS_LOG, 'a', encoding='utf-8') as f:
+                f.write(line)
+    except OSError as e:
+        print(f"写入运行指标失败: {e}")
+
 
-        data = request.get_json()
-        if 'code' not in data:
-            return jsonify({'success': False, 'message': '未提供代码'}), 400
+def _run_profile(job, setup, result, run_profile, collect):
+    """汇总本次运行各阶段的耗时（秒）和资源占用"""
+    timings = getattr(result, 'timings', {})
+    run_wall = (run_profile or {}).get('wall', 0.0)
+    phases = {
+        'queue_wait': max(0.0, (job.started_at or job.submitted_at) - job.submitted_at),
+        'sandbox_setup': setup,
+        # 等待空闲的预热解释器，以及分派任务、fork 运行进程等不属于用户程序的时间
+        'interpreter_start': timings.get('worker_wait', 0.0) + max(0.0, timings.get('run', 0.0) - run_wall),
+    }
+    phases.update((run_profile or {}).get('phases', {}))
+    phases['artifact_collection'] = collect
+    profile = {'phases': {k: round(v, 4) for k, v in phases.items()},
+               'total': round(sum(phases.values()), 4)}
+    for key in ('cpu', 'rusage', 'top_functions'):
+        if run_profile and key in run_profile:
+            profile[key] = run_profile[key]
+    return profile
+
+
+def execute_job(job):
+    """在独立沙箱中执行一个任务，返回 (响应数据, HTTP 状态码)"""
+    data = job.payload
+    sandbox = None
+    started = time.perf_counter()
+    run_profile = {}
+    outcome = 'internal_error'
+    checkpoint = None
+    try:
+        name = _checkpoint_name(data)
+        if name is not None:
+            if not _claim_checkpoint(name):
+                outcome = 'conflict'
+                return {'success': False,
+                        'error': '同一程序正在训练中，请等待其结束后再提交，或在请求中指定其他 checkpoint 名称'}, 409
+            checkpoint = name
+        # 为本次运行创建独立沙箱，代码和图片都写在沙箱内
+        sandbox = Sandbox(RUNS_DIR, TEMP_DIR, exclude=SANDBOX_EXCLUDE, run_id=job.id)
+        temp_code_path = sandbox.path / "temp_code.py"
 
         # 增强代码模板（支持多图保存）
         code_template = f"""# -*- coding: utf-8 -*-
 import sys
 import io
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace', line_buffering=True)
+sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace', line_buffering=True)
 
 import matplotlib as mpl
 mpl.use('Agg')
@@ -77,26 +339,25 @@ except Exception as e:
         with open(temp_code_path, 'w', encoding='utf-8') as f:
             f.write(code_template)
 
-        # 执行代码
-        result = subprocess.run(
-            [sys.executable, str(temp_code_path)],
-            cwd=str(TEMP_DIR),
-            capture_output=True,
-            timeout=1000,
-        )
-
-        # 处理输出解码
-        def safe_decode(byte_str):
-            encodings = ['utf-8', 'gbk', 'gb18030', 'big5', 'latin1']
-            for enc in encodings:
-                try:
-                    decoded = byte_str.decode(enc)
-                    # 过滤ANSI转义字符
-                    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-                    return ansi_escape.sub('', decoded).strip()
-                except UnicodeDecodeError:
-                    continue
-            return byte_str.decode('utf-8', errors='replace').strip()
+        # 在预热解释器中执行代码
+        # 输出逐行转发为任务事件，Keras 训练进度以 epoch 事件转发
+        def on_output(stream, line):
+            job.emit(stream, decode_line(line))
+
+        def on_event(event):
+            event_type = event.pop('type', 'event')
+            if event_type == 'profile':
+                run_profile.update(event)
+            job.emit(event_type, event)
+
+        setup = time.perf_counter() - started
+        result = worker_pool.run(temp_code_path, cwd=sandbox.path, timeout=RUN_TIMEOUT,
+                                 readonly=sandbox.readonly, cancel=job.cancel_event,
+                                 on_output=on_output, on_event=on_event,
+                                 models=LOAD_MODEL_RE.findall(data['code']),
+                                 env=_run_env(data, checkpoint))
+        collect_start = time.perf_counter()
+        RUN_EXIT_CODES.inc(code=result.returncode)
 
         stdout = safe_decode(result.stdout)
         stderr = safe_decode(result.stderr)
@@ -105,35 +366,347 @@ except Exception as e:
             'success': result.returncode == 0,
             'output': stdout,
             'error': stderr if result.returncode != 0 else None,
-            'images': []  # 改为数组存储多张图片
+            'run_id': job.id,
+            'cached': False,
         }
 
-        # 收集所有生成的图片
-        image_files = sorted(
-            TEMP_DIR.glob("output*.png"),
-            key=lambda x: int(x.stem[6:]) if x.stem[6:].isdigit() else 0
-        )
-
-        # 限制最大返回图片数量（防止DoS攻击）
-        MAX_IMAGES = 10
-        image_files = image_files[:MAX_IMAGES]
+        # 收集所有生成的图片，响应中只返回第一页的 URL
+        names = artifact_store.collect(job.id, sandbox.images())
+        # 只缓存成功的运行（模板捕获的异常也视为失败）
+        if response_data['success'] and '执行错误:' not in stdout and data.get('cache_key'):
+            try:
+                result_cache.put(data['cache_key'],
+                                 {k: response_data[k] for k in ('success', 'output', 'error')},
+                                 [artifact_store.path(job.id, name) for name in names])
+            except OSError as e:
+                # 缓存写入失败（如磁盘已满）不影响本次运行的结果
+                print(f"写入结果缓存失败: {e}")
+        response_data.update(_artifact_page(job.id, 1, ARTIFACT_PAGE_SIZE))
 
-        # 转换为Base64
-        for img_path in image_files:
-            with open(img_path, 'rb') as f:
-                response_data['images'].append(
-                    base64.b64encode(f.read()).decode('utf-8')
-                )
+        profile = _run_profile(job, setup, result, run_profile, time.perf_counter() - collect_start)
+        _log_metrics({'run_id': job.id, 'time': time.time(), 'success': response_data['success'],
+                      **{k: v for k, v in profile.items() if k != 'top_functions'}})
+        response_data['profile'] = profile
 
-        return jsonify(response_data)
+        outcome = 'success' if response_data['success'] and '执行错误:' not in stdout else 'error'
+        return response_data, 200
 
     except subprocess.TimeoutExpired:
-        return jsonify({'success': False, 'error': '代码执行超时（1000秒限制）'}), 408
+        outcome = 'timeout'
+        message = f'代码执行超时（{RUN_TIMEOUT}秒限制）'
+        if _checkpoint_saved(checkpoint):
+            message += '，已完成的训练轮次已保存，再次提交同一程序将继续训练'
+        return {'success': False, 'error': message}, 408
+    except RunCancelled:
+        outcome = 'cancelled'
+        return {'success': False, 'error': '任务已取消'}, 499
     except Exception as e:
-        return jsonify({
+        return {
             'success': False,
             'error': f'服务器内部错误: {str(e)}'
-        }), 500
+        }, 500
+    finally:
+        RUNS.inc(outcome=outcome)
+        RUN_DURATION.observe(time.perf_counter() - started, outcome=outcome)
+        if checkpoint is not None:
+            _release_checkpoint(checkpoint)
+        if sandbox is not None:
+            sandbox.cleanup()
+
+
+def _artifact_page(run_id, page, per_page):
+    """产物分页信息：images 为本页图片 URL，next 为下一页列表 URL"""
+    names, total = artifact_store.page(run_id, page, per_page)
+    names = names or []
+    has_next = page * per_page < total
+    return {
+        'images': [f'/runs/{run_id}/artifacts/{quote(name)}' for name in names],
+        'artifacts': {
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'next': f'/runs/{run_id}/artifacts?page={page + 1}&per_page={per_page}' if has_next else None,
+        },
+    }
+
+
+job_manager = JobManager(execute_job, concurrency=JOB_CONCURRENCY, max_queue=JOB_QUEUE_SIZE)
+
+
+def _replay_cached(job, result, files):
+    """用缓存的输出和图片构造本次运行的结果"""
+    RUNS.inc(outcome='cached')
+    artifact_store.collect(job.id, files, copy=True)
+    for line in (result.get('output') or '').split('\n'):
+        job.emit('stdout', line)
+    response_data = dict(result, run_id=job.id, cached=True)
+    response_data.update(_artifact_page(job.id, 1, ARTIFACT_PAGE_SIZE))
+    return response_data, 200
+
+
+def _submit(data):
+    """提交任务；缓存命中时直接返回已完成的任务，不进入队列"""
+    data = {k: v for k, v in data.items() if k != 'cache_key'}
+    # 要求重新训练（resume 为 false）或剖析本次运行（profile）时不使用缓存结果
+    if data.get('cache', True) and data.get('resume', True) and not data.get('profile'):
+        # 引用的模型重新训练后版本号变化，缓存随之失效
+        models = {name: (model_registry.meta(name) or {}).get('version')
+                  for name in LOAD_MODEL_RE.findall(data['code'])}
+        key = cache_key(data['code'], TEMP_DIR, extra=models, exclude=DATASET_EXCLUDE)
+        # 引用的数据集目录过大、无法统计指纹时 key 为 None，直接执行
+        if key is not None:
+            cached = result_cache.get(key)
+            if cached is not None:
+                return job_manager.run_inline(data, lambda job: _replay_cached(job, *cached))
+            data['cache_key'] = key
+    return job_manager.submit(data)
+
+
+@app.route('/run_code', methods=['POST'])
+def run_code():
+    """同步执行：提交任务并等待结果（与异步任务共用队列和并发上限）"""
+    data, error = _parse_code_request()
+    if error:
+        return error
+    try:
+        job = _submit(data)
+    except QueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    job.done.wait()
+    return jsonify(job.result), job.http_status
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    data, error = _parse_code_request()
+    if error:
+        return error
+    try:
+        job = _submit(data)
+    except QueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    return jsonify(job.to_dict()), 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    """以 Server-Sent Events 推送任务的 stdout/stderr 行、训练进度和结束事件"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    since = request.headers.get('Last-Event-ID') or request.args.get('since') or 0
+    try:
+        since = int(since)
+    except ValueError:
+        since = 0
+
+    def generate():
+        seq = since
+        while True:
+            events = job.events_since(seq, timeout=15)
+            if not events:
+                if job.done.is_set():
+                    return
+                yield ': keep-alive\n\n'
+                continue
+            for seq, kind, data in events:
+                payload = json.dumps(data, ensure_ascii=False)
+                yield f'id: {seq}\nevent: {kind}\ndata: {payload}\n\n'
+                if kind == 'done':
+                    return
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/runs/<run_id>/artifacts', methods=['GET'])
+def list_artifacts(run_id):
+    if artifact_store.list(run_id) is None:
+        return jsonify({'success': False, 'message': '运行不存在或产物已过期'}), 404
+    page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', ARTIFACT_PAGE_SIZE, type=int), 1), 100)
+    return jsonify(_artifact_page(run_id, page, per_page))
+
+
+@app.route('/runs/<run_id>/artifacts/<name>', methods=['GET'])
+def get_artifact(run_id, name):
+    """直接发送产物文件；产物写入后不再变化，支持 ETag、Range 和长期缓存"""
+    path = artifact_store.path(run_id, name)
+    if path is None:
+        return jsonify({'success': False, 'message': '产物不存在'}), 404
+    return send_file(path, conditional=True, etag=True, max_age=86400)
+
+
+@app.route('/jobs', methods=['GET'])
+def job_stats():
+    stats = job_manager.stats()
+    if cpu_governor is not None:
+        stats['cpu'] = cpu_governor.stats()
+    return jsonify(stats)
+
+
+@app.route('/models', methods=['GET'])
+def list_models():
+    return jsonify(model_registry.list())
+
+
+@app.route('/models/<name>', methods=['GET'])
+def get_model(name):
+    meta = model_registry.meta(name, request.args.get('version', type=int))
+    if meta is None:
+        return jsonify({'success': False, 'message': '模型不存在'}), 404
+    return jsonify(meta)
+
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    """用模型库中的模型预测图片：multipart 上传（字段 model、image，可多张）
+    或 JSON {"model": 名称, "version": 版本, "images": [Base64, ...]}"""
+    if request.files:
+        name = request.form.get('model')
+        version = request.form.get('version', type=int)
+        images = [f.read() for f in request.files.getlist('image')]
+    else:
+        data = request.get_json(silent=True) or {}
+        name = data.get('model')
+        version = data.get('version')
+        try:
+            images = [base64.b64decode(img) for img in data.get('images') or []]
+        except (binascii.Error, TypeError):
+            return jsonify({'success': False, 'message': '图片不是有效的 Base64 数据'}), 400
+    if not name or not images:
+        return jsonify({'success': False, 'message': '缺少 model 或图片'}), 400
+    valid_version = version is None or (isinstance(version, int) and not isinstance(version, bool))
+    if not isinstance(name, str) or not valid_version:
+        return jsonify({'success': False, 'message': 'model 必须为字符串，version 必须为整数'}), 400
+
+    try:
+        result = predict_service.predict(name, images, version=version)
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'message': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except PredictTimeout as e:
+        return jsonify({'success': False, 'message': str(e)}), 504
+    result['success'] = True
+    return jsonify(result)
+
+
+@app.route('/predict/stats', methods=['GET'])
+def predict_stats():
+    return jsonify(predict_service.stats())
+
+
+def _dataset_path(name):
+    """把相对 TEMP_DIR 的数据集路径解析为绝对路径；不在共享数据目录内或不是表格文件时返回 None"""
+    if not name:
+        return None
+    path = (TEMP_DIR / name).resolve()
+    try:
+        parts = path.relative_to(TEMP_DIR).parts
+    except ValueError:
+        return None
+    if parts[0] == RUNS_DIR.name or any(p.startswith('.') for p in parts):
+        return None
+    if path.suffix.lower() not in TABLE_SUFFIXES or not path.is_file():
+        return None
+    return path
+
+
+@app.route('/datasets', methods=['GET'])
+def list_datasets():
+    """列出共享数据目录中的 CSV/XLSX 数据集"""
+    datasets = []
+    for root, dirs, files in os.walk(TEMP_DIR):
+        # 跳过运行沙箱和缓存等隐藏目录
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and Path(root, d) != RUNS_DIR)
+        for name in sorted(files):
+            path = Path(root, name)
+            if path.suffix.lower() in TABLE_SUFFIXES and not name.startswith('.'):
+                datasets.append({'path': path.relative_to(TEMP_DIR).as_posix(), 'size': path.stat().st_size})
+    return jsonify(datasets)
+
+
+@app.route('/datasets/info', methods=['GET'])
+def get_dataset_info():
+    """数据集的行列数和列类型，?path=相对 temp_files 的路径，Excel 可用 &sheet=工作表名"""
+    path = _dataset_path(request.args.get('path'))
+    if path is None:
+        return jsonify({'success': False, 'message': '数据集不存在'}), 404
+    sheet = request.args.get('sheet', 0)
+    # 数字表示工作表序号（与 pd.read_excel 一致），否则为工作表名
+    if isinstance(sheet, str) and sheet.isdigit():
+        sheet = int(sheet)
+    try:
+        info = dataset_info(path, sheet_name=sheet, cache_dir=TABLE_CACHE_DIR)
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'读取数据集失败: {e}'}), 400
+    info['path'] = path.relative_to(TEMP_DIR).as_posix()
+    info['success'] = True
+    return jsonify(info)
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+
+metrics_registry.gauge('blockly_jobs_queued', '排队中的任务数', callback=lambda: job_manager.stats()['queued'])
+metrics_registry.gauge('blockly_jobs_running', '执行中的任务数', callback=lambda: job_manager.stats()['running'])
+metrics_registry.gauge('blockly_job_concurrency', '任务并发上限', callback=lambda: job_manager.concurrency)
+metrics_registry.counter(
+    'blockly_result_cache_lookups_total', '结果缓存查询次数', ('result',),
+    callback=lambda: (lambda s: {('hit',): s['hits'], ('miss',): s['misses']})(result_cache.stats()))
+metrics_registry.gauge('blockly_result_cache_hit_ratio', '结果缓存命中率',
+                       callback=lambda: result_cache.stats()['hit_ratio'])
+metrics_registry.gauge('blockly_result_cache_bytes', '结果缓存占用的字节数',
+                       callback=lambda: result_cache.stats()['bytes'])
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+# 过滤ANSI转义字符
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+
+def _decode(byte_str):
+    encodings = ['utf-8', 'gbk', 'gb18030', 'big5', 'latin1']
+    for enc in encodings:
+        try:
+            return ANSI_ESCAPE.sub('', byte_str.decode(enc))
+        except UnicodeDecodeError:
+            continue
+    return byte_str.decode('utf-8', errors='replace')
+
+
+def safe_decode(byte_str):
+    """处理输出解码"""
+    return _decode(byte_str).strip()
+
+
+def decode_line(byte_str):
+    """解码单行输出（保留缩进，去掉行尾换行）"""
+    return _decode(byte_str).rstrip('\r\n')
+
+
 def _indent_code(code: str, spaces: int):
     """为代码添加统一缩进"""
     indent = ' ' * spaces
@@ -152,6 +725,8 @@ if __name__ == '__main__':
         print("错误：请先安装 matplotlib！执行命令：pip install matplotlib")
         exit(1)
 
+    worker_pool.start()
+    job_manager.start()
     Timer(1, open_browser).start()
     app.run(
         host='0.0.0.0',
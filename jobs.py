@@ -0,0 +1,178 @@
+"""异步任务：有界队列 + 固定并发数的调度器
+
+长时间训练通过 POST /jobs 提交后立即返回任务 ID，由后台线程按并发上限
+依次取出执行，客户端轮询 GET /jobs/<id> 获取状态和结果，
+或通过 GET /jobs/<id>/stream 实时接收输出和训练进度事件，
+DELETE /jobs/<id> 可以取消排队中或运行中的任务。
+"""
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+CANCELLED = 'cancelled'
+
+# 每个任务保留的事件条数（超出后丢弃最早的事件）
+MAX_EVENTS = 5000
+
+
+class QueueFull(Exception):
+    """任务队列已满"""
+
+
+class Job:
+    """一个待执行的代码任务"""
+
+    def __init__(self, payload):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.status = QUEUED
+        self.result = None
+        self.http_status = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+        self._events = deque(maxlen=MAX_EVENTS)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def emit(self, kind, data):
+        """记录一个事件（stdout/stderr 行、训练进度等）并唤醒等待的订阅者"""
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, kind, data))
+            self._cond.notify_all()
+
+    def events_since(self, seq, timeout=None):
+        """返回序号大于 seq 的事件；没有新事件时最多等待 timeout 秒"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq, timeout)
+            return [e for e in self._events if e[0] > seq]
+
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.result is not None:
+            data['result'] = self.result
+        return data
+
+
+class JobManager:
+    """任务调度器
+
+    execute: 执行函数 execute(job) -> (result_dict, http_status)，需要响应 job.cancel_event
+    concurrency: 同时运行的任务数
+    max_queue: 排队任务上限，超出时 submit 抛出 QueueFull
+    keep: 保留多少个已结束任务供查询
+    """
+
+    def __init__(self, execute, concurrency=2, max_queue=64, keep=500):
+        self.execute = execute
+        self.concurrency = concurrency
+        self.keep = keep
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for i in range(self.concurrency):
+            threading.Thread(target=self._loop, name=f'job-runner-{i}', daemon=True).start()
+
+    def submit(self, payload):
+        self.start()
+        job = Job(payload)
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull(f'任务队列已满（上限 {self._queue.maxsize}）')
+            self._jobs[job.id] = job
+            self._trim()
+        return job
+
+    def run_inline(self, payload, execute):
+        """不经过队列，在调用线程中立即执行（用于缓存命中等瞬时完成的任务）"""
+        job = Job(payload)
+        with self._lock:
+            self._jobs[job.id] = job
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._trim()
+        try:
+            result, http_status = execute(job)
+        except Exception as e:
+            # 与 _loop 一致：任务以 500 结束，不会一直停留在 running 状态
+            result, http_status = {'success': False, 'error': f'服务器内部错误: {str(e)}'}, 500
+        with self._lock:
+            self._finish(job, FINISHED, result, http_status)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """取消任务；排队中的任务直接标记为已取消，运行中的任务由执行函数终止"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED, {'success': False, 'error': '任务已取消'}, 499)
+        job.cancel_event.set()
+        return job
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for j in self._jobs.values() if j.status == RUNNING)
+            return {
+                'queued': self._queue.qsize(),
+                'running': running,
+                'concurrency': self.concurrency,
+                'max_queue': self._queue.maxsize,
+            }
+
+    def _finish(self, job, status, result, http_status):
+        job.status = status
+        job.result = result
+        job.http_status = http_status
+        job.finished_at = time.time()
+        job.done.set()
+        job.emit('done', {'status': status, 'http_status': http_status})
+
+    def _trim(self):
+        finished = [j.id for j in self._jobs.values() if j.done.is_set()]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[job_id]
+
+    def _loop(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.status != QUEUED:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+            try:
+                result, http_status = self.execute(job)
+            except Exception as e:
+                result, http_status = {'success': False, 'error': f'服务器内部错误: {str(e)}'}, 500
+            with self._lock:
+                status = CANCELLED if job.cancel_event.is_set() else FINISHED
+                self._finish(job, status, result, http_status)
@@ -0,0 +1,240 @@
+"""批量推理服务：模型常驻内存，把短时间窗口内的并发预测请求合并成一个批次执行
+
+每个模型一个批处理线程：取到第一张图片后最多再等待 max_wait 秒或凑满 max_batch 张，
+整批一次完成颜色转换、归一化和 predict_on_batch。图片解码和缩放在各请求线程中完成
+（OpenCV 会释放 GIL，多个请求可并行预处理）。
+"""
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+from aiblocks.registry import KERAS
+
+
+class PredictTimeout(Exception):
+    """等待推理结果超时"""
+
+
+def _bucket(n, max_batch):
+    """批大小向上取整到 2 的幂，避免每种批大小都触发一次 Keras 重新追踪"""
+    size = 1
+    while size < n:
+        size *= 2
+    return min(size, max(n, max_batch))
+
+
+def decode_image(data, size, channels=3):
+    """解码图片字节并缩放到 size=(宽, 高)，返回 uint8 数组（BGR 或灰度）"""
+    import cv2
+    import numpy as np
+    flag = cv2.IMREAD_GRAYSCALE if channels == 1 else cv2.IMREAD_COLOR
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    if img is None:
+        raise ValueError('无法解码图片')
+    img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    return img[..., None] if channels == 1 else img
+
+
+def decode_outputs(probs, labels=None):
+    """把模型输出转换为 (类别序号, 置信度)；单输出按 sigmoid 二分类处理"""
+    results = []
+    for row in probs.reshape(len(probs), -1):
+        if row.shape[0] == 1:
+            p = float(row[0])
+            idx = int(p > 0.5)
+            confidence = p if idx else 1 - p
+        else:
+            idx = int(row.argmax())
+            confidence = float(row[idx])
+        label = labels[idx] if labels and idx < len(labels) else str(idx)
+        results.append({'label': label, 'class': idx, 'confidence': round(confidence, 4)})
+    return results
+
+
+class _Request:
+    __slots__ = ('image', 'done', 'result', 'error', 'batch_size')
+
+    def __init__(self, image):
+        self.image = image
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.batch_size = 0
+
+
+class ModelBatcher:
+    """单个模型的微批处理器
+
+    model: 已加载的 Keras 模型（input_shape 为 (None, 高, 宽, 通道)）
+    labels: 类别名称列表，按类别序号排列
+    max_batch: 每批最多图片数
+    max_wait: 凑批的最长等待时间（秒）
+    """
+
+    def __init__(self, model, labels=None, max_batch=64, max_wait=0.005):
+        self.model = model
+        self.labels = labels
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        shape = getattr(model, 'input_shape', None)
+        if not hasattr(model, 'predict_on_batch') or not isinstance(shape, tuple) or len(shape) != 4:
+            raise ValueError('批量推理只支持输入为 (None, 高, 宽, 通道) 的 Keras 图片模型')
+        _, height, width, channels = shape
+        self.size = (width, height)
+        self.channels = channels or 3
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=2048)
+        self._recent = deque(maxlen=1024)
+        self._batch_sizes = Counter()
+        self.requests = 0
+        self.images = 0
+        threading.Thread(target=self._loop, name='predict-batcher', daemon=True).start()
+
+    def predict(self, images, timeout=30):
+        """预测一组图片（字节），返回 (结果列表, 各图片所在批次的大小)"""
+        start = time.perf_counter()
+        requests = [_Request(decode_image(data, self.size, self.channels)) for data in images]
+        for req in requests:
+            self._queue.put(req)
+        deadline = time.monotonic() + timeout
+        for req in requests:
+            if not req.done.wait(max(0, deadline - time.monotonic())):
+                raise PredictTimeout('推理超时')
+            if req.error is not None:
+                raise req.error
+        latency = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(latency)
+        return [req.result for req in requests], [req.batch_size for req in requests], latency
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            recent = list(self._recent)
+            batches = sum(self._batch_sizes.values())
+            data = {
+                'requests': self.requests,
+                'images': self.images,
+                'batches': batches,
+                'mean_batch_size': self.images / batches if batches else 0.0,
+                'batch_sizes': dict(sorted(self._batch_sizes.items())),
+            }
+
+        def percentile(q):
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 2) if latencies else None
+
+        data['latency_ms'] = {'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99)}
+        # 最近若干批次的吞吐量（张/秒）
+        span = recent[-1][0] - recent[0][0] if len(recent) > 1 else 0
+        data['images_per_sec'] = round(sum(n for _, n in recent[1:]) / span, 1) if span > 0 else None
+        return data
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch):
+        import numpy as np
+        n = len(batch)
+        try:
+            raw = np.stack([req.image for req in batch])
+            if self.channels == 3:
+                raw = raw[..., ::-1]  # OpenCV 为 BGR，训练时使用 RGB
+            x = np.zeros((_bucket(n, self.max_batch),) + raw.shape[1:], dtype=np.float32)
+            np.multiply(raw, np.float32(1 / 255), out=x[:n], casting='unsafe')
+            probs = np.asarray(self.model.predict_on_batch(x))[:n]
+            results = decode_outputs(probs, self.labels)
+        except Exception as e:
+            for req in batch:
+                req.error = e
+                req.done.set()
+            return
+        with self._lock:
+            self.images += n
+            self._batch_sizes[n] += 1
+            self._recent.append((time.monotonic(), n))
+        for req, result in zip(batch, results):
+            req.result = result
+            req.batch_size = n
+            req.done.set()
+
+
+class PredictService:
+    """按模型库中的名称和版本管理常驻的批处理器
+
+    registry: aiblocks.registry.ModelRegistry
+    """
+
+    def __init__(self, registry, max_batch=64, max_wait=0.005):
+        self.registry = registry
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._batchers = {}
+        # 正在加载的模型：(名称, 版本) -> Future
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def batcher(self, name, version=None):
+        """返回模型的批处理器（首次使用时加载模型）
+
+        模型不存在时抛出 FileNotFoundError，不是 Keras 图片模型时抛出 ValueError。
+        模型在锁外加载：同一模型的并发请求等待同一次加载，其他模型的请求不受影响。
+        """
+        meta = self.registry.meta(name, version)
+        if meta is None:
+            raise FileNotFoundError(f"模型库中不存在模型 {name}")
+        if meta.get('framework') != KERAS:
+            raise ValueError(f"模型 {name} 不是 Keras 模型，不支持批量推理")
+        key = (name, meta['version'])
+        with self._lock:
+            batcher = self._batchers.get(key)
+            future = self._loading.get(key)
+            owner = batcher is None and future is None
+            if owner:
+                future = self._loading[key] = Future()
+        if batcher is not None:
+            return batcher, meta['version']
+        if not owner:
+            return future.result(), meta['version']
+        try:
+            model = self.registry.load(name, meta['version'])
+            batcher = ModelBatcher(model, meta.get('labels'), self.max_batch, self.max_wait)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._batchers[key] = batcher
+            del self._loading[key]
+        future.set_result(batcher)
+        return batcher, meta['version']
+
+    def predict(self, name, images, version=None, timeout=30):
+        batcher, version = self.batcher(name, version)
+        results, batch_sizes, latency = batcher.predict(images, timeout)
+        return {
+            'model': name,
+            'version': version,
+            'predictions': results,
+            'batch_sizes': batch_sizes,
+            'latency_ms': round(latency, 2),
+        }
+
+    def stats(self):
+        with self._lock:
+            batchers = dict(self._batchers)
+        return {f'{name}:{version}': b.stats() for (name, version), b in batchers.items()}
@@ -0,0 +1,253 @@
+"""运行结果缓存：以规范化代码 + 所引用数据集的指纹为键，缓存 stdout 和生成的图片
+
+同一个 Blockly 程序在数据集未变化时重复提交，直接返回上次的输出和图片，
+不再重新执行。缓存按最近使用顺序淘汰，总大小和条目数都有上限。
+"""
+import ast
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import tokenize
+from collections import OrderedDict
+from pathlib import Path
+
+# 缓存格式变化时递增，使旧条目失效
+CACHE_VERSION = '1'
+# 单个目录指纹最多统计的文件数；指纹在请求线程中计算，超过时不使用缓存
+MAX_WALK_FILES = 20000
+
+
+def normalize_code(code):
+    """去掉注释、空行和行尾空白，使只改动注释或排版的程序得到相同的键"""
+    try:
+        tokens = tokenize.generate_tokens(io.StringIO(code).readline)
+        parts = [f'{tok.type}:{tok.string}' for tok in tokens
+                 if tok.type not in (tokenize.COMMENT, tokenize.NL)]
+        return '\n'.join(parts)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        lines = [line.rstrip() for line in code.replace('\r\n', '\n').split('\n')]
+        return '\n'.join(line for line in lines if line)
+
+
+def _under_root(path, root, exclude):
+    """path 位于数据集根目录之下（不含根目录本身），且首级目录/文件名不匹配 exclude 中的模式"""
+    try:
+        parts = path.relative_to(root).parts
+    except ValueError:
+        return False
+    if not parts:
+        return False
+    return not parts[0].startswith('.') and not any(fnmatch.fnmatch(parts[0], pattern) for pattern in exclude)
+
+
+def referenced_paths(code, base_dir, exclude=()):
+    """找出代码中以字符串字面量出现、且实际存在的数据集文件或目录
+
+    只统计 base_dir 之下的路径："/"、"."、".." 等指向根目录本身或其上级的字面量，
+    以及以 . 开头或匹配 exclude 的首级目录（运行沙箱、缓存等每次运行都会变化）都不计入。
+    """
+    root = Path(base_dir).resolve()
+    paths = set()
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(code).readline))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return []
+    for tok in tokens:
+        if tok.type != tokenize.STRING:
+            continue
+        try:
+            value = ast.literal_eval(tok.string)
+        except (ValueError, SyntaxError):
+            continue
+        if not isinstance(value, str) or not value.strip() or len(value) > 260 or '\n' in value:
+            continue
+        candidate = Path(value)
+        if not candidate.is_absolute():
+            candidate = root / candidate
+        try:
+            candidate = candidate.resolve()
+            if _under_root(candidate, root, exclude) and candidate.exists():
+                paths.add(candidate)
+        except (OSError, ValueError):
+            continue
+    return sorted(paths)
+
+
+def fingerprint(path, max_files=None):
+    """文件取 (大小, 修改时间)；目录取所有文件的数量、总大小和最新修改时间
+
+    目录中的文件超过 max_files（默认 MAX_WALK_FILES）个时停止遍历并返回 None，调用方应视为无法缓存。
+    """
+    path = Path(path)
+    if path.is_file():
+        st = path.stat()
+        return [str(path), st.st_size, st.st_mtime_ns]
+    if max_files is None:
+        max_files = MAX_WALK_FILES
+    count, total, latest = 0, 0, 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            count += 1
+            if count > max_files:
+                return None
+            total += st.st_size
+            latest = max(latest, st.st_mtime_ns)
+    return [str(path), count, total, latest]
+
+
+def dataset_fingerprints(code, base_dir, exclude=()):
+    """代码所引用数据集的指纹列表；有目录过大无法统计时返回 None"""
+    prints = []
+    for path in referenced_paths(code, base_dir, exclude):
+        fp = fingerprint(path)
+        if fp is None:
+            return None
+        prints.append(fp)
+    return prints
+
+
+def cache_key(code, base_dir, extra=None, exclude=()):
+    """extra 为其他会影响结果的状态（如引用的模型版本），需可 JSON 序列化
+
+    引用的数据集目录过大、无法统计指纹时返回 None，不使用缓存。
+    """
+    prints = dataset_fingerprints(code, base_dir, exclude)
+    if prints is None:
+        return None
+    h = hashlib.sha256()
+    h.update(CACHE_VERSION.encode())
+    h.update(normalize_code(code).encode('utf-8'))
+    for fp in prints:
+        h.update(json.dumps(fp).encode('utf-8'))
+    if extra is not None:
+        h.update(json.dumps(extra, sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class ResultCache:
+    """内容寻址的运行结果缓存
+
+    root: 缓存目录，每个条目为 <root>/<key>/result.json 加若干图片文件
+    max_bytes / max_entries: 总大小与条目数上限，超出时淘汰最久未使用的条目
+    """
+
+    def __init__(self, root, max_bytes=512 * 1024 * 1024, max_entries=500):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._load()
+
+    def _load(self):
+        """按上次使用时间恢复磁盘上已有的条目"""
+        entries = []
+        for entry in self.root.iterdir():
+            meta = entry / 'result.json'
+            # 以 . 开头的是写入中断留下的临时目录
+            if meta.is_file() and not entry.name.startswith('.'):
+                size = sum(p.stat().st_size for p in entry.iterdir() if p.is_file())
+                entries.append((meta.stat().st_mtime, entry.name, size))
+            else:
+                shutil.rmtree(entry, ignore_errors=True)
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._bytes += size
+        self._evict()
+
+    def get(self, key):
+        """命中时返回 (result, 图片路径列表)，否则返回 None"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        entry = self.root / key
+        try:
+            with open(entry / 'result.json', encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(entry / 'result.json')
+        except (OSError, ValueError):
+            self._drop(key)
+            return None
+        return data['result'], [entry / name for name in data['files']]
+
+    def put(self, key, result, files):
+        """保存一次成功运行的结果和图片"""
+        entry = self.root / key
+        # 每次写入使用独立的临时目录，同一程序的两次运行同时完成时互不干扰
+        tmp = Path(tempfile.mkdtemp(prefix=f'.{key}.', suffix='.tmp', dir=self.root))
+        try:
+            names = []
+            for i, src in enumerate(files):
+                name = f'{i:04d}{Path(src).suffix}'
+                _link_or_copy(src, tmp / name)
+                names.append(name)
+            with open(tmp / 'result.json', 'w', encoding='utf-8') as f:
+                json.dump({'result': result, 'files': names}, f, ensure_ascii=False)
+            size = sum(p.stat().st_size for p in tmp.iterdir())
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        with self._lock:
+            if key in self._entries:
+                shutil.rmtree(tmp, ignore_errors=True)
+                return
+            try:
+                os.replace(tmp, entry)
+            except OSError:
+                shutil.rmtree(tmp, ignore_errors=True)
+                return
+            self._entries[key] = size
+            self._bytes += size
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _drop(self, key):
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self._bytes -= size
+        shutil.rmtree(self.root / key, ignore_errors=True)
+
+    def _evict(self):
+        # 调用方需持有锁
+        while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            shutil.rmtree(self.root / key, ignore_errors=True)
@@ -746,10 +746,7 @@ Blockly.Python['ai_framework'] = function(block) {
     else if (sframework=='Scikit-Learn'){
     value=value+'import os\n';
     value=value+'import pickle\n';
-    value=value+'from tqdm import tqdm\n';
     value=value+'import re\n';
-    value=value+'import jieba\n';
-    value=value+'from gensim.models import Word2Vec\n';
         value=value+'import numpy as np\n';
         value=value+'import sklearn\n';
         value=value+'from urllib.request import urlretrieve\n';
@@ -854,6 +851,8 @@ Blockly.Python['ai_datasetfrompath'] = function(block) {
     var imgsize=block.getFieldValue('IMG_SIZE');
     var batchsize=block.getFieldValue('BATCH_SIZE');
     var epochs0=block.getFieldValue('EPOCHS');
+    var pipeline=block.getFieldValue('PIPELINE');
+    var workers=block.getFieldValue('WORKERS');
     var value='';
     if (dataset=='zebra'){
         value=value+'# 数据集路径\n';
@@ -864,6 +863,13 @@ Blockly.Python['ai_datasetfrompath'] = function(block) {
         value=value+'IMG_SIZE = '+imgsize+'# 图片尺寸\n';
         value=value+'BATCH_SIZE = '+batchsize+'# 批次大小\n';
         value=value+'EPOCHS = '+epochs0+'# 迭代次数\n';
+      if (pipeline=='tfdata'){
+        value=value+'WORKERS = '+(parseInt(workers)||0)+'# 并行解码线程数，0 为自动\n';
+        value=value+'# 数据预处理：tf.data 并行解码、缓存并预取\n';
+        value=value+'from aiblocks.tfdata import image_dataset_from_directory\n';
+        value=value+'train_generator = image_dataset_from_directory(TRAIN_DIR, IMG_SIZE, batch_size=BATCH_SIZE, workers=WORKERS)\n';
+        value=value+'val_generator = image_dataset_from_directory(VAL_DIR, IMG_SIZE, batch_size=BATCH_SIZE, workers=WORKERS, shuffle=False)\n';
+      }else{
         value=value+'# 数据预处理\n';
         value=value+'train_datagen = ImageDataGenerator(rescale=1. / 255)\n';
         value=value+'val_datagen = ImageDataGenerator(rescale=1. / 255)\n';
@@ -882,6 +888,7 @@ Blockly.Python['ai_datasetfrompath'] = function(block) {
         value=value+'    class_mode=\'binary\',\n';
         value=value+'    shuffle=False\n';
         value=value+')\n';
+      }
     }
     return value;
 };
@@ -1037,14 +1044,11 @@ Blockly.Python['ai_dataset'] = function(block) {
         value=value+'                        self.samples.append((img_path, [0, 0, 0, 0, 0], (width, height)))\n';
         value=value+'#数据预处理\n';
         value=value+'    def load_data(self):\n';
-        value=value+'        images, labels = [], []\n';
+        value=value+'        from aiblocks.imgcache import load_images\n';
+        value=value+'        # 图片只在首次运行时解码缩放，之后从缓存内存映射读取\n';
+        value=value+'        images = load_images([s[0] for s in self.samples], (IMG_SIZE, IMG_SIZE), interpolation=\'bilinear\')\n';
+        value=value+'        labels = []\n';
         value=value+'        for img_path, label, (w, h) in self.samples:\n';
-        value=value+'            img = cv2.imread(img_path)\n';
-        value=value+'            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)\n';
-        value=value+'                              \n';
-        value=value+'            # 预处理\n';
-        value=value+'            img = cv2.resize(img, (IMG_SIZE, IMG_SIZE)) / 255.0\n';
-        value=value+'                                     \n';
         value=value+'            # 归一化坐标（仅正样本）\n';
         value=value+'            if label[0] == 1:\n';
         value=value+'                norm_coords = [\n';
@@ -1055,25 +1059,15 @@ Blockly.Python['ai_dataset'] = function(block) {
         value=value+'            else:\n';
         value=value+'                labels.append([0, 0, 0, 0, 0])\n';
         value=value+'                              \n';
-        value=value+'            images.append(img)\n';
         value=value+'                                   \n';
-        value=value+'        return np.array(images), np.array(labels)\n';
+        value=value+'        # 图片保持 uint8，训练和评估时由 image_batches 按批次归一化到 [0, 1]\n';
+        value=value+'        return images, np.array(labels, dtype=np.float32)\n';
     }else if(dataset=='Cat_or_dog'){
-    value=value+'# 从标签文件中加载图片和对应标签    \n';
+    value=value+'from aiblocks.imgcache import load_image_dataset, image_batches\n';
+    value=value+'# 从标签文件中加载图片和对应标签：首次运行时解码缩放并缓存为 uint8 数组，之后直接内存映射\n';
     value=value+'def load_data(data_dir, label_file, target_size=(224, 224)):\n';
-    value=value+'    images = []     \n';
-    value=value+'    labels = [] \n';
-    value=value+"    with open(os.path.join(data_dir, label_file), 'r') as f: \n";
-    value=value+'        for line in f: \n';
-    value=value+"            path, label = line.strip().split(',') \n";
-    value=value+'            image_path = os.path.join(data_dir, path)  \n';
-    value=value+'            image = tf.keras.preprocessing.image.load_img(image_path, target_size=target_size)\n';
-    value=value+'            image = tf.keras.preprocessing.image.img_to_array(image)\n';
-    value=value+'            images.append(image)\n';
-    value=value+'            labels.append(int(label))\n';
-    value=value+'    # 将图片数组归一化到 [0, 1]，同时将数据从列表转换为 NumPy 数组\n';
-    value=value+"    images = np.array(images, dtype='float32') / 255.0  # 归一化图像\n";
-    value=value+"    labels = np.array(labels, dtype='int32')  # 标签转为整数数组\n";
+    value=value+'    images, labels, _ = load_image_dataset(data_dir, label_file, target_size=target_size)\n';
+    value=value+'    # 图片保持 uint8，训练时由 image_batches 按批次归一化到 [0, 1]\n';
     value=value+'    return images, labels\n';
     value = value + '# 数据集所在的路径和标签文件\n';
 value = value + "train_dir = 'C:\\sourcecode\\datasets\\catdog'\n";
@@ -1110,23 +1104,47 @@ value = value + 'test_images, test_labels = load_data(test_dir, test_label_file)
 //        value=value+'    return np.expand_dims(img_normalized, axis=0), img_rgb\n';
     }else if (dataset=='ASR'){
       value=value+'# 2. 处理数据集\n';
-value=value+'def mfcc(wav_path, delta=2):\n';
-value=value+'    y, sr = librosa.load(wav_path)\n';
-value=value+'    mfcc_feat = librosa.feature.mfcc(y = y, sr = sr, n_mfcc = 13)\n';
-value=value+'    ans = [mfcc_feat]\n';
-value=value+'    if delta >= 1:\n';
-value=value+'        mfcc_delta1 = librosa.feature.delta(mfcc_feat, order = 1, mode = "nearest")\n';
-value=value+'        ans.append(mfcc_delta1)\n';
-value=value+'    if delta >= 2:\n';
-value=value+'        mfcc_delta2 = librosa.feature.delta(mfcc_feat, order = 2, mode = "nearest")\n';
-value=value+'        ans.append(mfcc_delta2)\n';
-value=value+'    return np.transpose(np.concatenate(ans, axis = 0),[1,0])\n\n';
+value=value+'# MFCC 特征提取：进程池并行计算，按文件内容缓存，重复训练时不再解码音频\n';
+value=value+'from aiblocks.audio import mfcc, mfcc_features, mfcc_by_label, score_gmms, confusion_matrix, format_confusion_matrix\n\n';
     }
     else{
         value=value+sframework+'\n';
     }
     return value;
 };
+// 工作区中的 CSV 数据集积木是否选择了分块流式读取
+function aiChunkedDataset(block){
+    var blocks=block.workspace.getAllBlocks(false);
+    for (var i=0;i<blocks.length;i++){
+        if (blocks[i].type=='ai_datasetfromfile' && blocks[i].getFieldValue('MODE')=='chunked'){
+            return true;
+        }
+    }
+    return false;
+}
+// 工作区中第一个指定类型的积木，没有时返回 null
+function aiFindBlock(block, type){
+    var blocks=block.workspace.getAllBlocks(false);
+    for (var i=0;i<blocks.length;i++){
+        if (blocks[i].type==type){
+            return blocks[i];
+        }
+    }
+    return null;
+}
+Blockly.Python['ai_hypersearch'] = function(block){
+    var space=block.getFieldValue('SPACE');
+    var trials=parseInt(block.getFieldValue('TRIALS'))||9;
+    var maxEpochs=parseInt(block.getFieldValue('MAX_EPOCHS'))||10;
+    var eta=parseInt(block.getFieldValue('ETA'))||3;
+    var workers=parseInt(block.getFieldValue('WORKERS'))||0;
+    var value='';
+    value=value+'from aiblocks.search import parse_space\n';
+    value=value+'# 超参数搜索范围：a,b,c 为候选值，low~high 为区间\n';
+    value=value+'search_space = parse_space(\''+space.replace(/\\/g, '\\\\').replace(/'/g, '\\\'')+'\')\n';
+    value=value+'search_options = dict(n_trials='+trials+', max_epochs='+maxEpochs+', eta='+eta+', workers='+workers+')\n';
+    return value;
+};
 Blockly.Python['ai_datasetfromfile'] = function(block){
     //var sframework = block.getFieldValue('NAME');
     var datapath=block.getFieldValue('datapath');
@@ -1134,15 +1152,31 @@ Blockly.Python['ai_datasetfromfile'] = function(block){
     var train_size=block.getFieldValue('train_size');
     var val_size=block.getFieldValue('val_size');
     var test_size=block.getFieldValue('test_size');
+    var mode=block.getFieldValue('MODE');
+    var columns=block.getFieldValue('COLUMNS');
+    var chunksize=block.getFieldValue('CHUNKSIZE');
     var value='';
      value=value+'import pandas as pd\n';
-
-     value=value+'# 1. 读取 CSV 文件\n';
      datapath=datapath.replace(/\\/g, '/');
-     value=value+'dataset = pd.read_csv(\''+datapath+'\')\n';
+   if (mode=='chunked'){
+     var cols=(columns||'').split(/[,，]/).map(function(c){return c.trim();}).filter(function(c){return c;});
+     if (cols.length && target!='none' && cols.indexOf(target)<0){
+         cols.push(target);
+     }
+     value=value+'from aiblocks.tabular import ChunkedCSV\n\n';
+     value=value+'# 1. 分块流式读取 CSV：只读取所需的列并使用显式数据类型，内存中同时只保留一个数据块\n';
+     value=value+'dataset = ChunkedCSV(\''+datapath+'\', columns='+(cols.length ? '[\''+cols.join('\', \'')+'\']' : 'None')+', chunksize='+(parseInt(chunksize)||100000)+')\n';
+
+     value=value+'# 获取所有的列名\n';
+     value=value+'all_columns = list(dataset.columns)\n';
+   }else{
+     value=value+'from aiblocks.columnar import read_table\n\n';
+     value=value+'# 1. 读取 CSV 文件（首次读取后转换为列式缓存，文件未变化时直接读取缓存）\n';
+     value=value+'dataset = read_table(\''+datapath+'\')\n';
 
      value=value+'# 获取所有的列名\n';
      value=value+'all_columns = dataset.columns.tolist()\n';
+   }
      value=value+'target_column = \''+target+'\'  # 获取类标列名\n\n';
 //
 //     value=value+'# 获取特征列名（排除目标列）\n';
@@ -1159,6 +1193,34 @@ Blockly.Python['ai_buildmodel'] = function(block) {
     var value='';
     if (buildmodel=='custom'){
         value=value+'custom\n';
+    }else if (buildmodel=='kmeans' && aiChunkedDataset(block)){
+        value=value+'from sklearn.cluster import MiniBatchKMeans\n';
+        value=value+'from aiblocks.tabular import fit_incremental\n\n';
+        value=value+'# 选择用于聚类的特征列（排除CHANNEL和REGION）\n';
+        value=value+"X = dataset[['Fresh', 'Milk', 'Grocery', 'Frozen', 'Detergents_Paper', 'Delicassen']] \n";
+        value=value+'scaler = StandardScaler()\n';
+        value=value+'# 数据分块读取：标准化器和 MiniBatchKMeans 都按块增量拟合，聚类数量为 3\n';
+        value=value+'kmeans = MiniBatchKMeans(n_clusters=3, random_state=42, n_init=3)\n';
+        value=value+'fit_incremental(kmeans, X, epochs=3, scaler=scaler)\n';
+        value=value+'# 聚类标签和可视化使用随机抽取的样本\n';
+        value=value+'X_scaled = scaler.transform(X.sample(10000).to_numpy())\n';
+    }else if (buildmodel=='kmeans_sweep'){
+        value=value+'from sklearn.cluster import KMeans\n';
+        value=value+'from aiblocks.cluster import kmeans_sweep, plot_sweep\n\n';
+        value=value+'# 选择用于聚类的特征列（排除CHANNEL和REGION）\n';
+        value=value+"X = dataset[['Fresh', 'Milk', 'Grocery', 'Frozen', 'Detergents_Paper', 'Delicassen']] \n";
+        if (aiChunkedDataset(block)){
+            value=value+'# 数据分块读取，在随机抽取的样本上选择聚类数\n';
+            value=value+'X = X.sample(10000)\n';
+        }
+        value=value+'scaler = StandardScaler()\n';
+        value=value+'X_scaled = scaler.fit_transform(X)\n';
+        value=value+'# 并行拟合 k = 2..10 的 KMeans，肘部法和轮廓系数画在同一张图中\n';
+        value=value+'best_k, sweep_results = kmeans_sweep(X_scaled, range(2, 11))\n';
+        value=value+"plot_sweep(sweep_results, 'output_sweep.png', best_k=best_k)\n";
+        value=value+'# 使用轮廓系数最高的聚类数\n';
+        value=value+'kmeans = KMeans(n_clusters=best_k, random_state=42)\n\n';
+        value=value+'kmeans.fit(X_scaled)  \n';
     }else if (buildmodel=='kmeans'){
         value=value+'from sklearn.cluster import KMeans\n\n';
         value=value+'# 选择用于聚类的特征列（排除CHANNEL和REGION）\n';
@@ -1181,6 +1243,18 @@ Blockly.Python['ai_buildmodel'] = function(block) {
         value=value+"model.compile(optimizer='adam',loss='binary_crossentropy',metrics=['accuracy'])\n";
         value=value+'\n';
 
+    }else if (buildmodel=='LinearRegression' && aiChunkedDataset(block)){
+        value=value+'from sklearn.linear_model import SGDRegressor\n';
+        value=value+'from sklearn.preprocessing import StandardScaler\n';
+        value=value+'from aiblocks.tabular import fit_incremental, evaluate_regression\n\n';
+        value=value+"feature_name = 'latitude'  # 线性回归不需要太多特征，这里是latitude或longitude\n";
+        value=value+'\n';
+        value=value+'# 将数据集按行随机拆分为训练集和测试集（仍按块读取）\n';
+        value=value+'train_data, test_data = dataset.split(test_size=0.2, random_state=42)\n';
+        value=value+'\n';
+        value=value+'# 创建可按块增量训练的线性回归模型（最小二乘损失的 SGD），特征先标准化\n';
+        value=value+'scaler = StandardScaler()\n';
+        value=value+'model = SGDRegressor(random_state=42)\n';
     }else if (buildmodel=='LinearRegression'){
         value=value+'from sklearn.linear_model import LinearRegression\n\n';
         value=value+"feature_name = 'latitude'  # 线性回归不需要太多特征，这里是latitude或longitude\n";
@@ -1337,29 +1411,16 @@ value = value + 'os.makedirs(DATA_DIR, exist_ok=True)   \n';
 value = value + '                                         \n';
 value = value + '                                                       \n';
 value = value + '# ====================== 数据预处理函数 ======================   \n';
-value = value + 'def clean_text(text):           \n';
-value = value + '    """清理文本，只保留中文""" \n';
-value = value + "    text = re.sub(r'[^\u4e00-\u9fa5]', '', text)\n";
-value = value + '    return text.strip() \n';
-value = value + '                 \n';
-value = value + '                 \n';
 value = value + 'def get_stopwords():  \n';
 value = value + '    """加载停用词表"""  \n';
 value = value + "    with open(STOPWORDS_PATH, 'r', encoding='utf8') as f: \n";
 value = value + "        return set(f.read().strip().split('\\n'))  \n";
 value = value + '                                     \n';
 value = value + '                              \n';
-value = value + 'def tokenize(text, stopwords): \n';
-value = value + '    """分词并去除停用词""" \n';
-value = value + '    words = [word for word in jieba.cut(text) if word not in stopwords] \n';
-value = value + '    return words \n';
-value = value + '         \n';
-value = value + '              \n';
+value = value + 'from aiblocks.text import tokenize_file, load_word2vec, sentence_vectors\n';
 value = value + 'def load_and_process(file_path, stopwords): \n';
-value = value + '    """加载并处理数据""" \n';
-value = value + "    with open(file_path, 'rb') as f:\n";
-value = value + '        contents = pickle.load(f)\n';
-value = value + '    return [tokenize(clean_text(text), stopwords) for text in tqdm(contents)]\n';
+value = value + '    """加载并处理数据：多进程分块分词，返回流式语料（结果按语料和停用词表缓存）""" \n';
+value = value + '    return tokenize_file(file_path, stopwords)\n';
 
 }
     return value;
@@ -1369,6 +1430,12 @@ Blockly.Python['ai_trainmodel'] = function(block) {
     var value='\n';
     if (trainmodel=='custom'){
         value=value+'custom\n';
+    }else if (trainmodel=='kmeans' && aiChunkedDataset(block)){
+        value=value+'# 模型已在构建时按块增量训练，这里为抽样数据分配聚类标签\n';
+        value=value+'cluster_labels = kmeans.predict(X_scaled)\n';
+    }else if (trainmodel=='LinearRegression' && aiChunkedDataset(block)){
+        value=value+'# 按块增量训练模型\n';
+        value=value+'fit_incremental(model, train_data, features=[feature_name], target=target_column, epochs=5, scaler=scaler)\n';
     }else if (trainmodel=='kmeans'){
         value=value+'# 训练模型\n';
         value=value+'kmeans.fit(X_scaled)\n';
@@ -1378,14 +1445,28 @@ Blockly.Python['ai_trainmodel'] = function(block) {
         value=value+'# 训练模型\n';
         value=value+'model.fit(X_train, y_train)\n';
     }
+    else if (trainmodel=='FCNN' && aiFindBlock(block, 'ai_hypersearch')){
+        value=value+'from types import SimpleNamespace\n';
+        value=value+'from aiblocks.search import successive_halving, train_fcnn\n';
+        value=value+'# 并行搜索超参数：每轮淘汰表现较差的组合，存活的组合继续训练更多轮\n';
+        value=value+'model, best_params, leaderboard = successive_halving(\n';
+        value=value+'    train_fcnn, search_space, (x_train, y_train, x_val, y_val), base_params=params, **search_options)\n';
+        value=value+'params.update(best_params)\n';
+        value=value+'# 最佳组合的训练历史，供后续积木绘制准确率曲线\n';
+        value=value+"history = SimpleNamespace(history=leaderboard[0]['history'])\n";
+    }
     else if (trainmodel=='FCNN'){
-        value=value+'# 训练模型\n';
-        value=value+'history = model.fit(x_train, y_train,\n';
+        value=value+'from aiblocks.checkpoint import fit_resumable\n';
+        value=value+'# 训练模型（每轮保存检查点，超时后再次提交从上次完成的轮次继续）\n';
+        value=value+'history = fit_resumable(model, x_train, y_train,\n';
         value=value+"                    validation_data=(x_val, y_val),\n";
         value=value+'                    epochs=params[\'num_epochs\'],\n';
         value=value+'                    batch_size=params[\'batch_size\'])\n';
     }
-    else if (trainmodel=='SVM'){
+    else if (trainmodel.indexOf('SVM')==0){
+    // SVM 训练引擎：SVM 为 SVC(kernel='linear')，SVM_linearsvc / SVM_sgd 可扩展到大语料，SVM_compare 对比各引擎
+    var engine=(trainmodel=='SVM')?'svc':trainmodel.substring(4);
+value = value + 'from aiblocks.linear import fit_classifier, compare_engines\n';
 value = value + '# ====================== 主程序 ======================\n';
 value = value + 'if __name__ == "__main__":\n';
 value = value + '    print("=" * 50)\n';
@@ -1410,8 +1491,9 @@ value = value + '    # 步骤2: 训练Word2Vec词向量模型\n';
 value = value + '    print("\\n[步骤2] 训练Word2Vec模型...")\n';
 value = value + '    try:\n';
 value = value + '        corpus = neg_data + pos_data\n';
-value = value + '        w2v_model = Word2Vec(\n';
-value = value + '            sentences=corpus,\n';
+value = value + '        # 同一语料和参数训练过的模型直接从缓存加载\n';
+value = value + '        w2v_model = load_word2vec(\n';
+value = value + '            corpus,\n';
 value = value + '            vector_size=100,  # 减小向量维度以加速处理\n';
 value = value + '            window=5,\n';
 value = value + '            min_count=1,\n';
@@ -1427,16 +1509,12 @@ value = value + '\n';
 value = value + '    # 步骤3: 构建句子向量\n';
 value = value + '    print("\\n[步骤3] 构建句子向量...")\n';
 value = value + '    try:\n';
-value = value + '        # 构建句子向量（词向量的平均值）\n';
-value = value + '        def build_sentence_vec(words):\n';
-value = value + '            vecs = [w2v_model.wv[word] for word in words if word in w2v_model.wv]\n';
-value = value + '            return np.mean(vecs, axis=0) if vecs else np.zeros(w2v_model.vector_size)\n';
-value = value + '\n';
-value = value + '        neg_vecs = [build_sentence_vec(words) for words in tqdm(neg_data)]\n';
-value = value + '        pos_vecs = [build_sentence_vec(words) for words in tqdm(pos_data)]\n';
+value = value + '        # 构建句子向量（词向量的平均值），按批次一次取词向量求平均\n';
+value = value + '        neg_vecs = sentence_vectors(w2v_model.wv, neg_data)\n';
+value = value + '        pos_vecs = sentence_vectors(w2v_model.wv, pos_data)\n';
 value = value + '\n';
 value = value + '        # 创建数据集\n';
-value = value + '        X = np.array(neg_vecs + pos_vecs)\n';
+value = value + '        X = np.concatenate([neg_vecs, pos_vecs])\n';
 value = value + '        y = np.array([0] * len(neg_vecs) + [1] * len(pos_vecs))\n';
 value = value + '\n';
 value = value + '        print(f"向量化数据完成: 总样本数 {len(X)}")\n';
@@ -1458,10 +1536,16 @@ value = value + '        X_train, X_test, y_train, y_test = train_test_split(\n'
 value = value + '            X_pca, y, test_size=0.2, random_state=42\n';
 value = value + '        )\n';
 value = value + '\n';
-value = value + '        # 使用线性SVM（更快且效果通常不错）\n';
-value = value + '        print("\\n训练SVM分类器...")\n';
-value = value + '        svc = svm.SVC(kernel=\'linear\', C=1.0)\n';
-value = value + '        svc.fit(X_train, y_train)\n';
+    if (engine=='compare'){
+value = value + '        # 对比各训练引擎的耗时与验证集准确率，选用验证集上最好的引擎（测试集只用于下方的最终评估）\n';
+value = value + '        print("\\n对比SVM训练引擎...")\n';
+value = value + '        engine, svc, _ = compare_engines(X_train, y_train, X_test, y_test, C=1.0)\n';
+    }else{
+value = value + '        # 训练引擎：svc 为精确解（样本多时很慢），linearsvc 与 sgd（小批量 partial_fit）可扩展到大语料\n';
+value = value + '        print("\\n训练SVM分类器（引擎: '+engine+'）...")\n';
+value = value + '        svc, train_seconds = fit_classifier(\''+engine+'\', X_train, y_train, C=1.0)\n';
+value = value + '        print(f"训练耗时: {train_seconds:.2f} 秒")\n';
+    }
 value = value + '\n';
 value = value + '        # 评估模型\n';
 value = value + '        y_pred = svc.predict(X_test)\n';
@@ -1479,12 +1563,12 @@ value = value + '\n';
     else if (trainmodel=='AlexNet5'){
         value=value+'# 创建模型\n';
         value=value+'model = create_alexnet_model()\n';
-        value=value+'# 训练模型\n';
-        value=value+'history = model.fit(\n';
-        value=value+'    train_images, train_labels,  # 输入训练集的图片和标签\n';
-        value=value+'    validation_data=(test_images, test_labels),  # 输入验证集的图片和标签\n';
-        value=value+'    epochs=2,  # 训练轮次设置为2轮\n';
-        value=value+'    batch_size=32  # 每次训练的小批量大小设置为32\n';
+        value=value+'from aiblocks.checkpoint import fit_resumable\n';
+        value=value+'# 训练模型（每轮保存检查点，超时后再次提交从上次完成的轮次继续）\n';
+        value=value+'history = fit_resumable(model,\n';
+        value=value+'    image_batches(train_images, train_labels, batch_size=32),  # 训练集，每批32张，读取时归一化\n';
+        value=value+'    validation_data=image_batches(test_images, test_labels, batch_size=32, shuffle=False),  # 验证集\n';
+        value=value+'    epochs=2  # 训练轮次设置为2轮\n';
         value=value+')\n';
     }else if (trainmodel=='Zebra') {
 
@@ -1506,16 +1590,17 @@ value = value + '\n';
         value=value+"        metrics=['accuracy']\n";
         value=value+'    )\n';
         value=value+'     \n';
-        value=value+'    # 训练模型\n';
-        value=value+'    history = model.fit(\n';
-        value=value+'        X_train, y_train,\n';
-        value=value+'        validation_data=(X_val, y_val),\n';
-        value=value+'        epochs=EPOCHS,\n';
-        value=value+'        batch_size=BATCH_SIZE\n';
+        value=value+'    # 训练模型（每轮保存检查点，超时后再次提交从上次完成的轮次继续）\n';
+        value=value+'    from aiblocks.checkpoint import fit_resumable\n';
+        value=value+'    from aiblocks.imgcache import image_batches\n';
+        value=value+'    history = fit_resumable(model,\n';
+        value=value+'        image_batches(X_train, y_train, batch_size=BATCH_SIZE),  # 每批读取时归一化，不复制整个数据集\n';
+        value=value+'        validation_data=image_batches(X_val, y_val, batch_size=BATCH_SIZE, shuffle=False),\n';
+        value=value+'        epochs=EPOCHS\n';
         value=value+'    )\n';
         value=value+'          \n';
         value=value+'    # 评估模型\n';
-        value=value+'    test_loss, test_acc = model.evaluate(X_test, y_test)\n';
+        value=value+'    test_loss, test_acc = model.evaluate(image_batches(X_test, y_test, batch_size=BATCH_SIZE, shuffle=False))\n';
         value=value+'    print(f"测试集评估结果：损失={test_loss:.4f}, 准确率={test_acc:.4f}")\n';
         value=value+'                           \n';
         value=value+'    # 保存模型 \n';
@@ -1525,20 +1610,8 @@ value = value + '\n';
       value=value+'# 4. 训练模型\n';
 value=value+'def train_model_gmm(train_dir):\n';
 value=value+'    gmm_models = []\n';
-value=value+'    for digit in os.listdir(train_dir):\n';
-value=value+'        digit_dir = os.path.join(train_dir, digit)\n';
-value=value+'        label = digit_dir[digit_dir.rfind("/") + 1:]\n';
-value=value+'        X = np.array([])\n';
-value=value+'        train_files = [x for x in os.listdir(digit_dir) if x.endswith(".wav")]\n';
-value=value+'        for file_name in train_files:\n';
-value=value+'            file_path = os.path.join(digit_dir, file_name)\n';
-value=value+'            with warnings.catch_warnings():\n';
-value=value+'                warnings.simplefilter("ignore")\n';
-value=value+'                features_mfcc = mfcc(file_path)\n';
-value=value+'            if len(X) == 0:\n';
-value=value+'                X = features_mfcc\n';
-value=value+'            else:\n';
-value=value+'                X = np.append(X, features_mfcc, axis=0)\n';
+value=value+'    # 每个数字的特征矩阵由缓存的逐文件特征一次拼接得到\n';
+value=value+'    for label, X in mfcc_by_label(train_dir):\n';
 value=value+'        model = GaussianMixture(n_components=2, covariance_type="diag")\n';
 value=value+'        np.seterr(all="ignore")\n';
 value=value+'        model.fit(X)\n';
@@ -1546,8 +1619,9 @@ value=value+'        gmm_models.append((model, label))\n';
 value=value+'    return gmm_models\n\n';
     }
     else if (trainmodel=='CNN'){
-value=value+'    # 训练模型\n';
-value=value+'history = model.fit(train_generator,epochs=EPOCHS,validation_data=val_generator)    \n';
+value=value+'from aiblocks.checkpoint import fit_resumable\n';
+value=value+'# 训练模型（每轮保存检查点，超时后再次提交从上次完成的轮次继续）\n';
+value=value+'history = fit_resumable(model,train_generator,epochs=EPOCHS,validation_data=val_generator)    \n';
     }
     return value;
 }
@@ -1559,7 +1633,11 @@ Blockly.Python['ai_predictmodel'] = function(block) {
         value=value+'custom\n';
     }else if (predictmodel=='kmeans'){
         value=value+'# 获取聚类结果    \n';
+      if (aiChunkedDataset(block)){
+        value=value+"cluster_labels = kmeans.predict(X_scaled)\n";
+      }else{
         value=value+"cluster_labels = kmeans.labels_\n";
+      }
         value=value+'plt.figure(figsize=(8, 6))\n';
         value=value+'plt.scatter(X_scaled[:, 0], X_scaled[:, 1], c=cluster_labels, cmap=\'viridis\', marker=\'o\', edgecolor=\'k\', s=50)\n';
 
@@ -1587,6 +1665,24 @@ Blockly.Python['ai_predictmodel'] = function(block) {
         value=value+'print("主成分:", pca.components_)\n';
 
    }
+    else if (predictmodel=='LinearRegression' && aiChunkedDataset(block)){
+        value=value+'# 按块预测并评估模型\n';
+        value=value+'mse, r2 = evaluate_regression(model, test_data, [feature_name], target_column, scaler=scaler)\n';
+        value=value+"print(f'Mean Squared Error: {mse:.2f}')\n";
+        value=value+"print(f'R^2 Score: {r2:.2f}')\n";
+        value=value+'# 可视化拟合结果（随机抽取的测试样本）\n';
+        value=value+'test_sample = test_data.sample(5000)\n';
+        value=value+'X_test = test_sample[[feature_name]]\n';
+        value=value+'y_test = test_sample[[target_column]]\n';
+        value=value+'y_pred = model.predict(scaler.transform(X_test.to_numpy()))\n';
+        value=value+"plt.scatter(X_test, y_test, color='blue', label='Actual')\n";
+        value=value+"plt.plot(X_test, y_pred, color='red', linewidth=3, label='Predicted')\n";
+        value=value+'plt.xlabel(feature_name)\n';
+        value=value+"plt.ylabel('MEDV (' + target_column + ')')\n";
+        value=value+"plt.title(f'Linear Regression Fit for {feature_name}')\n";
+        value=value+'plt.legend() \n';
+        value=value+"plt.savefig('output.png')  \n";
+    }
     else if (predictmodel=='LinearRegression'){
         value=value+'# 进行预测\n';
         value=value+'y_pred = model.predict(X_test)   \n';
@@ -1692,30 +1788,24 @@ Blockly.Python['ai_predictmodel'] = function(block) {
     }else if (predictmodel=='ASR'){
       value=value+'# 6. 预测并评估模型\n';
 value=value+'def predict_gmm(gmm_models, test_files):\n';
-value=value+'    count = 0\n';
-value=value+'    pred_true = 0\n';
-value=value+'    for test_file in test_files:\n';
-value=value+'        with warnings.catch_warnings():\n';
-value=value+'            warnings.simplefilter("ignore")\n';
-value=value+'            features_mfcc = mfcc(test_file)\n';
-value=value+'        max_score = -float("inf")\n';
-value=value+'        predicted_label = ""\n';
-value=value+'        for item in gmm_models:\n';
-value=value+'            model, label = item\n';
-value=value+'            score = model.score(features_mfcc)\n';
-value=value+'            if score > max_score:\n';
-value=value+'                max_score = score\n';
-value=value+'                predicted_label = label\n';
+value=value+'    # 所有测试文件对所有数字模型的对数似然一次算出（特征并行提取，已缓存的直接读取）\n';
+value=value+'    scores = score_gmms(gmm_models, mfcc_features(test_files))\n';
+value=value+'    labels = [label for _, label in gmm_models]\n';
+value=value+'    true_digits, pred_digits = [], []\n';
+value=value+'    for test_file, row in zip(test_files, scores):\n';
 value=value+'        true_label = os.path.splitext(test_file)[0][-1]\n';
-value=value+'        pred_digit = predicted_label[-1]\n';
+value=value+'        pred_digit = labels[row.argmax()][-1]\n';
 value=value+'        filename = os.path.basename(test_file)\n';
 value=value+'        print(f"文件: {filename}, 真实结果: {true_label}, 预测结果: {pred_digit}")\n';
-value=value+'        count += 1\n';
-value=value+'        if true_label == pred_digit:\n';
-value=value+'            pred_true += 1\n';
+value=value+'        true_digits.append(true_label)\n';
+value=value+'        pred_digits.append(pred_digit)\n';
+value=value+'    count = len(true_digits)\n';
+value=value+'    pred_true = sum(t == p for t, p in zip(true_digits, pred_digits))\n';
 value=value+'    print("---------- GMM (GaussianMixture) ----------")\n';
 value=value+'    print("Train num: 160, Test num: %d, Predict true num: %d"%(count, pred_true))\n';
-value=value+'    print("Accuracy: %.2f"%(pred_true / count))\n\n';
+value=value+'    print("Accuracy: %.2f"%(pred_true / count))\n';
+value=value+'    print("混淆矩阵（行为真实数字，列为预测数字）:")\n';
+value=value+'    print(format_confusion_matrix(*confusion_matrix(true_digits, pred_digits)))\n\n';
 
 value=value+'if __name__ == "__main__":\n';
 value=value+'    gmm_models = train_model_gmm("./processed_train_records")\n';
@@ -1831,16 +1921,38 @@ Blockly.Python['ai_predictfile'] = function(block){
 
     return value;
 }
+// 模型库名称：取路径的文件名部分（去掉扩展名），保存和加载积木共用，保证两者对应同一个模型
+function aiModelName(modelpath){
+    return modelpath.replace(/\\/g, '/').split('/').pop().replace(/\.[^.]*$/, '');
+}
+// 训练（或构建）积木生成代码中保存模型的变量名
+function aiModelVar(block, sframework){
+    var source=aiFindBlock(block, 'ai_trainmodel')||aiFindBlock(block, 'ai_buildmodel');
+    var smodel=source?source.getFieldValue('NAME'):sframework;
+    if (smodel=='kmeans'||smodel=='kmeans_sweep'){
+        return 'kmeans';
+    }else if (smodel.indexOf('SVM')==0){
+        return 'svc';
+    }else if (smodel=='Zebra'){
+        return 'trained_model';
+    }else if (smodel=='ASR'){
+        return 'gmm_models';
+    }
+    return 'model';
+}
 Blockly.Python['ai_savemodel'] = function(block) {
+    var sframework=block.getFieldValue('NAME');
     var modelpath=block.getFieldValue('modelpath');
 
     var value='';
 
-    modelpath=modelpath.replace(/\\/g, '/');
+    var modelname=aiModelName(modelpath);
+    var modelvar=aiModelVar(block, sframework);
 
-    // value=value+'    # 保存模型到文件，便于后续加载和使用\n';
-    // value=value+"model.save('cat_dog_classification_alexnet_binary.h5')\n";
-    // value=value+'print("模型已保存为 cat_dog_classification_alexnet_binary.h5")\n';
+    value=value+'# 保存模型到模型库，预测程序按名称加载即可，无需重新训练\n';
+    value=value+'from aiblocks.registry import save_model\n';
+    value=value+'model_version = save_model('+modelvar+', \''+modelname+'\')\n';
+    value=value+'print(f"模型已保存到模型库: '+modelname+' (版本 {model_version})")\n';
 return value;
 }
 Blockly.Python['ai_loadmodel'] = function(block) {
@@ -1849,14 +1961,15 @@ Blockly.Python['ai_loadmodel'] = function(block) {
     var value='';
 
     modelpath=modelpath.replace(/\\/g, '/');
-    if (sframework=='Pytorch'){
-        value=value+'from tensorflow.torch.models import load_model\n';
-    }
-    if (sframework=='keras'){
-        value=value+'from tensorflow.keras.models import load_model\n';
-        //value=value+'model = load_model(r\'D:\fcnn_models\fcnn_model.keras\')\n';
+    var modelname=aiModelName(modelpath);
+    var modelvar=aiModelVar(block, sframework);
+    // 先按名称在模型库中查找（与保存模型积木同名），模型库中没有时再按文件路径加载；已加载的模型在预热进程中复用
+    value=value+'from aiblocks.registry import load_model\n';
+    if (modelname==modelpath){
+        value=value+modelvar+' = load_model(\''+modelname+'\')\n';
+    }else{
+        value=value+modelvar+' = load_model(\''+modelname+'\', path=\''+modelpath+'\')\n';
     }
-    value=value+'model =load_model(\''+modelpath+'\')\n';
 
     return value;
 }
@@ -1870,7 +1983,8 @@ Blockly.Python['ai_loadFile'] = function(block) {
     if (sframework=='Pandas'){
         value=value+'import pandas as pd\n';
         if (filetype=='CSV'){
-            value=value+'df = pd.read_csv(\''+filepath+'\')\n';
+            value=value+'from aiblocks.columnar import read_table\n';
+            value=value+'df = read_table(\''+filepath+'\')\n';
         }
         else if(filetype=='EXCEL'){
             value=value+'BASE_DIR =(\''+filepath+'\')\n';
@@ -234,6 +234,18 @@ Blockly.defineBlocksWithJsonArray([{
             "SVM",
             "SVM"
         ],
+        [
+            "SVM(LinearSVC)",
+            "SVM_linearsvc"
+        ],
+        [
+            "SVM(SGD小批量)",
+            "SVM_sgd"
+        ],
+        [
+            "SVM(引擎对比)",
+            "SVM_compare"
+        ],
         [
             "Naive_Bayes",
             "Naive_Bayes"
@@ -270,6 +282,45 @@ Blockly.defineBlocksWithJsonArray([{
     "tooltip": "",
     "helpUrl": ""
 },
+{
+    "type": "ai_hypersearch",
+    "message0": "超参数搜索范围%1%2试验组数%3最大训练轮次%4淘汰比例%5并行进程数(0为自动)%6",
+    "args0": [
+    {
+        "type": "field_input",
+        "name": "SPACE",
+        "text": "learning_rate=0.001~0.1; batch_size=32,64,128; hidden_nodes=64,128,256"
+    },
+    {
+        "type": "input_dummy"
+    },
+    {
+        "type": "field_input",
+        "name": "TRIALS",
+        "text": "9"
+    },
+    {
+        "type": "field_input",
+        "name": "MAX_EPOCHS",
+        "text": "10"
+    },
+    {
+        "type": "field_input",
+        "name": "ETA",
+        "text": "3"
+    },
+    {
+        "type": "field_input",
+        "name": "WORKERS",
+        "text": "0"
+    }
+    ],
+    "previousStatement": null,
+    "nextStatement": null,
+    "colour": 270,
+    "tooltip": "设置后，训练模型积木（FCNN）改为并行搜索超参数：每轮只保留表现最好的 1/淘汰比例 组继续训练",
+    "helpUrl": ""
+},
 {
     "type": "ai_buildmodel",
   "message0": "请选择要构建的模型： %1",
@@ -306,6 +357,10 @@ Blockly.defineBlocksWithJsonArray([{
           "K均值(Kmeans)",
           "kmeans"
         ],
+        [
+          "K均值(并行扫描k值)",
+          "kmeans_sweep"
+        ],
         [
             "SVM",
             "SVM"
@@ -470,7 +525,7 @@ Blockly.defineBlocksWithJsonArray([{
     "helpUrl": ""
 }, {
     "type": "ai_datasetfrompath",
-    "message0": "所属框架 %1 的数据集 %2 %3 训练集路径: %4 %5 验证集路径: %6 %7 测试集路径: %8%9图片尺寸:%10批次大小:%11迭代次数:%12",
+    "message0": "所属框架 %1 的数据集 %2 %3 训练集路径: %4 %5 验证集路径: %6 %7 测试集路径: %8%9图片尺寸:%10批次大小:%11迭代次数:%12 数据管道:%13并行数:%14",
     "args0": [
       {
           "type": "field_dropdown",
@@ -601,6 +656,25 @@ Blockly.defineBlocksWithJsonArray([{
           "type": "field_input",
           "name": "EPOCHS",
           "text": "15"
+      },
+      {
+          "type": "field_dropdown",
+          "name": "PIPELINE",
+          "options": [
+            [
+              "ImageDataGenerator",
+              "generator"
+            ],
+            [
+              "tf.data(并行解码)",
+              "tfdata"
+            ]
+          ]
+      },
+      {
+          "type": "field_input",
+          "name": "WORKERS",
+          "text": "0"
       }
     ],
     "previousStatement": null,
@@ -610,7 +684,7 @@ Blockly.defineBlocksWithJsonArray([{
     "helpUrl": ""
 }, {
     "type": "ai_datasetfromfile",
-    "message0": "数据集文件路径%1%2类标列名%3%4训练集数量:%5验证集数量:%6测试集数量:%7",
+    "message0": "数据集文件路径%1%2类标列名%3%4训练集数量:%5验证集数量:%6测试集数量:%7%8读取方式%9读取的列(逗号分隔,空为全部)%10每块行数%11",
     "args0": [
 
     {
@@ -644,6 +718,33 @@ Blockly.defineBlocksWithJsonArray([{
         "type": "field_input",
         "name": "test_size",
         "text": "0.2"
+    },
+    {
+        "type": "input_dummy"
+    },
+    {
+        "type": "field_dropdown",
+        "name": "MODE",
+        "options": [
+          [
+            "一次读入内存",
+            "full"
+          ],
+          [
+            "分块流式读取(大文件)",
+            "chunked"
+          ]
+        ]
+    },
+    {
+        "type": "field_input",
+        "name": "COLUMNS",
+        "text": ""
+    },
+    {
+        "type": "field_input",
+        "name": "CHUNKSIZE",
+        "text": "100000"
     }
     ],
     "previousStatement": null,
@@ -0,0 +1,55 @@
+"""result_cache 的缓存键：只统计 TEMP_DIR 下共享数据集的指纹"""
+import result_cache
+from result_cache import cache_key, referenced_paths
+
+EXCLUDE = ('runs', 'artifacts')
+
+
+def _temp_dir(tmp_path):
+    """模拟 TEMP_DIR：一个共享数据集加上每次运行都会变化的沙箱、产物和缓存目录"""
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'train.csv').write_text('a,b\n1,2\n')
+    for name in ('runs', 'artifacts', '.cache'):
+        (tmp_path / name).mkdir()
+    return tmp_path
+
+
+def _touch_run_dirs(root, i):
+    for name in ('runs', 'artifacts', '.cache'):
+        (root / name / f'{i}.txt').write_text(str(i))
+
+
+def test_root_literals_are_not_fingerprinted(tmp_path):
+    root = _temp_dir(tmp_path)
+    code = "import os\nprint(os.listdir('/'), os.listdir('.'), os.listdir('..'), '" + str(root) + "')\n"
+    assert referenced_paths(code, root, EXCLUDE) == []
+    before = cache_key(code, root, exclude=EXCLUDE)
+    _touch_run_dirs(root, 1)
+    assert cache_key(code, root, exclude=EXCLUDE) == before
+
+
+def test_run_dirs_are_excluded(tmp_path):
+    root = _temp_dir(tmp_path)
+    code = "open('runs/x.txt'); open('artifacts'); open('.cache')\n"
+    _touch_run_dirs(root, 0)
+    (root / 'runs' / 'x.txt').write_text('x')
+    assert referenced_paths(code, root, EXCLUDE) == []
+
+
+def test_dataset_change_changes_key(tmp_path):
+    root = _temp_dir(tmp_path)
+    code = "import pandas as pd\ndf = pd.read_csv('data/train.csv')\n"
+    assert referenced_paths(code, root, EXCLUDE) == [(root / 'data' / 'train.csv').resolve()]
+    before = cache_key(code, root, exclude=EXCLUDE)
+    _touch_run_dirs(root, 1)
+    assert cache_key(code, root, exclude=EXCLUDE) == before
+    (root / 'data' / 'train.csv').write_text('a,b\n1,2\n3,4\n')
+    assert cache_key(code, root, exclude=EXCLUDE) != before
+
+
+def test_large_directory_is_not_cached(tmp_path, monkeypatch):
+    root = _temp_dir(tmp_path)
+    for i in range(3):
+        (root / 'data' / f'{i}.csv').write_text('a\n')
+    monkeypatch.setattr(result_cache, 'MAX_WALK_FILES', 2)
+    assert cache_key("open('data')\n", root, exclude=EXCLUDE) is None